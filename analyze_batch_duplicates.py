@@ -12,6 +12,8 @@ from typing import Dict, List, Set, Tuple
 import argparse
 from datetime import datetime
 
+from espscraper.jsonl_io import open_jsonl, JSONL_SUFFIXES
+
 
 class BatchAnalyzer:
     def __init__(self, batch_dir: str = "batch"):
@@ -25,7 +27,9 @@ class BatchAnalyzer:
         print(f"🔍 Analyzing batch files in: {self.batch_dir}")
         
         # Find all batch files
-        batch_files = glob.glob(os.path.join(self.batch_dir, "*.jsonl"))
+        batch_files = []
+        for suffix in JSONL_SUFFIXES:
+            batch_files.extend(glob.glob(os.path.join(self.batch_dir, f"*{suffix}")))
         print(f"📁 Found {len(batch_files)} batch files")
         
         if not batch_files:
@@ -48,7 +52,7 @@ class BatchAnalyzer:
         product_count = 0
         
         try:
-            with open(batch_file, 'r', encoding='utf-8') as f:
+            with open_jsonl(batch_file, 'r') as f:
                 for line_num, line in enumerate(f, 1):
                     line = line.strip()
                     if not line:
@@ -11,6 +11,9 @@ import argparse
 from datetime import datetime
 from typing import List, Dict, Any, Set
 
+from espscraper.jsonl_io import open_jsonl
+from espscraper.product_store import materialize_product
+
 
 class BatchPreparer:
     def __init__(self, output_dir: str = "prepared_batches"):
@@ -21,13 +24,13 @@ class BatchPreparer:
         """Load products from a JSONL file"""
         products = []
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
+            with open_jsonl(file_path, "r") as f:
                 for line_num, line in enumerate(f, 1):
                     line = line.strip()
                     if not line:
                         continue
                     try:
-                        product = json.loads(line)
+                        product = materialize_product(json.loads(line))
                         products.append(product)
                     except json.JSONDecodeError as e:
                         print(f"⚠️ Error parsing line {line_num} in {file_path}: {e}")
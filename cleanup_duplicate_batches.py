@@ -16,9 +16,17 @@ import shutil
 import hashlib
 from datetime import datetime
 from collections import defaultdict, Counter
-from typing import Dict, List, Set, Tuple
+from typing import Dict, List, Set, Tuple, Optional
 import argparse
 
+from espscraper.batch_processor import stream_consolidate
+from espscraper.jsonl_io import (
+    open_jsonl,
+    is_jsonl_file,
+    jsonl_suffix,
+    detect_compression,
+)
+
 
 class BatchFileCleaner:
     """Clean up duplicate batch files and consolidate them"""
@@ -51,7 +59,7 @@ class BatchFileCleaner:
         
         batch_files = []
         for filename in os.listdir(self.batch_dir):
-            if filename.startswith("batch_") and filename.endswith(".jsonl"):
+            if filename.startswith("batch_") and is_jsonl_file(filename):
                 filepath = os.path.join(self.batch_dir, filename)
                 batch_files.append(filepath)
         
@@ -61,9 +69,9 @@ class BatchFileCleaner:
         if not batch_files:
             return {}
         
-        # Analyze each file
+        # Analyze each file (product IDs only, bodies stay on disk)
         file_analysis = {}
-        all_products = {}
+        all_products = set()
         file_hashes = {}
         
         for filepath in batch_files:
@@ -71,9 +79,9 @@ class BatchFileCleaner:
             file_analysis[filepath] = analysis
             
             # Track all products for deduplication
-            for product_id, product_data in analysis["products"].items():
+            for product_id in analysis["product_ids"]:
                 if product_id not in all_products:
-                    all_products[product_id] = product_data
+                    all_products.add(product_id)
                 else:
                     self.stats["duplicate_products"] += 1
             
@@ -84,7 +92,7 @@ class BatchFileCleaner:
             else:
                 file_hashes[file_hash] = [filepath]
         
-        self.stats["total_products"] = sum(len(analysis["products"]) for analysis in file_analysis.values())
+        self.stats["total_products"] = sum(len(analysis["product_ids"]) for analysis in file_analysis.values())
         self.stats["unique_products"] = len(all_products)
         
         return {
@@ -97,11 +105,12 @@ class BatchFileCleaner:
     def _analyze_single_file(self, filepath: str) -> Dict:
         """Analyze a single batch file"""
         filename = os.path.basename(filepath)
-        products = {}
+        products = []
+        seen_ids = set()
         product_count = 0
         
         try:
-            with open(filepath, "r", encoding="utf-8") as f:
+            with open_jsonl(filepath, "r") as f:
                 for line_num, line in enumerate(f, 1):
                     line = line.strip()
                     if not line:
@@ -115,8 +124,9 @@ class BatchFileCleaner:
                             or product.get("id")
                         )
                         
-                        if product_id:
-                            products[str(product_id)] = product
+                        if product_id and str(product_id) not in seen_ids:
+                            seen_ids.add(str(product_id))
+                            products.append(str(product_id))
                         
                         product_count += 1
                         
@@ -129,7 +139,7 @@ class BatchFileCleaner:
                 "filepath": filepath,
                 "total_products": product_count,
                 "unique_products": len(products),
-                "products": products,
+                "product_ids": products,
                 "file_size": os.path.getsize(filepath),
                 "last_modified": datetime.fromtimestamp(os.path.getmtime(filepath))
             }
@@ -141,17 +151,20 @@ class BatchFileCleaner:
                 "filepath": filepath,
                 "total_products": 0,
                 "unique_products": 0,
-                "products": {},
+                "product_ids": [],
                 "file_size": 0,
                 "last_modified": None,
                 "error": str(e)
             }
     
     def _get_file_hash(self, filepath: str) -> str:
-        """Get content hash of a file"""
+        """Get content hash of a file (decompressed, so gzip headers don't matter)"""
         try:
-            with open(filepath, "rb") as f:
-                return hashlib.md5(f.read()).hexdigest()
+            file_hash = hashlib.md5()
+            with open_jsonl(filepath, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    file_hash.update(chunk)
+            return file_hash.hexdigest()
         except Exception:
             return ""
     
@@ -184,8 +197,10 @@ class BatchFileCleaner:
         logging.info(f"✅ Removed {removed_count} duplicate files")
         return True
     
-    def consolidate_small_files(self, analysis: Dict, target_size: int = 50) -> bool:
-        """Consolidate small files into larger ones"""
+    def consolidate_small_files(
+        self, analysis: Dict, target_size: int = 50, target_bytes: Optional[int] = None
+    ) -> bool:
+        """Consolidate small files into larger ones (optionally capped in bytes)"""
         logging.info(f"🔄 Consolidating files smaller than {target_size} products...")
         
         file_analysis = analysis["file_analysis"]
@@ -210,16 +225,21 @@ class BatchFileCleaner:
         consolidated_groups = []
         current_group = []
         current_size = 0
+        current_bytes = 0
         
         for filepath, analysis_data in small_files:
-            if current_size + analysis_data["unique_products"] <= target_size * 2:
+            if current_size + analysis_data["unique_products"] <= target_size * 2 and (
+                not target_bytes or current_bytes + analysis_data["file_size"] <= target_bytes
+            ):
                 current_group.append((filepath, analysis_data))
                 current_size += analysis_data["unique_products"]
+                current_bytes += analysis_data["file_size"]
             else:
                 if current_group:
                     consolidated_groups.append(current_group)
                 current_group = [(filepath, analysis_data)]
                 current_size = analysis_data["unique_products"]
+                current_bytes = analysis_data["file_size"]
         
         # Add the last group
         if current_group:
@@ -240,19 +260,21 @@ class BatchFileCleaner:
         """Consolidate a group of files into one"""
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            consolidated_filename = f"batch_consolidated_{timestamp}_group_{group_id}.jsonl"
+            # Keep the compression of the files being consolidated
+            suffix = jsonl_suffix(detect_compression(group[0][0]))
+            consolidated_filename = f"batch_consolidated_{timestamp}_group_{group_id}{suffix}"
             consolidated_path = os.path.join(self.batch_dir, consolidated_filename)
             
-            # Collect all unique products from the group
-            all_products = {}
+            # Later files win for products that appear in several files
+            last_owner = {}
             for filepath, analysis_data in group:
-                all_products.update(analysis_data["products"])
+                for product_id in analysis_data["product_ids"]:
+                    last_owner[product_id] = filepath
             
-            # Write consolidated file
-            with open(consolidated_path, "w", encoding="utf-8") as f:
-                for product in all_products.values():
-                    json_line = json.dumps(product, ensure_ascii=False, separators=(",", ":")) + "\n"
-                    f.write(json_line)
+            # Stream products into the consolidated file (atomic, fsynced)
+            _, product_count, _ = stream_consolidate(
+                [filepath for filepath, _ in group], consolidated_path, last_owner
+            )
             
             # Move original files to backup
             for filepath, _ in group:
@@ -263,7 +285,7 @@ class BatchFileCleaner:
                 except Exception as e:
                     logging.warning(f"   ⚠️ Could not move {filepath}: {e}")
             
-            logging.info(f"✅ Consolidated {len(group)} files into {consolidated_filename} ({len(all_products)} unique products)")
+            logging.info(f"✅ Consolidated {len(group)} files into {consolidated_filename} ({product_count} unique products)")
             return True
             
         except Exception as e:
@@ -277,7 +299,7 @@ class BatchFileCleaner:
         # Get all remaining batch files
         batch_files = []
         for filename in os.listdir(self.batch_dir):
-            if filename.startswith("batch_") and filename.endswith(".jsonl"):
+            if filename.startswith("batch_") and is_jsonl_file(filename):
                 filepath = os.path.join(self.batch_dir, filename)
                 batch_files.append(filepath)
         
@@ -294,7 +316,7 @@ class BatchFileCleaner:
                 products = {}
                 duplicate_count = 0
                 
-                with open(filepath, "r", encoding="utf-8") as f:
+                with open_jsonl(filepath, "r") as f:
                     for line in f:
                         line = line.strip()
                         if not line:
@@ -324,7 +346,9 @@ class BatchFileCleaner:
                 if duplicate_count > 0:
                     # Rewrite file with unique products only
                     temp_path = filepath + ".tmp"
-                    with open(temp_path, "w", encoding="utf-8") as f:
+                    with open_jsonl(
+                        temp_path, "w", compression=detect_compression(filepath)
+                    ) as f:
                         for product in products.values():
                             json_line = json.dumps(product, ensure_ascii=False, separators=(",", ":")) + "\n"
                             f.write(json_line)
@@ -354,15 +378,15 @@ class BatchFileCleaner:
         
         # Count remaining files
         remaining_files = len([f for f in os.listdir(self.batch_dir) 
-                             if f.startswith("batch_") and f.endswith(".jsonl")])
+                             if f.startswith("batch_") and is_jsonl_file(f)])
         logging.info(f"   Remaining batch files: {remaining_files}")
         
         # Count backup files
         backup_files = len([f for f in os.listdir(self.backup_dir) 
-                          if f.startswith("batch_") and f.endswith(".jsonl")])
+                          if f.startswith("batch_") and is_jsonl_file(f)])
         logging.info(f"   Files in backup: {backup_files}")
     
-    def cleanup(self, target_size: int = 50) -> bool:
+    def cleanup(self, target_size: int = 50, target_bytes: Optional[int] = None) -> bool:
         """Perform complete cleanup process"""
         logging.info("🚀 Starting batch file cleanup process...")
         
@@ -380,7 +404,7 @@ class BatchFileCleaner:
             analysis = self.analyze_batch_files()
             
             # Step 4: Consolidate small files
-            self.consolidate_small_files(analysis, target_size)
+            self.consolidate_small_files(analysis, target_size, target_bytes)
             
             # Step 5: Remove duplicate products from remaining files
             self.remove_duplicate_products()
@@ -402,6 +426,7 @@ def main():
     parser.add_argument("--batch-dir", default="batch", help="Batch directory")
     parser.add_argument("--backup-dir", default="batch_backup", help="Backup directory")
     parser.add_argument("--target-size", type=int, default=50, help="Target size for consolidation")
+    parser.add_argument("--target-bytes", type=int, default=None, help="Maximum consolidated file size in bytes")
     parser.add_argument("--dry-run", action="store_true", help="Analyze only, don't make changes")
     
     args = parser.parse_args()
@@ -413,7 +438,7 @@ def main():
         analysis = cleaner.analyze_batch_files()
         cleaner.print_final_stats()
     else:
-        cleaner.cleanup(args.target_size)
+        cleaner.cleanup(args.target_size, args.target_bytes)
 
 
 if __name__ == "__main__":
@@ -23,6 +23,15 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 import pickle
 from functools import lru_cache
 
+from espscraper.jsonl_io import (
+    open_jsonl,
+    is_jsonl_file,
+    jsonl_suffix,
+    detect_compression,
+    strip_jsonl_suffix,
+)
+from espscraper.product_store import ProductStore, materialize_product
+
 # BeautifulSoup for HTML parsing
 try:
     from bs4 import BeautifulSoup
@@ -525,9 +534,15 @@ class SingleRequestArtProcessor:
 class OptimizedBatchFileEnhancer:
     """Optimized batch file enhancer using single request approach"""
 
-    def __init__(self, art_processor: SingleRequestArtProcessor, max_workers: int = 5, skip_art_templates: bool = False):
+    def __init__(self, art_processor: SingleRequestArtProcessor, max_workers: int = 5, skip_art_templates: bool = False,
+                 output_compression: Optional[str] = "same",
+                 product_store: Optional[ProductStore] = None):
         self.art_processor = art_processor
         self.max_workers = max_workers
+        # "same" keeps the input file's compression; otherwise none/gzip/zstd
+        self.output_compression = output_compression
+        # With a product store, enhanced files hold references instead of copies
+        self.product_store = product_store
         self.skip_art_templates = skip_art_templates
         self.enhanced_count = 0
         self.error_count = 0
@@ -543,11 +558,13 @@ class OptimizedBatchFileEnhancer:
 
             # Read products
             products = []
-            with open(batch_file_path, "r", encoding="utf-8") as f:
+            with open_jsonl(batch_file_path, "r") as f:
                 for line in f:
                     if line.strip():
                         try:
-                            product = json.loads(line)
+                            product = materialize_product(
+                                json.loads(line), self.product_store
+                            )
                             products.append(product)
                         except json.JSONDecodeError:
                             continue
@@ -583,17 +600,25 @@ class OptimizedBatchFileEnhancer:
                         self.error_count += 1
 
             # Write enhanced products
-            base_name = os.path.basename(batch_file_path).replace(".jsonl", "")
+            base_name = strip_jsonl_suffix(os.path.basename(batch_file_path))
             enhanced_dir = os.path.join(
                 os.path.dirname(batch_file_path), "..", "enhanced"
             )
             enhanced_dir = os.path.abspath(enhanced_dir)
             os.makedirs(enhanced_dir, exist_ok=True)
 
-            output_file = os.path.join(enhanced_dir, f"{base_name}_enhanced.jsonl")
+            if self.output_compression == "same":
+                compression = detect_compression(batch_file_path)
+            else:
+                compression = self.output_compression
+            output_file = os.path.join(
+                enhanced_dir, f"{base_name}_enhanced{jsonl_suffix(compression)}"
+            )
 
-            with open(output_file, "w", encoding="utf-8") as f:
+            with open_jsonl(output_file, "w", compression=compression) as f:
                 for product in enhanced_products:
+                    if self.product_store:
+                        product = self.product_store.make_ref(product)
                     f.write(json.dumps(product, ensure_ascii=False) + "\n")
 
             self.enhanced_count += 1
@@ -786,8 +811,8 @@ class OptimizedBatchFileEnhancer:
             for file in os.listdir(batch_dir):
                 if (
                     file.startswith("batch_")
-                    and file.endswith(".jsonl")
-                    and not file.endswith("_enhanced.jsonl")
+                    and is_jsonl_file(file)
+                    and not strip_jsonl_suffix(file).endswith("_enhanced")
                 ):
                     batch_files.append(os.path.join(batch_dir, file))
 
@@ -946,6 +971,18 @@ def main():
         help="Skip downloading art templates (faster processing)"
     )
     
+    # Output compression
+    parser.add_argument(
+        "--compression", choices=["same", "none", "gzip", "zstd"], default="same",
+        help="Compression for enhanced files (default: same as the batch file)"
+    )
+
+    # Content-addressed product store
+    parser.add_argument(
+        "--product-store", default=os.getenv("PRODUCT_STORE_DIR"),
+        help="Product store for batch references and enhanced output (default: PRODUCT_STORE_DIR)"
+    )
+
     # Testing mode
     parser.add_argument(
         "--test-mode", action="store_true",
@@ -983,7 +1020,9 @@ def main():
     enhancer = OptimizedBatchFileEnhancer(
         art_processor, 
         max_workers=args.max_workers,
-        skip_art_templates=args.skip_art_templates
+        skip_art_templates=args.skip_art_templates,
+        output_compression=args.compression,
+        product_store=ProductStore(args.product_store) if args.product_store else None
     )
 
     # Enhance all batch files with chunking parameters
@@ -2,7 +2,10 @@ import logging
 import sys
 import os
 from espscraper.session_manager import SessionManager
-from espscraper.scrape_product_details import ProductDetailScraper
+from espscraper.scrape_product_details import (
+    ProductDetailScraper,
+    PAGE_LOAD_STRATEGIES,
+)
 
 
 def main():
@@ -62,6 +65,36 @@ def main():
         action="store_true",
         help="Enable real-time connection monitoring and detailed logging",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("SCRAPER_WORKERS", "1")),
+        help="Number of browser workers (0 = size from available CPU and memory)",
+    )
+    parser.add_argument(
+        "--page-load-strategy",
+        choices=PAGE_LOAD_STRATEGIES,
+        default=None,
+        help="Chrome pageLoadStrategy (default: SCRAPER_PAGE_LOAD_STRATEGY or eager)",
+    )
+    parser.add_argument(
+        "--block-resources",
+        type=str,
+        default=None,
+        help="Comma-separated resource categories or URL patterns to block ('none' disables)",
+    )
+    parser.add_argument(
+        "--capture-xhr",
+        action="store_true",
+        default=None,
+        help="Read product JSON from the page's XHRs instead of parsing the DOM",
+    )
+    parser.add_argument(
+        "--record-fixtures",
+        type=str,
+        default=None,
+        help="Save raw page snapshots to this directory for offline benchmarks",
+    )
     args = parser.parse_args()
 
     # Ensure log directory exists if log-file is specified
@@ -136,6 +169,11 @@ def main():
             max_retries=args.max_retries,
             batch_retry_limit=args.batch_retry_limit,
             debug_mode=args.debug_mode,
+            workers=args.workers,
+            page_load_strategy=args.page_load_strategy,
+            blocked_resources=args.block_resources,
+            capture_xhr=args.capture_xhr,
+            fixture_dir=args.record_fixtures,
         )
         # Batching logic
         if args.batch_size is not None and args.batch_number is not None:
@@ -27,7 +27,6 @@ from queue import Queue
 import hashlib
 import signal
 import traceback
-import re
 
 # Add the espscraper directory to the path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "espscraper"))
@@ -36,6 +35,11 @@ from espscraper.session_manager import SessionManager
 from espscraper.base_scraper import BaseScraper
 from espscraper.batch_processor import BatchProcessor
 from espscraper.product_data import ProductData
+from espscraper.product_extraction import ApiProductExtractor
+from espscraper.response_archive import ResponseArchive
+from espscraper.metrics import ScrapeMetrics
+from espscraper.product_store import ProductStore
+from espscraper.jsonl_io import open_jsonl, detect_compression, strip_jsonl_suffix
 
 # Configure logging
 logging.basicConfig(
@@ -80,6 +84,19 @@ class ScrapingConfig:
     heartbeat_interval: int = 60  # seconds
     log_detailed_stats: bool = True
 
+    # Raw response archive (for offline re-extraction)
+    archive_raw_responses: bool = True
+    raw_archive_dir: Optional[str] = None  # defaults to <output dir>/raw_archive
+
+    # Batch writing
+    async_batch_writes: bool = True  # write batch files on a background thread
+    batch_write_queue_size: int = 4
+    batch_compression: Optional[str] = None  # gzip/zstd; defaults to BATCH_COMPRESSION env
+    # Write batch/main files as references into a content-addressed store
+    product_store_dir: Optional[str] = None  # defaults to PRODUCT_STORE_DIR env (off if unset)
+    batch_max_bytes: Optional[int] = 4 * 1024 * 1024  # roll over batch files at ~4 MB
+    batch_max_age: Optional[int] = 300  # seconds before a partial batch is saved
+
 
 class RateLimiter:
     """Intelligent rate limiter with adaptive throttling"""
@@ -136,7 +153,7 @@ class RateLimiter:
                 self.failure_count = max(0, self.failure_count - 1)
 
 
-class ApiProductDetailScraper(BaseScraper):
+class ApiProductDetailScraper(BaseScraper, ApiProductExtractor):
     """API-based product detail scraper using browser session management"""
 
     def __init__(self, session_manager: SessionManager, config: ScrapingConfig = None):
@@ -152,6 +169,7 @@ class ApiProductDetailScraper(BaseScraper):
             "start_time": time.time(),
             "last_heartbeat": time.time(),
         }
+        self.metrics = ScrapeMetrics()
         self.consecutive_failures = 0
         self.circuit_breaker_open = False
         self.circuit_breaker_open_time = 0
@@ -170,12 +188,20 @@ class ApiProductDetailScraper(BaseScraper):
         )
 
         # Enhanced indexing and resume tracking
-        self.checkpoint_file = self.OUTPUT_FILE.replace(".jsonl", ".checkpoint.txt")
-        self.progress_file = self.OUTPUT_FILE.replace(".jsonl", ".progress.json")
+        output_base = strip_jsonl_suffix(self.OUTPUT_FILE)
+        self.checkpoint_file = output_base + ".checkpoint.txt"
+        self.progress_file = output_base + ".progress.json"
         self.scraped_index = set()
         self.current_batch = []
         self.batch_start_time = time.time()
 
+        product_store_dir = self.config.product_store_dir or os.getenv(
+            "PRODUCT_STORE_DIR"
+        )
+        self.product_store = (
+            ProductStore(product_store_dir) if product_store_dir else None
+        )
+
         # Initialize enhanced batch processor with deduplication
         self.batch_processor = BatchProcessor(
             batch_size=self.config.batch_size,
@@ -183,6 +209,13 @@ class ApiProductDetailScraper(BaseScraper):
             main_output_file=self.OUTPUT_FILE,
             enable_deduplication=True,
             enable_consolidation=True,
+            async_writes=self.config.async_batch_writes,
+            write_queue_size=self.config.batch_write_queue_size,
+            compression=self.config.batch_compression
+            or os.getenv("BATCH_COMPRESSION"),
+            product_store=self.product_store,
+            max_batch_bytes=self.config.batch_max_bytes,
+            max_batch_age=self.config.batch_max_age,
         )
 
         # Ensure output directory exists
@@ -195,6 +228,15 @@ class ApiProductDetailScraper(BaseScraper):
             exist_ok=True,
         )
 
+        # Raw API response archive
+        self.response_archive = ResponseArchive(
+            self.config.raw_archive_dir
+            or os.getenv(
+                "RAW_ARCHIVE_DIR",
+                os.path.join(os.path.dirname(self.OUTPUT_FILE) or ".", "raw_archive"),
+            )
+        )
+
         # Load existing progress
         self._load_progress()
 
@@ -203,15 +245,27 @@ class ApiProductDetailScraper(BaseScraper):
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals gracefully"""
         logging.info("🛑 Received shutdown signal, saving stats...")
+        # Wait for queued batch writes so no scraped products are lost
+        self.batch_processor.close()
         self._save_stats()
+        self.response_archive.close()
         sys.exit(0)
 
-    def _save_stats(self):
-        """Save current statistics"""
-        stats_file = self.OUTPUT_FILE.replace(".jsonl", ".stats.json")
-        with open(stats_file, "w") as f:
-            json.dump(self.stats, f, indent=2)
-        logging.info(f"📊 Stats saved to {stats_file}")
+    def _save_stats(self, quiet: bool = False):
+        """Save current statistics and per-phase metrics"""
+        stats_file = strip_jsonl_suffix(self.OUTPUT_FILE) + ".stats.json"
+        stats_data = dict(self.stats)
+        stats_data["updated_at"] = datetime.now().isoformat()
+        stats_data.update(self.metrics.to_dict())
+
+        # Atomic write so readers never see a partially written file
+        temp_file = stats_file + ".tmp"
+        with open(temp_file, "w") as f:
+            json.dump(stats_data, f, indent=2)
+        os.replace(temp_file, stats_file)
+
+        if not quiet:
+            logging.info(f"📊 Stats saved to {stats_file}")
 
     def _load_progress(self):
         """Load existing progress and scraped index with auto-repair"""
@@ -224,7 +278,7 @@ class ApiProductDetailScraper(BaseScraper):
         # Load scraped product IDs from output file
         if os.path.exists(self.OUTPUT_FILE):
             try:
-                with open(self.OUTPUT_FILE, "r") as f:
+                with open_jsonl(self.OUTPUT_FILE, "r") as f:
                     for line in f:
                         try:
                             data = json.loads(line.strip())
@@ -306,13 +360,27 @@ class ApiProductDetailScraper(BaseScraper):
 
     def _update_heartbeat(self):
         """Update heartbeat for monitoring"""
+        # Bound how long scraped products can sit in an unsaved partial batch
+        if not self.batch_processor.flush_if_stale():
+            logging.warning("⚠️ Failed to save stale partial batch")
+
         if self.config.enable_heartbeat:
             now = time.time()
             if now - self.stats["last_heartbeat"] > self.config.heartbeat_interval:
                 self.stats["last_heartbeat"] = now
+                main_get = self.metrics.get_phase("main_get")
+                latency = (
+                    f", main GET p50={main_get.percentile(50):.0f}ms p99={main_get.percentile(99):.0f}ms"
+                    if main_get
+                    else ""
+                )
                 logging.info(
-                    f"💓 Heartbeat: {self.stats['successful_requests']} successful, {self.stats['failed_requests']} failed"
+                    f"💓 Heartbeat: {self.stats['successful_requests']} successful, {self.stats['failed_requests']} failed{latency}"
                 )
+                try:
+                    self._save_stats(quiet=True)
+                except Exception as e:
+                    logging.warning(f"⚠️ Error saving stats: {e}")
 
     def _handle_failure(self):
         """Handle request failure"""
@@ -338,13 +406,7 @@ class ApiProductDetailScraper(BaseScraper):
                 self.skipped_products.append(product_id)
                 logging.warning(f"🚨 Circuit breaker open, skipping product {product_id} (total skipped: {len(self.skipped_products)})")
                 # Log skipped products for retry as well
-                try:
-                    failed_products_file = os.path.join(os.getcwd(), "failed_products_api.txt")
-                    with open(failed_products_file, "a") as fail_log:
-                        fail_log.write(f"{product_id}\n")
-                    logging.info(f"📝 Logged skipped product {product_id} to {failed_products_file}")
-                except Exception as log_e:
-                    logging.warning(f"⚠️ Could not log skipped product ID: {log_e}")
+                self._log_failed_product(product_id, "skipped")
                 return None
             else:
                 self.circuit_breaker_open = False
@@ -355,18 +417,22 @@ class ApiProductDetailScraper(BaseScraper):
                     logging.info(f"📋 Skipped products: {', '.join(self.skipped_products[:10])}{'...' if len(self.skipped_products) > 10 else ''}")
                     self.skipped_products = []  # Clear the list
 
-        self.rate_limiter.wait_if_needed()
+        with self.metrics.time_phase("rate_limit_wait"):
+            self.rate_limiter.wait_if_needed()
 
         # Get authenticated session from session manager
-        try:
-            session = self.session_manager.get_authenticated_session()
-        except FileNotFoundError:
-            logging.warning("⚠️ No session found, attempting login...")
-            if self.session_manager.login():
+        with self.metrics.time_phase("session_acquire"):
+            try:
                 session = self.session_manager.get_authenticated_session()
-            else:
-                logging.error("❌ Failed to login")
-                return None
+            except FileNotFoundError:
+                logging.warning("⚠️ No session found, attempting login...")
+                if self.session_manager.login():
+                    session = self.session_manager.get_authenticated_session()
+                else:
+                    logging.error("❌ Failed to login")
+                    session = None
+        if session is None:
+            return None
 
         # Setup headers for API request
         headers = {
@@ -387,21 +453,27 @@ class ApiProductDetailScraper(BaseScraper):
             try:
                 self.stats["total_requests"] += 1
 
-                response = session.get(api_url, timeout=self.config.request_timeout)
+                with self.metrics.time_phase("main_get"):
+                    response = session.get(api_url, timeout=self.config.request_timeout)
+                self.metrics.count_status(response.status_code)
 
                 if response.status_code == 200:
-                    data = response.json()
+                    with self.metrics.time_phase("json_decode"):
+                        data = response.json()
                     extraction_time = time.time() - extraction_start
 
                     if data:
                         # Get related products
-                        related_products = self._get_related_products(
-                            product_id, session
-                        )
+                        suggestions = self._fetch_suggestions(product_id, session)
+                        related_products = self._parse_related_products(suggestions)
 
-                        product_data = self._extract_product_data(
-                            data, product_id, extraction_time, related_products
-                        )
+                        if self.config.archive_raw_responses:
+                            self.response_archive.append(product_id, data, suggestions)
+
+                        with self.metrics.time_phase("extraction"):
+                            product_data = self._extract_product_data(
+                                data, product_id, extraction_time, related_products
+                            )
                         self.stats["successful_requests"] += 1
                         self.consecutive_failures = 0
                         self.rate_limiter.record_success()
@@ -445,12 +517,14 @@ class ApiProductDetailScraper(BaseScraper):
                     self._handle_failure()
 
             except requests.exceptions.Timeout:
+                self.metrics.count_status("timeout")
                 logging.warning(
                     f"⏰ Timeout for product {product_id} (attempt {retry_count + 1})"
                 )
                 self._handle_failure()
 
             except requests.exceptions.RequestException as e:
+                self.metrics.count_status("request_error")
                 logging.warning(f"🌐 Request error for product {product_id}: {e}")
                 self._handle_failure()
 
@@ -482,16 +556,19 @@ class ApiProductDetailScraper(BaseScraper):
         logging.error(f"   - Failed requests: {self.stats['failed_requests']}")
         
         # Log failed product for later retry
+        self._log_failed_product(product_id)
+        return None
+
+    def _log_failed_product(self, product_id: str, label: str = "failed"):
+        """Append a product ID to failed_products_api.txt for retry_failed_products"""
         try:
             # Use absolute path to ensure file is created in the right location
             failed_products_file = os.path.join(os.getcwd(), "failed_products_api.txt")
             with open(failed_products_file, "a") as fail_log:
                 fail_log.write(f"{product_id}\n")
-            logging.info(f"📝 Logged failed product {product_id} to {failed_products_file}")
+            logging.info(f"📝 Logged {label} product {product_id} to {failed_products_file}")
         except Exception as log_e:
-            logging.warning(f"⚠️ Could not log failed product ID: {log_e}")
-        
-        return None
+            logging.warning(f"⚠️ Could not log {label} product ID: {log_e}")
 
     def get_circuit_breaker_stats(self):
         """Get circuit breaker statistics"""
@@ -508,7 +585,7 @@ class ApiProductDetailScraper(BaseScraper):
         scraped_ids = set()
         if os.path.exists(self.OUTPUT_FILE):
             try:
-                with open(self.OUTPUT_FILE, "r") as f:
+                with open_jsonl(self.OUTPUT_FILE, "r") as f:
                     for line in f:
                         try:
                             data = json.loads(line.strip())
@@ -542,7 +619,10 @@ class ApiProductDetailScraper(BaseScraper):
         
         try:
             with open(failed_products_file, "r") as f:
-                failed_ids = [line.strip() for line in f if line.strip()]
+                # A product can be logged more than once (API and browser failures)
+                failed_ids = list(
+                    dict.fromkeys(line.strip() for line in f if line.strip())
+                )
             
             if not failed_ids:
                 logging.info("✅ No failed products to retry")
@@ -613,246 +693,26 @@ class ApiProductDetailScraper(BaseScraper):
         self, product_id: str, session: requests.Session
     ) -> List[Dict]:
         """Get related products for a given product ID"""
+        return self._parse_related_products(
+            self._fetch_suggestions(product_id, session)
+        )
+
+    def _fetch_suggestions(
+        self, product_id: str, session: requests.Session
+    ) -> Optional[Dict]:
+        """Fetch the raw suggestions response for a given product ID"""
         try:
             api_url = f"https://api.asicentral.com/v1/products/{product_id}/suggestions.json?page=1&rpp=5"
-            response = session.get(api_url, timeout=10)
+            with self.metrics.time_phase("suggestions_get"):
+                response = session.get(api_url, timeout=10)
+            self.metrics.count_status(response.status_code, endpoint="suggestions")
 
             if response.status_code == 200:
-                data = response.json()
-                related = []
-
-                for item in data.get("Results", []):
-                    pid = item.get("Id")
-                    name = item.get("Name")
-                    image = item.get("ImageUrl")
-
-                    # Build proper image URL
-                    if image and not image.startswith("http"):
-                        image = f"https://api.asicentral.com/v1/{image.lstrip('/')}"
-
-                    # Build product URL
-                    url = self._build_product_url(pid) if pid else ""
-
-                    related.append(
-                        {
-                            "id": pid,
-                            "name": name,
-                            "image_url": image,
-                            "product_url": url,
-                        }
-                    )
-
-                return related
+                return response.json()
         except Exception as e:
             logging.warning(f"⚠️ Failed to get related products for {product_id}: {e}")
 
-        return []
-
-    def _build_product_url(self, product_id: str) -> str:
-        """Build product URL for WordPress import"""
-        return f"https://espweb.asicentral.com/Default.aspx?appCode=WESP&appVersion=4.1.0&page=ProductDetails&productID={product_id}&autoLaunchVS=0&tab=list"
-
-    def _build_image_url(self, image_path: str) -> str:
-        """Build proper image URL for WordPress import"""
-        if not image_path:
-            return ""
-
-        if image_path.startswith("http"):
-            return image_path
-
-        # Remove leading slash and build full URL
-        clean_path = image_path.lstrip("/")
-        return f"https://api.asicentral.com/v1/{clean_path}"
-
-    def _slugify(self, value: str) -> str:
-        """Slugify a string for use in URLs"""
-        value = value.lower()
-        value = re.sub(r"[^a-z0-9]+", "-", value)
-        value = re.sub(r"-+", "-", value)
-        return value.strip("-")
-
-    def _extract_product_data(
-        self,
-        data: Dict,
-        product_id: str,
-        extraction_time: float,
-        related_products: List[Dict] = None,
-    ) -> ProductData:
-        """Extract structured product data from API response with enhanced image handling and custom fields"""
-        # Build proper image URLs
-        main_image_url = self._build_image_url(data.get("ImageUrl", ""))
-
-        # ProductURL: from link file if present, else construct
-        product_url = data.get("ProductUrl")
-        if not product_url:
-            product_url = f"https://espweb.asicentral.com/Default.aspx?appCode=WESP&appVersion=4.1.0&page=ProductDetails&referrerPage=ProductResults&referrerModule=PRDRES&refModSufx=Generic&PCUrl=1&productID={product_id}&autoLaunchVS=0&tab=list"
-
-        # ProductNumber: from numbers key (use first if list)
-        numbers = data.get("numbers") or data.get("Numbers")
-        product_number = ""
-        if numbers:
-            if isinstance(numbers, list):
-                product_number = str(numbers[0]) if numbers else ""
-            else:
-                product_number = str(numbers)
-
-        # VendorProductURL
-        name = data.get("Name", "product")
-        slug = self._slugify(name)
-        vendor_product_url = (
-            f"https://www.hitpromo.net/product/show/{product_number}/{slug}"
-            if product_number
-            else ""
-        )
-
-        # ProductArtURL
-        product_art_url = (
-            f"https://www.hitpromo.net/fs/artTemplates/{product_number}/{product_number}.pdf"
-            if product_number
-            else ""
-        )
-
-        # Process variants with proper image URLs
-        variants = data.get("Variants", [])
-        processed_variants = []
-        for variant in variants:
-            processed_variant = variant.copy()
-            processed_variant["image_url"] = self._build_image_url(
-                variant.get("ImageUrl", "")
-            )
-            processed_variants.append(processed_variant)
-
-        # Process images array
-        images = data.get("Images", [])
-        processed_images = []
-        for image in images:
-            if isinstance(image, dict):
-                processed_image = image.copy()
-                processed_image["url"] = self._build_image_url(
-                    image.get("url", image.get("Url", ""))
-                )
-                processed_images.append(processed_image)
-            elif isinstance(image, str):
-                processed_images.append(
-                    {"url": self._build_image_url(image), "type": "product_image"}
-                )
-
-        # Process virtual sample images
-        virtual_samples = data.get("VirtualSampleImages", [])
-        processed_virtual_samples = []
-        for sample in virtual_samples:
-            if isinstance(sample, dict):
-                processed_sample = sample.copy()
-                processed_sample["url"] = self._build_image_url(
-                    sample.get("url", sample.get("Url", ""))
-                )
-                processed_virtual_samples.append(processed_sample)
-            elif isinstance(sample, str):
-                processed_virtual_samples.append(
-                    {"url": self._build_image_url(sample), "type": "virtual_sample"}
-                )
-
-        # Compose ProductData with new fields
-        return ProductData(
-            product_id=product_id,
-            name=name,
-            sku=data.get("SKU", "N/A"),
-            description=data.get("Description", ""),
-            short_description=data.get("ShortDescription", ""),
-            image_url=main_image_url,
-            product_url=product_url,
-            supplier_info=self._extract_supplier_info(data),
-            pricing_info=self._extract_pricing_info(data),
-            production_info=self._extract_production_info(data),
-            attributes=self._extract_attributes(data),
-            imprinting=self._extract_imprinting_info(data),
-            shipping=self._extract_shipping_info(data),
-            variants=processed_variants,
-            warnings=data.get("Warnings", []),
-            services=data.get("Services", []),
-            images=processed_images,
-            virtual_samples=processed_virtual_samples,
-            related_products=related_products or [],
-            raw_data=data,
-            extraction_time=extraction_time,
-            scraped_date=datetime.now().isoformat(),
-            # Custom fields (snake_case)
-            product_number=product_number,
-            vendor_product_url=vendor_product_url,
-            product_art_url=product_art_url,
-        )
-
-    def _extract_supplier_info(self, data: Dict) -> Dict:
-        """Extract supplier information"""
-        supplier = data.get("Supplier", {})
-        return {
-            "supplier_name": supplier.get("Name", ""),
-            "supplier_id": supplier.get("Id", ""),
-            "supplier_rating": supplier.get("Rating", {}).get("Rating", ""),
-            "supplier_location": supplier.get("Location", ""),
-            "asi_number": supplier.get("AsiNumber", ""),
-            "email": supplier.get("Email", ""),
-            "phone": supplier.get("Phone", {}).get("Primary", ""),
-            "websites": supplier.get("Websites", []),
-        }
-
-    def _extract_pricing_info(self, data: Dict) -> Dict:
-        """Extract pricing information"""
-        return {
-            "base_price": data.get("LowestPrice", ""),
-            "discount_price": data.get("HighestPrice", ""),
-            "bulk_pricing": data.get("Prices", []),
-            "currency": data.get("Currency", "USD"),
-        }
-
-    def _extract_production_info(self, data: Dict) -> Dict:
-        """Extract production information"""
-        return {
-            "production_time": data.get("ProductionTime", []),
-            "minimum_order": data.get("MinimumOrder", ""),
-            "maximum_order": data.get("MaximumOrder", ""),
-            "production_methods": data.get("ProductionMethods", []),
-            "origin": data.get("Origin", []),
-            "trade_names": data.get("TradeNames", []),
-        }
-
-    def _extract_attributes(self, data: Dict) -> Dict:
-        """Extract product attributes"""
-        attributes = data.get("Attributes", {})
-        return {
-            "category": data.get("Category", ""),
-            "subcategory": data.get("Subcategory", ""),
-            "tags": data.get("Tags", []),
-            "features": data.get("Features", []),
-            "colors": attributes.get("Colors", {}).get("Values", []),
-            "sizes": attributes.get("Sizes", {}).get("Values", []),
-            "materials": attributes.get("Materials", {}).get("Values", []),
-        }
-
-    def _extract_imprinting_info(self, data: Dict) -> Dict:
-        """Extract imprinting information"""
-        imprinting = data.get("Imprinting", {})
-        return {
-            "imprinting_methods": imprinting.get("Methods", {}).get("Values", []),
-            "imprinting_locations": imprinting.get("Locations", {}).get("Values", []),
-            "imprinting_colors": imprinting.get("Colors", {}).get("Values", []),
-            "setup_charges": imprinting.get("Services", {}).get("Values", []),
-        }
-
-    def _extract_shipping_info(self, data: Dict) -> Dict:
-        """Extract shipping information"""
-        shipping = data.get("Shipping", {})
-        return {
-            "shipping_methods": shipping.get("Methods", {}).get("Values", []),
-            "shipping_time": shipping.get("Time", ""),
-            "shipping_cost": shipping.get("Cost", ""),
-            "free_shipping_threshold": shipping.get("FreeThreshold", ""),
-            "weight_unit": shipping.get("WeightUnit", ""),
-            "weight_per_package": shipping.get("WeightPerPackage", ""),
-            "package_unit": shipping.get("PackageUnit", ""),
-            "items_per_package": shipping.get("ItemsPerPackage", ""),
-            "fob_points": shipping.get("FOBPoints", {}).get("Values", []),
-        }
+        return None
 
     def read_product_ids(self, limit: int = None) -> List[str]:
         """Read product IDs from JSONL file with optional limit"""
@@ -917,12 +777,18 @@ class ApiProductDetailScraper(BaseScraper):
             # Process products with enhanced indexing
             self._process_products_with_indexing(products_to_scrape)
 
+            # Retry failed products while the batches and archive are still open
+            logging.info("🔄 Starting failed products retry process...")
+            self.retry_failed_products()
+            logging.info("✅ Failed products retry process completed")
+
             # Finalize batch processing
             self._finalize_batches()
 
             # Save final stats and clean up
             self._save_stats()
             self._save_progress()
+            self.response_archive.close()
 
             # Clean up checkpoint file on successful completion
             if os.path.exists(self.checkpoint_file):
@@ -931,32 +797,118 @@ class ApiProductDetailScraper(BaseScraper):
 
             logging.info("✅ Product scraping completed")
 
-            # Retry failed products
-            logging.info("🔄 Starting failed products retry process...")
-            self.retry_failed_products()
-            logging.info("✅ Failed products retry process completed")
-
         except KeyboardInterrupt:
             logging.info("🛑 Scraping interrupted by user")
             self._finalize_batches()
             self._save_progress()
             self._save_stats()
+            self.response_archive.close()
             logging.info("💾 Progress and stats saved")
             raise
         except Exception as e:
             logging.error(f"❌ Unexpected error during scraping: {e}")
-            self._finalize_batches()
-            self._save_progress()
-            self._save_stats()
-            
-            # Still try to retry failed products even if there was an error
+
+            # Still try to retry failed products even if there was an error,
+            # before the batches are merged and the archive is closed
             try:
                 self.retry_failed_products()
             except Exception as retry_e:
                 logging.error(f"❌ Error during failed products retry: {retry_e}")
-            
+
+            self._finalize_batches()
+            self._save_progress()
+            self._save_stats()
+            self.response_archive.close()
             raise
 
+    def reextract_from_archive(
+        self, batch_dir: str = "batch_reextract", limit: int = None
+    ) -> int:
+        """Rebuild ProductData and batch files from the raw response archive
+
+        No network requests are made: the latest archived response for each
+        product is run through the current extraction logic and written to a
+        fresh batch directory under ``batch_dir``, then written over the
+        products' existing records in the main output file.
+        """
+        logging.info(
+            f"🗄️ Re-extracting products offline from {self.response_archive.archive_dir}"
+        )
+
+        records = self.response_archive.load_latest()
+        if not records:
+            logging.warning("⚠️ No archived responses found, nothing to re-extract")
+            return 0
+
+        # Use a fresh batch directory per run so neither the scrape batches
+        # nor an earlier re-extraction mark every archived product as a duplicate
+        run_dir = os.path.join(
+            batch_dir, f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        )
+        self.batch_processor = BatchProcessor(
+            batch_size=self.config.batch_size,
+            batch_dir=run_dir,
+            main_output_file=self.OUTPUT_FILE,
+            enable_deduplication=True,
+            enable_consolidation=True,
+            async_writes=self.config.async_batch_writes,
+            write_queue_size=self.config.batch_write_queue_size,
+            compression=self.config.batch_compression
+            or os.getenv("BATCH_COMPRESSION"),
+            product_store=self.product_store,
+            max_batch_bytes=self.config.batch_max_bytes,
+            max_batch_age=self.config.batch_max_age,
+        )
+
+        reextracted = 0
+        duplicates = 0
+        failed = 0
+        start_time = time.time()
+
+        for product_id, record in records.items():
+            if limit and reextracted >= limit:
+                break
+
+            try:
+                extraction_start = time.time()
+                related_products = self._parse_related_products(
+                    record.get("suggestions")
+                )
+                product_data = self._extract_product_data(
+                    record["product"], product_id, 0.0, related_products
+                )
+                product_data.extraction_time = time.time() - extraction_start
+                # Keep the original fetch time rather than the re-extraction time
+                product_data.scraped_date = record.get(
+                    "fetched_at", product_data.scraped_date
+                )
+
+                skipped_before = self.batch_processor.stats.duplicate_products
+                if not self._save_single_product(product_data):
+                    failed += 1
+                elif self.batch_processor.stats.duplicate_products > skipped_before:
+                    duplicates += 1
+                else:
+                    reextracted += 1
+
+            except Exception as e:
+                failed += 1
+                logging.error(f"❌ Error re-extracting product {product_id}: {e}")
+
+        if not self.batch_processor.close():
+            logging.error("❌ Failed to flush final batch")
+        self.batch_processor.print_stats()
+
+        if reextracted and not self.batch_processor.replace_in_main_output():
+            logging.error("❌ Failed to merge re-extracted batches to main output")
+
+        elapsed = time.time() - start_time
+        logging.info(
+            f"✅ Re-extracted {reextracted} products in {elapsed:.1f}s "
+            f"({duplicates} duplicates, {failed} failed) -> {run_dir}"
+        )
+        return reextracted
+
     def _filter_products(self, product_ids: List[str], mode: str) -> List[str]:
         """Filter products based on mode and already scraped data"""
         if mode == "scrape":
@@ -985,7 +937,7 @@ class ApiProductDetailScraper(BaseScraper):
 
         if os.path.exists(self.OUTPUT_FILE):
             try:
-                with open(self.OUTPUT_FILE, "r") as f:
+                with open_jsonl(self.OUTPUT_FILE, "r") as f:
                     for line in f:
                         try:
                             data = json.loads(line.strip())
@@ -1104,7 +1056,7 @@ class ApiProductDetailScraper(BaseScraper):
             valid_lines = []
             invalid_count = 0
 
-            with open(filename, "r") as f:
+            with open_jsonl(filename, "r") as f:
                 for line_num, line in enumerate(f, 1):
                     line = line.strip()
                     if not line:
@@ -1130,7 +1082,7 @@ class ApiProductDetailScraper(BaseScraper):
 
                 # Write repaired file
                 temp_file = filename + ".repaired"
-                with open(temp_file, "w") as f:
+                with open_jsonl(temp_file, "w", compression=detect_compression(filename)) as f:
                     for line in valid_lines:
                         f.write(line + "\n")
 
@@ -1153,7 +1105,9 @@ class ApiProductDetailScraper(BaseScraper):
         """Save a single product using batch processing"""
         try:
             # Add product to batch processor
-            if not self.batch_processor.add_product(product_data):
+            with self.metrics.time_phase("batch_add"):
+                added = self.batch_processor.add_product(product_data)
+            if not added:
                 logging.error(
                     f"❌ Failed to add product {product_data.product_id} to batch"
                 )
@@ -1170,8 +1124,8 @@ class ApiProductDetailScraper(BaseScraper):
         try:
             logging.info("🔄 Finalizing batch processing...")
 
-            # Flush any remaining products in current batch
-            if not self.batch_processor.flush_batch():
+            # Flush any remaining products and wait for queued batch writes
+            if not self.batch_processor.close():
                 logging.error("❌ Failed to flush final batch")
                 return False
 
@@ -1180,7 +1134,9 @@ class ApiProductDetailScraper(BaseScraper):
 
             # Consolidate small batch files into larger ones
             logging.info("🔄 Consolidating small batch files...")
-            if not self.batch_processor.consolidate_batches(target_batch_size=50):
+            if not self.batch_processor.consolidate_batches(
+                target_batch_size=50, target_bytes=self.config.batch_max_bytes
+            ):
                 logging.warning("⚠️ Failed to consolidate batches, continuing...")
 
             # Merge batches to main output file with deduplication
@@ -1217,6 +1173,16 @@ def main():
     )
     parser.add_argument("--limit", type=int, help="Limit number of products to scrape")
     parser.add_argument("--config", type=str, help="Path to config file")
+    parser.add_argument(
+        "--reextract",
+        action="store_true",
+        help="Rebuild product data offline from the raw response archive (no network requests)",
+    )
+    parser.add_argument(
+        "--reextract-batch-dir",
+        default="batch_reextract",
+        help="Directory for re-extraction batches, one run_* subdirectory per run (default: batch_reextract)",
+    )
 
     args = parser.parse_args()
 
@@ -1234,6 +1200,10 @@ def main():
 
     scraper = ApiProductDetailScraper(session_manager, config)
 
+    if args.reextract:
+        scraper.reextract_from_archive(args.reextract_batch_dir, args.limit)
+        return
+
     # Start scraping
     scraper.scrape_all_products(args.mode, args.limit)
 
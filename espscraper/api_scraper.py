@@ -1,5 +1,6 @@
 from espscraper.base_scraper import BaseScraper
 from espscraper.session_manager import SessionManager
+from espscraper.jsonl_io import open_jsonl
 import requests
 import json
 import time
@@ -207,7 +208,7 @@ class ApiScraper(BaseScraper):
         # Load already-scraped product IDs if new_only is set
         already_scraped_ids = set()
         if new_only and detail_output_file and os.path.exists(detail_output_file):
-            with open(detail_output_file, "r") as f:
+            with open_jsonl(detail_output_file, "r") as f:
                 for i, line in enumerate(f, 1):
                     try:
                         data = json.loads(line)
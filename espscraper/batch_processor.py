@@ -9,12 +9,99 @@ for better organization and processing.
 import os
 import json
 import logging
+import time
 import shutil
+import queue
+import threading
 from datetime import datetime
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass, asdict, is_dataclass
 import hashlib
 
+from espscraper.jsonl_io import (
+    open_jsonl,
+    sync_file,
+    is_jsonl_file,
+    jsonl_suffix,
+    detect_compression,
+    normalize_compression,
+    strip_jsonl_suffix,
+    TRUNCATED_STREAM_ERRORS,
+)
+
+
+def stream_consolidate(
+    filepaths: List[str],
+    output_path: str,
+    last_owner: Optional[Dict[str, str]] = None,
+) -> Tuple[List[str], int, str]:
+    """Stream products from several JSONL files into one, deduplicated by ID
+
+    Lines are copied as-is, one at a time, so memory stays flat regardless of
+    product or group size; only product IDs are kept. If last_owner maps a
+    product ID to the file whose copy should be kept, other copies are
+    skipped, otherwise the first copy wins. Products without an ID are
+    dropped. Inputs may be plain or compressed; the output is compressed
+    according to its suffix, written to a temp file, fsynced and atomically
+    moved into place.
+
+    Returns (product IDs written, line count, md5 checksum of the output).
+    """
+    temp_path = output_path + ".tmp"
+    written_ids = set()
+    product_ids = []
+    checksum = hashlib.md5()
+
+    try:
+        with open_jsonl(
+            temp_path, "wb", compression=detect_compression(output_path)
+        ) as out:
+            for filepath in filepaths:
+                try:
+                    with open_jsonl(filepath, "rb") as f:
+                        for line in f:
+                            if not line.strip():
+                                continue
+                            try:
+                                product = json.loads(line)
+                            except json.JSONDecodeError:
+                                continue
+
+                            product_id = (
+                                product.get("product_id")
+                                or product.get("productId")
+                                or product.get("id")
+                            )
+                            if not product_id:
+                                continue
+                            product_id = str(product_id)
+
+                            if product_id in written_ids:
+                                continue
+                            if last_owner and last_owner.get(product_id, filepath) != filepath:
+                                continue
+
+                            if not line.endswith(b"\n"):
+                                line += b"\n"
+                            out.write(line)
+                            checksum.update(line)
+                            written_ids.add(product_id)
+                            product_ids.append(product_id)
+                except (OSError,) + TRUNCATED_STREAM_ERRORS as e:
+                    logging.warning(f"⚠️ Error reading {filepath}: {e}")
+                    continue
+
+            sync_file(out)
+
+        os.replace(temp_path, output_path)
+
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return product_ids, len(product_ids), checksum.hexdigest()
+
 
 @dataclass
 class BatchStats:
@@ -29,6 +116,8 @@ class BatchStats:
 class BatchProcessor:
     """Enhanced batch processor with deduplication and consolidation"""
 
+    MANIFEST_FILENAME = "manifest.json"
+
     def __init__(
         self,
         batch_size: int = 100,
@@ -37,87 +126,272 @@ class BatchProcessor:
         batch_prefix: str = "batch",
         enable_deduplication: bool = True,
         enable_consolidation: bool = True,
+        async_writes: bool = False,
+        write_queue_size: int = 4,
+        compression: Optional[str] = None,
+        product_store=None,
+        max_batch_bytes: Optional[int] = None,
+        max_batch_age: Optional[float] = None,
     ):
         self.batch_size = batch_size
+        self.max_batch_bytes = max_batch_bytes  # roll over at this serialized size
+        self.max_batch_age = max_batch_age  # seconds before a partial batch is saved
         self.batch_dir = batch_dir
         self.main_output_file = main_output_file
         self.batch_prefix = batch_prefix
         self.enable_deduplication = enable_deduplication
         self.enable_consolidation = enable_consolidation
+        self.async_writes = async_writes
+        # New batch files are written as .jsonl, .jsonl.gz or .jsonl.zst
+        self.compression = normalize_compression(compression)
+        self.batch_suffix = jsonl_suffix(self.compression)
+        # Optional ProductStore: batch lines become references to stored blobs
+        self.product_store = product_store
         
         # Enhanced tracking
         self.current_batch = []
+        self.current_batch_lines = []  # Encoded lines, kept when sizing by bytes
+        self.current_batch_bytes = 0
+        self.current_batch_started = None
         self.batch_counter = 0
         self.stats = BatchStats()
-        
-        # Deduplication tracking
-        self.processed_product_ids = set()
-        self.batch_product_hashes = {}  # Track product content hashes
-        self.existing_batch_products = self._load_existing_batch_products()
+
+        # Background writer (bounded queue so a slow disk applies backpressure)
+        self._write_queue = queue.Queue(maxsize=max(1, write_queue_size))
+        self._writer_thread = None
+        self._failed_writes = []
+        self._state_lock = threading.RLock()
+        self._closed = False  # After close() batches are written synchronously
         
         # Ensure batch directory exists
         os.makedirs(self.batch_dir, exist_ok=True)
+
+        # Persistent manifest of batch files (IDs, counts, sizes, checksums)
+        self.manifest_path = os.path.join(self.batch_dir, self.MANIFEST_FILENAME)
+        self.manifest = {"version": 1, "next_sequence": 1, "files": {}}
+        # Product IDs already merged into the main output, one per line
+        self.main_index_file = strip_jsonl_suffix(main_output_file) + ".ids.txt"
+
+        # Deduplication tracking
+        self.processed_product_ids = set()
+        self.product_file_index = {}  # Global index: product ID -> batch filename
+        self.existing_batch_products = {}  # Batch filename -> product IDs
+        for filename, product_ids in self._load_existing_batch_products().items():
+            self._index_batch_file(filename, product_ids)
         
         logging.info(
             f"🔧 Enhanced batch processor initialized: batch_size={batch_size}, "
             f"batch_dir={batch_dir}, deduplication={enable_deduplication}, "
-            f"consolidation={enable_consolidation}"
+            f"consolidation={enable_consolidation}, async_writes={async_writes}, "
+            f"compression={self.compression or 'none'}, "
+            f"product_store={product_store.store_dir if product_store else None}, "
+            f"max_batch_bytes={max_batch_bytes}, max_batch_age={max_batch_age}"
         )
 
     def _load_existing_batch_products(self) -> Dict[str, set]:
-        """Load existing products from all batch files to prevent duplicates"""
-        existing_products = {}
-        
-        if not os.path.exists(self.batch_dir):
-            return existing_products
-            
-        for filename in os.listdir(self.batch_dir):
-            if filename.startswith(self.batch_prefix) and filename.endswith(".jsonl"):
-                filepath = os.path.join(self.batch_dir, filename)
-                product_ids = set()
-                
-                try:
-                    with open(filepath, "r") as f:
-                        for line in f:
-                            try:
-                                data = json.loads(line.strip())
-                                product_id = (
-                                    data.get("product_id") 
-                                    or data.get("productId") 
-                                    or data.get("id")
-                                )
-                                if product_id:
-                                    product_ids.add(str(product_id))
-                            except json.JSONDecodeError:
-                                continue
-                    
-                    existing_products[filename] = product_ids
-                    logging.debug(f"📄 Loaded {len(product_ids)} products from {filename}")
-                    
-                except Exception as e:
-                    logging.warning(f"⚠️ Error loading products from {filename}: {e}")
-        
+        """Load existing products from the batch manifest to prevent duplicates
+
+        Only batch files missing from the manifest, or whose size/mtime no
+        longer match it, are re-parsed.
+        """
+        self.manifest = self._load_manifest()
+        rescanned = self._sync_manifest()
+
+        existing_products = {
+            filename: set(entry.get("product_ids", []))
+            for filename, entry in self.manifest["files"].items()
+        }
+
         total_existing = sum(len(products) for products in existing_products.values())
-        logging.info(f"📊 Loaded {total_existing} existing products from {len(existing_products)} batch files")
-        
+        logging.info(
+            f"📊 Loaded {total_existing} existing products from {len(existing_products)} batch files "
+            f"({rescanned} re-scanned)"
+        )
+
         return existing_products
 
-    def _get_product_hash(self, product: Dict[str, Any]) -> str:
-        """Generate a hash for product content to detect duplicates"""
-        # Create a stable representation of the product
-        product_copy = product.copy()
-        
-        # Remove variable fields that shouldn't affect deduplication
-        product_copy.pop("extraction_time", None)
-        product_copy.pop("scraped_date", None)
-        product_copy.pop("SourceURL", None)
-        
-        # Sort keys for consistent hashing
-        sorted_product = json.dumps(product_copy, sort_keys=True, separators=(",", ":"))
-        return hashlib.md5(sorted_product.encode()).hexdigest()
+    def _load_manifest(self) -> Dict[str, Any]:
+        """Read the batch manifest, returning an empty one if missing or corrupt"""
+        empty_manifest = {"version": 1, "next_sequence": 1, "files": {}}
+        if not os.path.exists(self.manifest_path):
+            return empty_manifest
+
+        try:
+            with open(self.manifest_path, "r") as f:
+                manifest = json.load(f)
+            if not isinstance(manifest.get("files"), dict):
+                raise ValueError("missing 'files' section")
+            manifest.setdefault("next_sequence", 1)
+            return manifest
+        except Exception as e:
+            logging.warning(f"⚠️ Ignoring unreadable batch manifest {self.manifest_path}: {e}")
+            return empty_manifest
+
+    def _save_manifest(self):
+        """Atomically write the batch manifest"""
+        temp_path = self.manifest_path + ".tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(self.manifest, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.manifest_path)
+        except Exception as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            logging.warning(f"⚠️ Could not save batch manifest: {e}")
+
+    def _list_batch_filenames(self) -> List[str]:
+        """List batch files currently on disk"""
+        if not os.path.exists(self.batch_dir):
+            return []
+        return [
+            filename
+            for filename in os.listdir(self.batch_dir)
+            if filename.startswith(self.batch_prefix) and is_jsonl_file(filename)
+        ]
+
+    def _scan_batch_file(self, filepath: str) -> Dict[str, Any]:
+        """Parse a batch file to build its manifest entry"""
+        product_ids = []
+        line_count = 0
+        checksum = hashlib.md5()
+
+        with open_jsonl(filepath, "rb") as f:
+            for raw_line in f:
+                checksum.update(raw_line)
+                if not raw_line.strip():
+                    continue
+                line_count += 1
+                try:
+                    data = json.loads(raw_line)
+                    product_id = (
+                        data.get("product_id")
+                        or data.get("productId")
+                        or data.get("id")
+                    )
+                    if product_id:
+                        product_ids.append(str(product_id))
+                except json.JSONDecodeError:
+                    continue
+
+        return {
+            "product_ids": product_ids,
+            "line_count": line_count,
+            "checksum": checksum.hexdigest(),
+        }
+
+    def _record_batch_file(
+        self, filename: str, product_ids, line_count: int, checksum: str
+    ):
+        """Add or replace a manifest entry for a batch file on disk"""
+        stat = os.stat(os.path.join(self.batch_dir, filename))
+        existing = self.manifest["files"].get(filename)
+        if existing and "sequence" in existing:
+            sequence = existing["sequence"]
+        else:
+            sequence = self.manifest["next_sequence"]
+            self.manifest["next_sequence"] = sequence + 1
+
+        self.manifest["files"][filename] = {
+            "sequence": sequence,
+            "product_ids": list(product_ids),
+            "line_count": line_count,
+            "size_bytes": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "checksum": checksum,
+            "created_at": (existing or {}).get("created_at", datetime.now().isoformat()),
+        }
+
+    def _sync_manifest(self) -> int:
+        """Reconcile the manifest with batch files on disk
+
+        Files changed outside this processor (by size or mtime) are re-parsed,
+        deleted files are dropped. Returns the number of files re-scanned.
+        """
+        on_disk = self._list_batch_filenames()
+        files = self.manifest["files"]
+        changed = False
+        rescanned = 0
+
+        for filename in set(files) - set(on_disk):
+            self._forget_batch_file(filename)
+            changed = True
+
+        # Assign creation order to new files by ctime, like the old ordering
+        new_files = []
+        for filename in on_disk:
+            filepath = os.path.join(self.batch_dir, filename)
+            try:
+                stat = os.stat(filepath)
+            except OSError:
+                continue
+            entry = files.get(filename)
+            if (
+                entry
+                and entry.get("size_bytes") == stat.st_size
+                and entry.get("mtime_ns") == stat.st_mtime_ns
+            ):
+                continue
+            new_files.append((stat.st_ctime, filename))
+
+        for _, filename in sorted(new_files):
+            filepath = os.path.join(self.batch_dir, filename)
+            try:
+                scanned = self._scan_batch_file(filepath)
+                self._record_batch_file(
+                    filename,
+                    scanned["product_ids"],
+                    scanned["line_count"],
+                    scanned["checksum"],
+                )
+                self._index_batch_file(filename, set(scanned["product_ids"]))
+                rescanned += 1
+                changed = True
+                logging.debug(
+                    f"📄 Indexed {scanned['line_count']} products from {filename}"
+                )
+            except Exception as e:
+                logging.warning(f"⚠️ Error loading products from {filename}: {e}")
+
+        if changed:
+            self._save_manifest()
+        return rescanned
+
+    def _ordered_batch_files(self) -> List[tuple]:
+        """Return (filepath, manifest entry) pairs in creation order"""
+        entries = sorted(
+            self.manifest["files"].items(), key=lambda item: item[1].get("sequence", 0)
+        )
+        return [
+            (os.path.join(self.batch_dir, filename), entry)
+            for filename, entry in entries
+        ]
+
+    def _index_batch_file(self, filename: str, product_ids: set):
+        """Register a batch file and its product IDs in the global index
+
+        IDs indexed for an earlier version of the file are dropped first, so a
+        rewritten file doesn't leave stale entries behind.
+        """
+        self._unindex_batch_file(filename)
+        self.existing_batch_products[filename] = product_ids
+        for product_id in product_ids:
+            self.product_file_index[product_id] = filename
+
+    def _forget_batch_file(self, filename: str):
+        """Drop a removed batch file from the global index and manifest"""
+        self.manifest["files"].pop(filename, None)
+        self._unindex_batch_file(filename)
+
+    def _unindex_batch_file(self, filename: str):
+        """Drop a batch file's product IDs from the global index"""
+        for product_id in self.existing_batch_products.pop(filename, set()):
+            if self.product_file_index.get(product_id) == filename:
+                del self.product_file_index[product_id]
 
     def _is_duplicate_product(self, product: Dict[str, Any]) -> bool:
-        """Check if product is a duplicate based on ID and content"""
+        """Check if product is a duplicate by its ID"""
         if not self.enable_deduplication:
             return False
             
@@ -138,23 +412,20 @@ class BatchProcessor:
             return True
             
         # Check if product exists in any existing batch file
-        for filename, product_ids in self.existing_batch_products.items():
-            if product_id in product_ids:
-                logging.debug(f"🔄 Product {product_id} already exists in {filename}")
-                return True
-                
-        # Check content hash for exact duplicates
-        product_hash = self._get_product_hash(product)
-        if product_hash in self.batch_product_hashes:
-            existing_id = self.batch_product_hashes[product_hash]
-            logging.debug(f"🔄 Duplicate content detected: {product_id} matches {existing_id}")
+        filename = self.product_file_index.get(product_id)
+        if filename:
+            logging.debug(f"🔄 Product {product_id} already exists in {filename}")
             return True
-            
+
         return False
 
     def add_product(self, product: Dict[str, Any]) -> bool:
         """Add a product to the current batch with deduplication"""
         try:
+            # Scrapers hand over ProductData records; batches store plain dicts
+            if is_dataclass(product):
+                product = asdict(product)
+
             # Check for duplicates
             if self._is_duplicate_product(product):
                 self.stats.duplicate_products += 1
@@ -162,7 +433,14 @@ class BatchProcessor:
                 return True  # Return True since we successfully handled it
                 
             # Add to current batch
+            if not self.current_batch:
+                self.current_batch_started = time.time()
             self.current_batch.append(product)
+            if self.max_batch_bytes:
+                # Serialize once here so the batch can be cut by size
+                json_line = self._encode_product(product)
+                self.current_batch_lines.append(json_line)
+                self.current_batch_bytes += len(json_line)
             
             # Track product
             product_id = (
@@ -172,14 +450,12 @@ class BatchProcessor:
             )
             if product_id:
                 self.processed_product_ids.add(str(product_id))
-                product_hash = self._get_product_hash(product)
-                self.batch_product_hashes[product_hash] = str(product_id)
             
             self.stats.unique_products += 1
             self.stats.total_products += 1
             
-            # Save batch if it's full
-            if len(self.current_batch) >= self.batch_size:
+            # Save batch if it's full; once closed, nothing will flush it later
+            if self._batch_is_full() or self._closed:
                 return self._save_current_batch()
                 
             return True
@@ -188,127 +464,263 @@ class BatchProcessor:
             logging.error(f"❌ Error adding product to batch: {e}")
             return False
 
+    def _encode_product(self, product: Dict[str, Any]) -> bytes:
+        """Serialize a product (or its store reference) as one compact JSONL line"""
+        if self.product_store is not None:
+            product = self.product_store.make_ref(product)
+        return (
+            json.dumps(product, ensure_ascii=False, separators=(",", ":")) + "\n"
+        ).encode("utf-8")
+
+    def _batch_age(self) -> float:
+        """Seconds since the first product of the current batch was added"""
+        if not self.current_batch or self.current_batch_started is None:
+            return 0.0
+        return time.time() - self.current_batch_started
+
+    def _batch_is_full(self) -> bool:
+        """Check whether the current batch hit its count, byte or age limit"""
+        if len(self.current_batch) >= self.batch_size:
+            return True
+        if self.max_batch_bytes and self.current_batch_bytes >= self.max_batch_bytes:
+            return True
+        if self.max_batch_age and self._batch_age() >= self.max_batch_age:
+            return True
+        return False
+
+    def flush_if_stale(self) -> bool:
+        """Save the current batch if it is older than max_batch_age"""
+        if self.max_batch_age and self._batch_age() >= self.max_batch_age:
+            logging.info(
+                f"⏰ Saving partial batch of {len(self.current_batch)} products "
+                f"after {self._batch_age():.0f}s"
+            )
+            return self._save_current_batch()
+        return True
+
     def _save_current_batch(self) -> bool:
-        """Save the current batch to a file with enhanced naming"""
+        """Save the current batch to a file with enhanced naming
+
+        With async_writes the batch is handed to the background writer and
+        this returns as soon as it is queued (blocking only while the queue
+        is full); use flush() to wait until it is on disk. After close() it
+        is always written synchronously, since no writer would be joined.
+        """
         if not self.current_batch:
             return True
 
-        try:
-            # Create batch filename with product count and timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            self.batch_counter += 1
-            product_count = len(self.current_batch)
-            
-            # Enhanced filename with product count
-            batch_filename = (
-                f"{self.batch_prefix}_{timestamp}_{self.batch_counter}_{product_count}.jsonl"
-            )
-            batch_path = os.path.join(self.batch_dir, batch_filename)
+        # Create batch filename with product count and timestamp
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.batch_counter += 1
+        products = self.current_batch
+        lines = self.current_batch_lines if self.max_batch_bytes else None
+        product_count = len(products)
+
+        # Enhanced filename with product count
+        batch_filename = (
+            f"{self.batch_prefix}_{timestamp}_{self.batch_counter}_{product_count}"
+            f"{self.batch_suffix}"
+        )
 
+        if self.async_writes and not self._closed:
+            self._start_writer()
+            self._reset_current_batch()
+            self._write_queue.put((batch_filename, products, lines))
+            return True
+
+        if not self._write_batch(batch_filename, products, lines):
+            return False
+
+        # Clear current batch
+        self._reset_current_batch()
+        return True
+
+    def _reset_current_batch(self):
+        """Start a new, empty current batch"""
+        self.current_batch = []
+        self.current_batch_lines = []
+        self.current_batch_bytes = 0
+        self.current_batch_started = None
+
+    def _write_batch(
+        self,
+        batch_filename: str,
+        products: List[Dict[str, Any]],
+        lines: Optional[List[bytes]] = None,
+    ) -> bool:
+        """Write one batch file atomically and record it in the index/manifest"""
+        batch_path = os.path.join(self.batch_dir, batch_filename)
+        product_count = len(products)
+        if lines is None:
+            lines = [self._encode_product(product) for product in products]
+
+        try:
             # Save batch with atomic write
             temp_path = batch_path + ".tmp"
+            checksum = hashlib.md5()
             try:
-                with open(temp_path, "w") as f:
-                    for product in self.current_batch:
-                        json_line = (
-                            json.dumps(
-                                product, ensure_ascii=False, separators=(",", ":")
-                            )
-                            + "\n"
-                        )
+                with open_jsonl(
+                    temp_path, "wb", compression=detect_compression(batch_filename)
+                ) as f:
+                    for json_line in lines:
+                        checksum.update(json_line)
                         f.write(json_line)
-                    f.flush()
-                    os.fsync(f.fileno())
+                    sync_file(f)
 
                 # Atomic move
                 shutil.move(temp_path, batch_path)
-                
+
+            except Exception as e:
+                # Clean up temp file on error
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise e
+
+            # Update existing products tracking
+            product_ids = []
+            for product in products:
+                product_id = (
+                    product.get("product_id") 
+                    or product.get("productId") 
+                    or product.get("id")
+                )
+                if product_id:
+                    product_ids.append(str(product_id))
+
+            with self._state_lock:
                 # Update stats
                 file_size = os.path.getsize(batch_path)
                 self.stats.total_size_bytes += file_size
                 self.stats.batch_count += 1
 
-                logging.info(
-                    f"💾 Saved batch {self.batch_counter}: {product_count} unique products -> {batch_filename} ({file_size:,} bytes)"
+                self._index_batch_file(batch_filename, set(product_ids))
+                self._record_batch_file(
+                    batch_filename, product_ids, product_count, checksum.hexdigest()
                 )
-                
-                # Update existing products tracking
-                product_ids = set()
-                for product in self.current_batch:
-                    product_id = (
-                        product.get("product_id") 
-                        or product.get("productId") 
-                        or product.get("id")
-                    )
-                    if product_id:
-                        product_ids.add(str(product_id))
-                self.existing_batch_products[batch_filename] = product_ids
+                self._save_manifest()
 
-                # Clear current batch
-                self.current_batch = []
-
-                return True
-
-            except Exception as e:
-                # Clean up temp file on error
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-                raise e
+            logging.info(
+                f"💾 Saved batch: {product_count} unique products -> {batch_filename} ({file_size:,} bytes)"
+            )
+            return True
 
         except Exception as e:
             logging.error(f"❌ Error saving batch: {e}")
             return False
 
+    def _start_writer(self):
+        """Start the background batch writer thread if it isn't running"""
+        if self._writer_thread is not None and self._writer_thread.is_alive():
+            return
+        self._writer_thread = threading.Thread(
+            target=self._writer_loop, name="batch-writer", daemon=True
+        )
+        self._writer_thread.start()
+        logging.info(
+            f"🧵 Background batch writer started (queue size {self._write_queue.maxsize})"
+        )
+
+    def _writer_loop(self):
+        """Write queued batches until a stop sentinel is received"""
+        while True:
+            item = self._write_queue.get()
+            try:
+                if item is None:
+                    return
+                if not self._write_batch(*item):
+                    # Keep the products so flush() can retry synchronously
+                    with self._state_lock:
+                        self._failed_writes.append(item)
+            finally:
+                self._write_queue.task_done()
+
     def flush_batch(self) -> bool:
         """Force save the current batch even if not full"""
         if self.current_batch:
             return self._save_current_batch()
         return True
 
-    def consolidate_batches(self, target_batch_size: int = 100) -> bool:
-        """Consolidate small batch files into larger ones"""
+    def flush(self) -> bool:
+        """Save the current batch and wait until every queued batch is on disk"""
+        success = self.flush_batch()
+
+        if self._writer_thread is not None:
+            self._write_queue.join()
+
+        # Retry batches the background writer failed to save
+        with self._state_lock:
+            failed_writes, self._failed_writes = self._failed_writes, []
+        for batch_filename, products, lines in failed_writes:
+            logging.warning(f"🔄 Retrying failed batch write {batch_filename}...")
+            if not self._write_batch(batch_filename, products, lines):
+                logging.error(f"❌ Batch {batch_filename} could not be saved")
+                self.current_batch = products + self.current_batch
+                if lines is not None:
+                    self.current_batch_lines = lines + self.current_batch_lines
+                    self.current_batch_bytes += sum(len(line) for line in lines)
+                success = False
+
+        return success
+
+    def close(self) -> bool:
+        """Flush all pending batches and stop the background writer
+
+        Products added afterwards are written to batch files synchronously
+        and left for the next merge into the main output.
+        """
+        success = self.flush()
+        self._closed = True
+        if self._writer_thread is not None and self._writer_thread.is_alive():
+            self._write_queue.put(None)
+            self._writer_thread.join()
+        self._writer_thread = None
+        return success
+
+    def consolidate_batches(
+        self, target_batch_size: int = 100, target_bytes: Optional[int] = None
+    ) -> bool:
+        """Consolidate small batch files into larger ones
+
+        Groups are capped at target_batch_size products and, if given,
+        target_bytes bytes, whichever is reached first.
+        """
         if not self.enable_consolidation:
             return True
             
         try:
             logging.info(f"🔄 Consolidating batch files to target size: {target_batch_size}")
+            self.flush()
             
-            # Get all batch files
-            batch_files = []
-            for filename in os.listdir(self.batch_dir):
-                if filename.startswith(self.batch_prefix) and filename.endswith(".jsonl"):
-                    filepath = os.path.join(self.batch_dir, filename)
-                    batch_files.append((filepath, os.path.getctime(filepath)))
+            # Get all batch files in creation order from the manifest
+            self._sync_manifest()
+            batch_files = self._ordered_batch_files()
             
             if not batch_files:
                 logging.info("ℹ️ No batch files to consolidate")
                 return True
-                
-            # Sort by creation time
-            batch_files.sort(key=lambda x: x[1])
             
             # Group small files for consolidation
             consolidated_groups = []
             current_group = []
             current_size = 0
+            current_bytes = 0
             
-            for filepath, _ in batch_files:
-                try:
-                    with open(filepath, "r") as f:
-                        product_count = sum(1 for line in f if line.strip())
-                    
-                    if current_size + product_count <= target_batch_size:
-                        current_group.append(filepath)
-                        current_size += product_count
-                    else:
-                        if current_group:
-                            consolidated_groups.append(current_group)
-                        current_group = [filepath]
-                        current_size = product_count
-                        
-                except Exception as e:
-                    logging.warning(f"⚠️ Error reading {filepath}: {e}")
-                    continue
+            for filepath, entry in batch_files:
+                product_count = entry.get("line_count", 0)
+                file_bytes = entry.get("size_bytes", 0)
+
+                if current_size + product_count <= target_batch_size and (
+                    not target_bytes or current_bytes + file_bytes <= target_bytes
+                ):
+                    current_group.append(filepath)
+                    current_size += product_count
+                    current_bytes += file_bytes
+                else:
+                    if current_group:
+                        consolidated_groups.append(current_group)
+                    current_group = [filepath]
+                    current_size = product_count
+                    current_bytes = file_bytes
             
             # Add the last group
             if current_group:
@@ -336,67 +748,230 @@ class BatchProcessor:
         """Consolidate a group of batch files into one"""
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            consolidated_filename = f"{self.batch_prefix}_consolidated_{timestamp}_group_{group_id}.jsonl"
+            consolidated_filename = (
+                f"{self.batch_prefix}_consolidated_{timestamp}_group_{group_id}"
+                f"{self.batch_suffix}"
+            )
             consolidated_path = os.path.join(self.batch_dir, consolidated_filename)
-            
-            # Collect all products from the group
-            all_products = []
+
+            # Newest copy of a product wins; resolved from manifest IDs so no
+            # product bodies need to be held in memory
+            last_owner = {}
             for filepath in filepaths:
-                try:
-                    with open(filepath, "r") as f:
-                        for line in f:
-                            if line.strip():
-                                product = json.loads(line)
-                                all_products.append(product)
-                except Exception as e:
-                    logging.warning(f"⚠️ Error reading {filepath}: {e}")
-                    continue
-            
-            # Remove duplicates based on product ID
-            unique_products = {}
-            for product in all_products:
-                product_id = (
-                    product.get("product_id") 
-                    or product.get("productId") 
-                    or product.get("id")
-                )
-                if product_id:
-                    unique_products[str(product_id)] = product
-            
-            # Write consolidated file
-            with open(consolidated_path, "w") as f:
-                for product in unique_products.values():
-                    json_line = json.dumps(product, ensure_ascii=False, separators=(",", ":")) + "\n"
-                    f.write(json_line)
-            
+                entry = self.manifest["files"].get(os.path.basename(filepath), {})
+                for product_id in entry.get("product_ids", []):
+                    last_owner[product_id] = filepath
+
+            product_ids, line_count, checksum = stream_consolidate(
+                filepaths, consolidated_path, last_owner
+            )
+
+            # The consolidated file only needs merging if a source did
+            already_merged = all(
+                self.manifest["files"].get(os.path.basename(filepath), {}).get("merged")
+                for filepath in filepaths
+            )
+
             # Remove original files
             for filepath in filepaths:
                 try:
                     os.remove(filepath)
+                    self._forget_batch_file(os.path.basename(filepath))
                     logging.debug(f"🗑️ Removed {os.path.basename(filepath)}")
                 except Exception as e:
                     logging.warning(f"⚠️ Could not remove {filepath}: {e}")
+            self._index_batch_file(consolidated_filename, set(product_ids))
+            self._record_batch_file(
+                consolidated_filename, product_ids, line_count, checksum
+            )
+            self.manifest["files"][consolidated_filename]["merged"] = already_merged
+            self._save_manifest()
             
-            logging.info(f"✅ Consolidated {len(filepaths)} files into {consolidated_filename} ({len(unique_products)} unique products)")
+            logging.info(f"✅ Consolidated {len(filepaths)} files into {consolidated_filename} ({line_count} unique products)")
             return True
             
         except Exception as e:
             logging.error(f"❌ Error consolidating group: {e}")
             return False
 
-    def merge_batches_to_main(self) -> bool:
-        """Merge all batch files into the main output file with deduplication"""
+    def _extract_line_product_id(self, line: str) -> Optional[str]:
+        """Parse one JSONL line and return its product ID (raises on bad JSON)"""
+        product = json.loads(line)
+        product_id = (
+            product.get("product_id")
+            or product.get("productId")
+            or product.get("id")
+        )
+        return str(product_id) if product_id else None
+
+    def _main_state_is_current(self) -> bool:
+        """Check that the main output still matches the last recorded merge"""
+        state = self.manifest.get("main_output") or {}
+        if state.get("file") != self.main_output_file:
+            return False
+        if not os.path.exists(self.main_output_file) or not os.path.exists(
+            self.main_index_file
+        ):
+            return False
+        return os.path.getsize(self.main_output_file) == state.get("size_bytes")
+
+    def _load_main_index(self) -> set:
+        """Load the product IDs already present in the main output"""
+        merged_ids = set()
+
+        if self._main_state_is_current():
+            with open(self.main_index_file, "r") as f:
+                for line in f:
+                    product_id = line.strip()
+                    if product_id:
+                        merged_ids.add(product_id)
+            return merged_ids
+
+        # Main output was changed outside the merge (or never indexed):
+        # rebuild the ID index from it and re-check every batch file
+        logging.info(f"🔍 Re-indexing product IDs in {self.main_output_file}...")
+        for entry in self.manifest["files"].values():
+            entry["merged"] = False
+
+        if os.path.exists(self.main_output_file):
+            with open_jsonl(self.main_output_file, "rb") as f:
+                last_line = b""
+                for line in f:
+                    last_line = line
+                    if not line.strip():
+                        continue
+                    try:
+                        product_id = self._extract_line_product_id(line)
+                        if product_id:
+                            merged_ids.add(product_id)
+                    except json.JSONDecodeError:
+                        continue
+            # Make sure appended records start on a fresh line
+            if last_line and not last_line.endswith(b"\n"):
+                with open_jsonl(self.main_output_file, "ab") as f:
+                    f.write(b"\n")
+
+        self._write_main_index(merged_ids)
+        return merged_ids
+
+    def _write_main_index(self, product_ids):
+        """Atomically rewrite the main output ID index"""
+        temp_path = self.main_index_file + ".tmp"
+        with open(temp_path, "w") as f:
+            for product_id in product_ids:
+                f.write(product_id + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.main_index_file)
+
+    def _record_main_state(self, product_count: int, merged_files: List[str]):
+        """Record the main output size/count after a merge"""
+        self.manifest["main_output"] = {
+            "file": self.main_output_file,
+            "index_file": self.main_index_file,
+            "size_bytes": os.path.getsize(self.main_output_file),
+            "product_count": product_count,
+            "updated_at": datetime.now().isoformat(),
+        }
+        self.manifest["last_merge"] = {
+            "main_output_file": self.main_output_file,
+            "merged_files": merged_files,
+            "merged_at": datetime.now().isoformat(),
+        }
+        self._save_manifest()
+
+    def merge_batches_to_main(self, full_rebuild: bool = False) -> bool:
+        """Append batch files not yet merged into the main output file
+
+        Only batch files the manifest doesn't mark as merged are read, and
+        products are deduplicated against the persistent ID index of the
+        main output. Use ``full_rebuild=True`` (or rebuild_main_output) to
+        rewrite the main output from the batch files instead.
+        """
+        if full_rebuild:
+            return self.rebuild_main_output()
+
         try:
-            logging.info("🔄 Merging batch files into main output...")
+            logging.info("🔄 Merging new batch files into main output...")
+            self.flush()
+
+            self._sync_manifest()
+            merged_ids = self._load_main_index()
+            pending_files = [
+                (batch_path, entry)
+                for batch_path, entry in self._ordered_batch_files()
+                if not entry.get("merged")
+            ]
+
+            if not pending_files:
+                logging.info("ℹ️ No new batch files to merge")
+                return True
+
+            main_dir = os.path.dirname(self.main_output_file)
+            if main_dir:
+                os.makedirs(main_dir, exist_ok=True)
+
+            total_merged = 0
+            duplicate_count = 0
+            merged_files = []
+
+            with open_jsonl(self.main_output_file, "ab") as main_file, open(
+                self.main_index_file, "a"
+            ) as index_file:
+                for batch_path, entry in pending_files:
+                    logging.info(f"📄 Merging {os.path.basename(batch_path)}...")
+
+                    with open_jsonl(batch_path, "rb") as batch_file:
+                        for line in batch_file:
+                            if not line.strip():
+                                continue
+                            try:
+                                product_id = self._extract_line_product_id(line)
+                            except json.JSONDecodeError:
+                                logging.warning(f"⚠️ Invalid JSON in {batch_path}")
+                                continue
+
+                            if product_id:
+                                if product_id in merged_ids:
+                                    duplicate_count += 1
+                                    continue
+                                merged_ids.add(product_id)
+                                index_file.write(product_id + "\n")
+
+                            # Products without ID are written anyway
+                            if not line.endswith(b"\n"):
+                                line += b"\n"
+                            main_file.write(line)
+                            total_merged += 1
+
+                    entry["merged"] = True
+                    merged_files.append(os.path.basename(batch_path))
 
-            # Get all batch files sorted by creation time
-            batch_files = []
-            for filename in os.listdir(self.batch_dir):
-                if filename.startswith(self.batch_prefix) and filename.endswith(".jsonl"):
-                    filepath = os.path.join(self.batch_dir, filename)
-                    batch_files.append((filepath, os.path.getctime(filepath)))
+                sync_file(main_file)
+                sync_file(index_file)
 
-            batch_files.sort(key=lambda x: x[1])  # Sort by creation time
+            self._record_main_state(len(merged_ids), merged_files)
+
+            logging.info(
+                f"✅ Successfully merged {len(merged_files)} new batch files into main output: "
+                f"{total_merged} products ({duplicate_count} duplicates skipped, "
+                f"{len(merged_ids)} total)"
+            )
+            return True
+
+        except Exception as e:
+            logging.error(f"❌ Error merging batches: {e}")
+            return False
+
+    def rebuild_main_output(self) -> bool:
+        """Rewrite the main output file from all batch files (compaction)"""
+        try:
+            logging.info("🔄 Rebuilding main output from all batch files...")
+            self.flush()
+
+            # Get all batch files in creation order from the manifest
+            self._sync_manifest()
+            batch_files = self._ordered_batch_files()
 
             if not batch_files:
                 logging.warning("⚠️ No batch files found to merge")
@@ -405,29 +980,27 @@ class BatchProcessor:
             # Create main output file with atomic write and deduplication
             temp_main = self.main_output_file + ".tmp"
             total_merged = 0
-            unique_products = {}
+            merged_ids = set()
             duplicate_count = 0
 
             try:
-                with open(temp_main, "w") as main_file:
+                with open_jsonl(
+                    temp_main,
+                    "wb",
+                    compression=detect_compression(self.main_output_file),
+                ) as main_file:
                     for batch_path, _ in batch_files:
                         logging.info(f"📄 Merging {os.path.basename(batch_path)}...")
 
-                        with open(batch_path, "r") as batch_file:
+                        with open_jsonl(batch_path, "rb") as batch_file:
                             for line in batch_file:
                                 if line.strip():
                                     try:
-                                        product = json.loads(line)
-                                        product_id = (
-                                            product.get("product_id") 
-                                            or product.get("productId") 
-                                            or product.get("id")
-                                        )
-                                        
+                                        product_id = self._extract_line_product_id(line)
+
                                         if product_id:
-                                            product_id = str(product_id)
-                                            if product_id not in unique_products:
-                                                unique_products[product_id] = product
+                                            if product_id not in merged_ids:
+                                                merged_ids.add(product_id)
                                                 main_file.write(line)
                                                 total_merged += 1
                                             else:
@@ -436,14 +1009,22 @@ class BatchProcessor:
                                             # Product without ID, write it anyway
                                             main_file.write(line)
                                             total_merged += 1
-                                            
+
                                     except json.JSONDecodeError:
                                         logging.warning(f"⚠️ Invalid JSON in {batch_path}")
                                         continue
+                    sync_file(main_file)
 
                 # Atomic move
                 shutil.move(temp_main, self.main_output_file)
 
+                self._write_main_index(merged_ids)
+                for _, entry in batch_files:
+                    entry["merged"] = True
+                self._record_main_state(
+                    len(merged_ids), [os.path.basename(path) for path, _ in batch_files]
+                )
+
                 logging.info(
                     f"✅ Successfully merged {len(batch_files)} batch files into main output: "
                     f"{total_merged} products ({duplicate_count} duplicates removed)"
@@ -458,28 +1039,119 @@ class BatchProcessor:
                 raise e
 
         except Exception as e:
-            logging.error(f"❌ Error merging batches: {e}")
+            logging.error(f"❌ Error rebuilding main output: {e}")
+            return False
+
+    def replace_in_main_output(self) -> bool:
+        """Rewrite the main output with this processor's batch records winning
+
+        Records whose product ID is already in the main output are replaced
+        in place; new IDs are appended. Used to write re-extracted products
+        over the stale records they were rebuilt from.
+        """
+        try:
+            logging.info("🔄 Replacing main output records from batch files...")
+            self.flush()
+
+            self._sync_manifest()
+            batch_files = self._ordered_batch_files()
+            if not batch_files:
+                logging.warning("⚠️ No batch files found to merge")
+                return True
+
+            # Later batch files win over earlier ones
+            replacements = {}
+            for batch_path, _ in batch_files:
+                with open_jsonl(batch_path, "rb") as batch_file:
+                    for line in batch_file:
+                        if not line.strip():
+                            continue
+                        try:
+                            product_id = self._extract_line_product_id(line)
+                        except json.JSONDecodeError:
+                            logging.warning(f"⚠️ Invalid JSON in {batch_path}")
+                            continue
+                        if product_id:
+                            if not line.endswith(b"\n"):
+                                line += b"\n"
+                            replacements[product_id] = line
+
+            main_dir = os.path.dirname(self.main_output_file)
+            if main_dir:
+                os.makedirs(main_dir, exist_ok=True)
+
+            temp_main = self.main_output_file + ".tmp"
+            merged_ids = set()
+            replaced = 0
+
+            try:
+                with open_jsonl(
+                    temp_main,
+                    "wb",
+                    compression=detect_compression(self.main_output_file),
+                ) as main_file:
+                    if os.path.exists(self.main_output_file):
+                        with open_jsonl(self.main_output_file, "rb") as old_file:
+                            for line in old_file:
+                                if not line.strip():
+                                    continue
+                                try:
+                                    product_id = self._extract_line_product_id(line)
+                                except json.JSONDecodeError:
+                                    continue
+                                if product_id in replacements:
+                                    line = replacements.pop(product_id)
+                                    replaced += 1
+                                elif not line.endswith(b"\n"):
+                                    line += b"\n"
+                                if product_id:
+                                    merged_ids.add(product_id)
+                                main_file.write(line)
+
+                    appended = len(replacements)
+                    for product_id, line in replacements.items():
+                        merged_ids.add(product_id)
+                        main_file.write(line)
+                    sync_file(main_file)
+
+                shutil.move(temp_main, self.main_output_file)
+
+            except Exception as e:
+                if os.path.exists(temp_main):
+                    os.remove(temp_main)
+                raise e
+
+            self._write_main_index(merged_ids)
+            for _, entry in batch_files:
+                entry["merged"] = True
+            self._record_main_state(
+                len(merged_ids), [os.path.basename(path) for path, _ in batch_files]
+            )
+
+            logging.info(
+                f"✅ Replaced {replaced} and appended {appended} products in main output "
+                f"({len(merged_ids)} total)"
+            )
+            return True
+
+        except Exception as e:
+            logging.error(f"❌ Error replacing main output records: {e}")
             return False
 
     def cleanup_batches(self, keep_recent: int = 5) -> bool:
         """Clean up old batch files, keeping only the most recent ones"""
         try:
             logging.info(f"🧹 Cleaning up batch files (keeping {keep_recent} most recent)...")
+            self.flush()
             
-            # Get all batch files with creation time
-            batch_files = []
-            for filename in os.listdir(self.batch_dir):
-                if filename.startswith(self.batch_prefix) and filename.endswith(".jsonl"):
-                    filepath = os.path.join(self.batch_dir, filename)
-                    batch_files.append((filepath, os.path.getctime(filepath)))
+            # Get all batch files in creation order (oldest first)
+            self._sync_manifest()
+            batch_files = self._ordered_batch_files()
             
             if len(batch_files) <= keep_recent:
                 logging.info("ℹ️ No cleanup needed")
                 return True
             
-            # Sort by creation time (oldest first)
-            batch_files.sort(key=lambda x: x[1])
-            
             # Remove old files
             files_to_remove = batch_files[:-keep_recent]
             removed_count = 0
@@ -487,11 +1159,13 @@ class BatchProcessor:
             for filepath, _ in files_to_remove:
                 try:
                     os.remove(filepath)
+                    self._forget_batch_file(os.path.basename(filepath))
                     removed_count += 1
                     logging.debug(f"🗑️ Removed {os.path.basename(filepath)}")
                 except Exception as e:
                     logging.warning(f"⚠️ Could not remove {filepath}: {e}")
             
+            self._save_manifest()
             logging.info(f"✅ Cleaned up {removed_count} old batch files")
             return True
             
@@ -501,6 +1175,8 @@ class BatchProcessor:
 
     def get_batch_stats(self) -> Dict[str, Any]:
         """Get comprehensive batch processing statistics"""
+        with self._state_lock:
+            manifest_files = list(self.manifest["files"].values())
         return {
             "batch_count": self.stats.batch_count,
             "total_products": self.stats.total_products,
@@ -512,8 +1188,17 @@ class BatchProcessor:
                 if self.stats.total_products > 0 else 0
             ),
             "current_batch_size": len(self.current_batch),
+            "current_batch_bytes": self.current_batch_bytes,
+            "pending_batch_writes": self._write_queue.qsize(),
             "processed_product_ids": len(self.processed_product_ids),
-            "existing_batch_files": len(self.existing_batch_products)
+            "indexed_product_ids": len(self.product_file_index),
+            "existing_batch_files": len(self.existing_batch_products),
+            "products_in_batch_files": sum(
+                entry.get("line_count", 0) for entry in manifest_files
+            ),
+            "batch_files_size_bytes": sum(
+                entry.get("size_bytes", 0) for entry in manifest_files
+            ),
         }
 
     def print_stats(self):
@@ -528,12 +1213,16 @@ class BatchProcessor:
         logging.info(f"   Total size: {stats['total_size_bytes']:,} bytes")
         logging.info(f"   Current batch size: {stats['current_batch_size']}")
         logging.info(f"   Processed product IDs: {stats['processed_product_ids']:,}")
+        logging.info(f"   Indexed product IDs: {stats['indexed_product_ids']:,}")
         logging.info(f"   Existing batch files: {stats['existing_batch_files']}")
+        logging.info(f"   Products in batch files: {stats['products_in_batch_files']:,}")
+        logging.info(f"   Batch files size: {stats['batch_files_size_bytes']:,} bytes")
 
 
 def main():
     """Test the enhanced batch processor"""
     import argparse
+    from espscraper.product_store import ProductStore
     
     parser = argparse.ArgumentParser(description="Enhanced Batch Processor")
     parser.add_argument("--batch-size", type=int, default=100, help="Batch size")
@@ -541,18 +1230,48 @@ def main():
     parser.add_argument("--consolidate", action="store_true", help="Consolidate small batches")
     parser.add_argument("--cleanup", action="store_true", help="Clean up old batches")
     parser.add_argument("--stats", action="store_true", help="Show statistics")
+    parser.add_argument(
+        "--main-output", default="final_product_details.jsonl", help="Main output file"
+    )
+    parser.add_argument(
+        "--merge", action="store_true", help="Merge new batch files into the main output"
+    )
+    parser.add_argument(
+        "--compression",
+        choices=["none", "gzip", "zstd"],
+        default="none",
+        help="Compression for new/consolidated batch files",
+    )
+    parser.add_argument(
+        "--product-store",
+        default=None,
+        help="Write new batch files as references into this product store",
+    )
+    parser.add_argument(
+        "--rebuild-main",
+        action="store_true",
+        help="Compact: rewrite the main output from all batch files",
+    )
     
     args = parser.parse_args()
     
     processor = BatchProcessor(
         batch_size=args.batch_size,
         batch_dir=args.batch_dir,
+        main_output_file=args.main_output,
         enable_deduplication=True,
-        enable_consolidation=True
+        enable_consolidation=True,
+        compression=args.compression,
+        product_store=ProductStore(args.product_store) if args.product_store else None,
     )
     
     if args.consolidate:
         processor.consolidate_batches()
+
+    if args.rebuild_main:
+        processor.rebuild_main_output()
+    elif args.merge:
+        processor.merge_batches_to_main()
     
     if args.cleanup:
         processor.cleanup_batches()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Browser Worker Pool for ESP Product Scraper
+
+Runs the Selenium detail scrape across several Chrome instances. Every
+worker owns its own driver, all of them share the login cookies of the
+main session, and they pull product links from one common queue.
+
+Requests from all workers draw from a single ``RateBudget`` so adding
+browsers never raises the load on ESP beyond the configured rate. The
+number of browsers is capped by CPU count and, when ``psutil`` is
+installed, by the memory currently available on the runner.
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+import collections
+from typing import Any, Callable, Iterable, List, Optional
+
+try:
+    import psutil
+
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    psutil = None
+    PSUTIL_AVAILABLE = False
+
+
+# Rough resident size of one Chrome instance with a product page loaded
+DEFAULT_WORKER_MEMORY_MB = 600
+
+# Memory left free for the OS, the Python process and the login browser
+DEFAULT_RESERVED_MEMORY_MB = 1024
+
+
+class RateBudget:
+    """Thread-safe sliding-window request budget shared by all workers"""
+
+    def __init__(self, max_per_minute: int = 25, min_delay: float = 1.5):
+        self.max_per_minute = max_per_minute
+        self.min_delay = min_delay
+        self._request_times = collections.deque()
+        self._lock = threading.Lock()
+
+    def _wait_time(self, now: float) -> float:
+        """Seconds until the next request fits the budget (lock held)"""
+        while self._request_times and now - self._request_times[0] > 60:
+            self._request_times.popleft()
+
+        wait = 0.0
+        if len(self._request_times) >= self.max_per_minute:
+            wait = 60 - (now - self._request_times[0])
+        if self._request_times:
+            wait = max(wait, self.min_delay - (now - self._request_times[-1]))
+        return wait
+
+    def acquire(self):
+        """Block until a request may be made and record it"""
+        while True:
+            with self._lock:
+                now = time.time()
+                wait = self._wait_time(now)
+                if wait <= 0:
+                    self._request_times.append(now)
+                    return
+            # Sleep outside the lock; another worker may take the slot first
+            time.sleep(wait)
+
+
+def recommended_worker_count(
+    requested: int = 0,
+    worker_memory_mb: int = DEFAULT_WORKER_MEMORY_MB,
+    reserved_memory_mb: int = DEFAULT_RESERVED_MEMORY_MB,
+) -> int:
+    """Number of browsers this machine can run (requested=0 means as many as fit)"""
+    cpu_limit = os.cpu_count() or 1
+    limit = cpu_limit
+
+    if PSUTIL_AVAILABLE:
+        available_mb = psutil.virtual_memory().available / (1024 * 1024)
+        memory_limit = int((available_mb - reserved_memory_mb) // worker_memory_mb)
+        limit = min(limit, memory_limit)
+        logging.info(
+            f"🧮 Worker sizing: {available_mb:.0f}MB available, {cpu_limit} CPUs "
+            f"-> up to {max(1, limit)} browsers"
+        )
+    else:
+        logging.info(
+            f"🧮 psutil not installed; sizing browser workers by CPU count ({cpu_limit})"
+        )
+
+    if requested and requested > 0:
+        limit = min(limit, requested)
+    return max(1, limit)
+
+
+def driver_process_rss_mb(driver) -> Optional[float]:
+    """Resident memory (MB) of a driver's chromedriver + Chrome process tree"""
+    if not PSUTIL_AVAILABLE:
+        return None
+    try:
+        process = psutil.Process(driver.service.process.pid)
+        total = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
+    except Exception:
+        return None
+
+
+class BrowserWorkerPool:
+    """Feeds a shared queue of items to a fixed set of browser workers"""
+
+    def __init__(self, workers: List[Any], rate_budget: Optional[RateBudget] = None):
+        self.workers = workers
+        self.rate_budget = rate_budget
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Ask workers to finish their current item and exit"""
+        self._stop.set()
+
+    def _worker_loop(self, worker: Any, handler: Callable[[Any, Any], None]):
+        """Process queued items with one worker until the queue is empty"""
+        while not self._stop.is_set():
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+            try:
+                if self.rate_budget:
+                    self.rate_budget.acquire()
+                handler(worker, item)
+            except Exception as e:
+                logging.error(
+                    f"❌ {threading.current_thread().name} failed on an item: {e}"
+                )
+            finally:
+                self._queue.task_done()
+
+    def run(self, items: Iterable[Any], handler: Callable[[Any, Any], None]):
+        """Call handler(worker, item) for every item, spread over the workers"""
+        for item in items:
+            self._queue.put(item)
+
+        threads = [
+            threading.Thread(
+                target=self._worker_loop,
+                args=(worker, handler),
+                name=f"browser-worker-{number}",
+                daemon=True,
+            )
+            for number, worker in enumerate(self.workers)
+        ]
+        logging.info(
+            f"🧵 Running {self._queue.qsize()} items on {len(threads)} browser workers"
+        )
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
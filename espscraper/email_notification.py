@@ -1,5 +1,8 @@
 import json
 
+from espscraper.jsonl_io import open_jsonl
+from espscraper.product_store import materialize_product
+
 
 class EmailNotification:
     def __init__(self, jsonl_path, output_path="product_summary.txt"):
@@ -8,11 +11,12 @@ class EmailNotification:
 
     def generate_summary(self, limit=10):
         try:
-            with open(self.jsonl_path) as f:
+            with open_jsonl(self.jsonl_path, "r") as f:
                 lines = [line for line in f if line.strip()]
             # Get the last `limit` lines
             latest_lines = lines[-limit:]
-            products = [json.loads(line) for line in latest_lines]
+            # Store references ($blob records) expand to the full product
+            products = [materialize_product(json.loads(line)) for line in latest_lines]
             with open(self.output_path, "w") as out:
                 for p in products:
                     out.write(
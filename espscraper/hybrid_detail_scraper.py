@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Hybrid Product Detail Scraper
+
+Fetches every product through the fast API path first and only sends the
+residual set - products whose API fetch failed or came back incomplete -
+to a small pool of Selenium browsers. Both paths produce ``ProductData``
+records and write through the API scraper's batch processor, so the
+output schema, batches, scraped index and progress files are shared.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from dataclasses import fields, replace
+from typing import Dict, List, Optional, Tuple
+
+from espscraper.session_manager import SessionManager
+from espscraper.product_data import ProductData
+from espscraper.api_product_detail_scraper import (
+    ApiProductDetailScraper,
+    ScrapingConfig,
+)
+from espscraper.browser_pool import BrowserWorkerPool, RateBudget
+
+
+# Fields an API result must fill to skip the browser fallback
+DEFAULT_REQUIRED_FIELDS = "name,sku,pricing_info"
+
+PRODUCT_DATA_FIELDS = {field.name for field in fields(ProductData)}
+
+# Values the DOM extractor writes when a field couldn't be found
+PLACEHOLDER_VALUES = {"", "n/a", "none", "null"}
+
+
+def is_filled(value) -> bool:
+    """Check that a field holds real data rather than an empty placeholder"""
+    if isinstance(value, str):
+        return value.strip().lower() not in PLACEHOLDER_VALUES
+    if isinstance(value, dict):
+        return any(is_filled(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(is_filled(item) for item in value)
+    return bool(value)
+
+
+def _text(record: Dict, key: str) -> str:
+    """String field of a DOM record, with placeholders mapped to empty"""
+    value = record.get(key)
+    return value if is_filled(value) else ""
+
+
+def merge_product_data(base: ProductData, extra: ProductData) -> ProductData:
+    """Fill the empty fields of ``base`` from ``extra``"""
+    updates = {
+        name: getattr(extra, name)
+        for name in PRODUCT_DATA_FIELDS
+        if not is_filled(getattr(base, name)) and is_filled(getattr(extra, name))
+    }
+    return replace(base, **updates) if updates else base
+
+
+def product_data_from_page(
+    record: Dict, extraction_time: float = 0.0
+) -> Optional[ProductData]:
+    """Convert a Selenium DOM product record to ProductData; None without an ID"""
+    product_id = str(record.get("ProductID") or "")
+    if not product_id:
+        # A page that never showed its ID can't be saved or merged safely
+        return None
+
+    return ProductData(
+        product_id=product_id,
+        name=_text(record, "Name"),
+        sku=_text(record, "SKU"),
+        description=_text(record, "ShortDescription"),
+        short_description=_text(record, "ShortDescription"),
+        image_url=_text(record, "ImageURL"),
+        product_url=record.get("URL") or record.get("SourceURL", ""),
+        supplier_info=record.get("SupplierInfo") or {},
+        pricing_info={
+            "price": _text(record, "Price"),
+            "pricing_table": record.get("PricingTable") or [],
+        },
+        production_info=record.get("ProductionInfo") or {},
+        attributes={"colors": record.get("Colors") or []},
+        imprinting=record.get("Imprint") or {},
+        shipping=record.get("Shipping") or {},
+        variants=[],
+        warnings=record.get("SafetyAndCompliance") or [],
+        services=[],
+        images=record.get("VariantImages") or [],
+        virtual_samples=[],
+        raw_data=record,
+        extraction_time=extraction_time,
+        extraction_method="selenium_dom",
+        scraped_date=record.get("ScrapedDate", ""),
+        related_products=record.get("RelatedProduct") or [],
+        product_number=_text(record, "ProductNumber"),
+        product_art_url=_text(record, "ProductArtURL"),
+    )
+
+
+class HybridDetailScraper:
+    """API-first detail scraper with a Selenium pool for the residual products"""
+
+    def __init__(
+        self,
+        session_manager: SessionManager,
+        config: ScrapingConfig = None,
+        browser_workers: int = 1,
+        headless: bool = True,
+        required_fields: Optional[List[str]] = None,
+    ):
+        self.session_manager = session_manager
+        self.api_scraper = ApiProductDetailScraper(session_manager, config)
+        self.config = self.api_scraper.config
+        self.browser_workers = browser_workers
+        self.headless = headless
+        self.required_fields = required_fields or [
+            name.strip()
+            for name in os.getenv(
+                "HYBRID_REQUIRED_FIELDS", DEFAULT_REQUIRED_FIELDS
+            ).split(",")
+            if name.strip()
+        ]
+        self.stats = {
+            "api_complete": 0,
+            "api_incomplete": 0,
+            "api_failed": 0,
+            "browser_recovered": 0,
+            "browser_failed": 0,
+        }
+        self._save_lock = threading.Lock()
+
+    def is_complete(self, product: Optional[ProductData]) -> bool:
+        """Check whether a product has every required field filled"""
+        if product is None:
+            return False
+        return all(
+            is_filled(getattr(product, name, None)) for name in self.required_fields
+        )
+
+    def _count(self, key: str):
+        """Increment a routing counter (called from browser worker threads)"""
+        with self._save_lock:
+            self.stats[key] += 1
+
+    def _save_product(self, product: ProductData) -> bool:
+        """Write a product through the shared batch processor"""
+        with self._save_lock:
+            if not self.api_scraper._save_single_product(product):
+                return False
+            self.api_scraper.scraped_index.add(str(product.product_id))
+            return True
+
+    def _scrape_with_api(
+        self, product_ids: List[str]
+    ) -> List[Tuple[str, Optional[ProductData]]]:
+        """Fetch products through the API; return (id, partial result) to retry"""
+        residual = []
+        for i, product_id in enumerate(product_ids):
+            if product_id in self.api_scraper.scraped_index:
+                continue
+            self.api_scraper._update_checkpoint(product_id)
+
+            try:
+                product = self.api_scraper.scrape_product_api(product_id)
+            except Exception as e:
+                logging.error(f"❌ API error for product {product_id}: {e}")
+                product = None
+
+            if self.is_complete(product):
+                self._save_product(product)
+                self.stats["api_complete"] += 1
+            else:
+                self.stats["api_incomplete" if product else "api_failed"] += 1
+                logging.info(f"↪️ Routing product {product_id} to the browser pool")
+                residual.append((product_id, product))
+
+            self.api_scraper._update_heartbeat()
+            if (i + 1) % 10 == 0:
+                self.api_scraper._save_progress()
+
+        return residual
+
+    def _scrape_with_browsers(
+        self, residual: List[Tuple[str, Optional[ProductData]]]
+    ):
+        """Scrape the residual products with Selenium, keeping API data as backup"""
+        # Imported here so API-only runs never need Chrome or its dependencies
+        from espscraper.scrape_product_details import ProductDetailScraper
+
+        logging.info(f"🌐 Scraping {len(residual)} residual products in the browser")
+        scraper = ProductDetailScraper(
+            self.session_manager,
+            headless=self.headless,
+            workers=self.browser_workers,
+            capture_xhr=True,
+        )
+        rate_budget = RateBudget(
+            self.config.max_requests_per_minute, self.config.min_delay
+        )
+
+        def process_product(worker, item):
+            product_id, api_product = item
+            start = time.time()
+            record = worker.scrape_product_with_recovery(
+                worker.build_product_url(product_id), product_id
+            )
+            product = None
+            if record:
+                try:
+                    # XHR pages keep the full API extraction behind the record
+                    product = worker.last_product_data or product_data_from_page(
+                        record, time.time() - start
+                    )
+                    worker.maybe_recycle_driver()
+                except Exception as e:
+                    logging.error(f"❌ Could not convert product {product_id}: {e}")
+
+            if api_product is not None:
+                # API fields win; the browser only fills what the API left empty
+                product = (
+                    merge_product_data(api_product, product) if product else api_product
+                )
+
+            if self.is_complete(product):
+                self._save_product(product)
+                self._count("browser_recovered")
+                return
+
+            self._count("browser_failed")
+            if api_product is not None or (
+                product is not None and is_filled(product.name)
+            ):
+                # An incomplete record beats no record at all
+                self._save_product(product)
+                logging.warning(
+                    f"⚠️ Browser could not complete product {product_id}, kept partial data"
+                )
+            else:
+                logging.error(f"❌ Product {product_id} failed on both API and browser")
+                # Leave it for retry_failed_products on the next run
+                self.api_scraper._log_failed_product(product_id)
+
+        workers = []
+        try:
+            scraper.login()
+            workers = scraper._start_browser_workers()
+            BrowserWorkerPool(workers, rate_budget).run(residual, process_product)
+        finally:
+            scraper._stop_browser_workers(workers)
+            scraper.cleanup()
+
+    def scrape_all_products(self, mode: str = "scrape", limit: int = None):
+        """Scrape products API-first, then run the browser pool on what's left"""
+        product_ids = self.api_scraper.read_product_ids(limit)
+        product_ids = self.api_scraper._filter_products(product_ids, mode)
+        if not product_ids:
+            logging.info("ℹ️ No products to scrape after filtering")
+            return
+
+        logging.info(f"🚀 Hybrid scraping of {len(product_ids)} products")
+        try:
+            residual = self._scrape_with_api(product_ids)
+            if residual:
+                self._scrape_with_browsers(residual)
+        finally:
+            self.api_scraper._finalize_batches()
+            self.api_scraper._save_progress()
+            self.api_scraper.stats.update(
+                {f"hybrid_{key}": value for key, value in self.stats.items()}
+            )
+            self.api_scraper._save_stats()
+            self.api_scraper.response_archive.close()
+
+        logging.info(
+            f"✅ Hybrid scrape done: {self.stats['api_complete']} via API, "
+            f"{self.stats['browser_recovered']} recovered in the browser, "
+            f"{self.stats['browser_failed']} unresolved"
+        )
+
+
+def main():
+    """Main function for standalone execution"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Hybrid API/Selenium Detail Scraper")
+    parser.add_argument(
+        "--mode",
+        choices=["scrape", "new", "missing"],
+        default="scrape",
+        help="Scraping mode",
+    )
+    parser.add_argument("--limit", type=int, help="Limit number of products to scrape")
+    parser.add_argument("--config", type=str, help="Path to config file")
+    parser.add_argument(
+        "--browser-workers",
+        type=int,
+        default=int(os.getenv("SCRAPER_WORKERS", "1")),
+        help="Browsers for the fallback pool (0 = size from available CPU and memory)",
+    )
+    parser.add_argument("--headful", action="store_true", help="Show the browsers")
+    args = parser.parse_args()
+
+    config = ScrapingConfig()
+    if args.config and os.path.exists(args.config):
+        with open(args.config, "r") as f:
+            for key, value in json.load(f).items():
+                if hasattr(config, key):
+                    setattr(config, key, value)
+
+    scraper = HybridDetailScraper(
+        SessionManager(),
+        config,
+        browser_workers=args.browser_workers,
+        headless=not args.headful,
+    )
+    scraper.scrape_all_products(args.mode, args.limit)
+
+
+if __name__ == "__main__":
+    main()
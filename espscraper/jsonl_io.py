@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Compressed JSONL I/O for ESP Product Scraper
+
+Opens plain (``.jsonl``), gzip (``.jsonl.gz``) and zstd (``.jsonl.zst``)
+JSONL files through one interface so every reader works on all three.
+The codec is picked from the file suffix unless given explicitly.
+
+Both compressed formats are framed: appending to an existing file adds a
+new gzip member / zstd frame, and readers decode across all of them.
+zstd support needs the optional ``zstandard`` package.
+"""
+
+import io
+import os
+import gzip
+import zlib
+from typing import Optional
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+
+# Raised when reading a compressed file cut short (e.g. by a crash mid-write)
+TRUNCATED_STREAM_ERRORS = (EOFError, zlib.error) + (
+    (zstandard.ZstdError,) if ZSTD_AVAILABLE else ()
+)
+
+COMPRESSION_SUFFIXES = {None: ".jsonl", "gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+
+# Longest first so ".jsonl.gz" isn't mistaken for ".jsonl"
+JSONL_SUFFIXES = (".jsonl.gz", ".jsonl.zst", ".jsonl")
+
+_COMPRESSION_ALIASES = {
+    None: None,
+    "": None,
+    "none": None,
+    "gz": "gzip",
+    "gzip": "gzip",
+    "zst": "zstd",
+    "zstd": "zstd",
+}
+
+DEFAULT_LEVELS = {"gzip": 6, "zstd": 3}
+
+
+def normalize_compression(compression: Optional[str]) -> Optional[str]:
+    """Map a compression name (gz/gzip/zst/zstd/none) to gzip, zstd or None"""
+    key = compression.lower() if isinstance(compression, str) else compression
+    if key not in _COMPRESSION_ALIASES:
+        raise ValueError(
+            f"Unknown JSONL compression '{compression}' (use gzip, zstd or none)"
+        )
+    return _COMPRESSION_ALIASES[key]
+
+
+def jsonl_suffix(compression: Optional[str] = None) -> str:
+    """Return the file suffix for a compression"""
+    return COMPRESSION_SUFFIXES[normalize_compression(compression)]
+
+
+def is_jsonl_file(filename: str) -> bool:
+    """Check whether a filename is a plain or compressed JSONL file"""
+    return filename.endswith(JSONL_SUFFIXES)
+
+
+def strip_jsonl_suffix(path: str) -> str:
+    """Remove a plain or compressed JSONL suffix from a path"""
+    for suffix in JSONL_SUFFIXES:
+        if path.endswith(suffix):
+            return path[: -len(suffix)]
+    return path
+
+
+def detect_compression(path: str) -> Optional[str]:
+    """Guess the compression of a file from its suffix"""
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".zst"):
+        return "zstd"
+    return None
+
+
+def open_jsonl(
+    path: str,
+    mode: str = "r",
+    compression: Optional[str] = "auto",
+    level: Optional[int] = None,
+    encoding: str = "utf-8",
+):
+    """Open a plain, gzip or zstd JSONL file
+
+    mode is one of r/w/a/x with an optional ``b`` for bytes; text mode
+    uses the given encoding. compression="auto" picks the codec from the
+    suffix; pass it explicitly for temp files (e.g. ``*.jsonl.gz.tmp``).
+    """
+    if compression == "auto":
+        compression = detect_compression(path)
+    compression = normalize_compression(compression)
+
+    binary = "b" in mode
+    base_mode = mode.replace("b", "").replace("t", "")
+
+    if compression is None:
+        if binary:
+            return open(path, base_mode + "b")
+        return open(path, base_mode, encoding=encoding)
+
+    if level is None:
+        level = DEFAULT_LEVELS[compression]
+
+    if compression == "gzip":
+        if binary:
+            return gzip.open(path, base_mode + "b", compresslevel=level)
+        return gzip.open(path, base_mode + "t", compresslevel=level, encoding=encoding)
+
+    if not ZSTD_AVAILABLE:
+        raise ImportError(
+            f"zstandard is required for {os.path.basename(path)} "
+            "(pip install zstandard)"
+        )
+
+    raw = open(path, base_mode + "b")
+    try:
+        if base_mode == "r":
+            # BufferedReader adds readline/iteration; frames from appends are
+            # read back to back
+            stream = io.BufferedReader(
+                zstandard.ZstdDecompressor().stream_reader(
+                    raw, read_across_frames=True, closefd=True
+                )
+            )
+        else:
+            stream = zstandard.ZstdCompressor(level=level).stream_writer(
+                raw, closefd=True
+            )
+    except Exception:
+        raw.close()
+        raise
+
+    if binary:
+        return stream
+    return io.TextIOWrapper(stream, encoding=encoding)
+
+
+def sync_file(f):
+    """Flush a (possibly compressed) file object and fsync it to disk"""
+    f.flush()
+    os.fsync(f.fileno())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Scrape Metrics for ESP Product Scraper
+
+Per-phase latency histograms and HTTP status counters, exported as plain
+JSON so production runs can be analysed without parsing log timestamps.
+
+Histograms use HDR-style log-linear buckets: every power-of-two range is
+split into a fixed number of linear sub-buckets, so reported percentiles
+stay within ~3% of the true value (16 sub-buckets per octave by default).
+"""
+
+import time
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+
+class LatencyHistogram:
+    """Sparse log-linear latency histogram with microsecond resolution"""
+
+    def __init__(self, sub_bucket_bits: int = 5):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.buckets = Counter()  # bucket lower bound (us) -> count
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = 0
+
+    def _bucket_bounds(self, value_us: int):
+        """Return (lower, upper) bounds of the bucket holding value_us"""
+        shift = max(0, value_us.bit_length() - self.sub_bucket_bits)
+        lower = (value_us >> shift) << shift
+        return lower, lower + (1 << shift) - 1
+
+    def record(self, seconds: float):
+        """Record one latency sample given in seconds"""
+        value_us = max(0, int(seconds * 1_000_000))
+        lower, _ = self._bucket_bounds(value_us)
+        self.buckets[lower] += 1
+        self.count += 1
+        self.total_us += value_us
+        self.max_us = max(self.max_us, value_us)
+        self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
+
+    def percentile(self, pct: float) -> float:
+        """Return the latency (ms) at the given percentile"""
+        if not self.count:
+            return 0.0
+
+        target = max(1, int(round(self.count * pct / 100.0)))
+        seen = 0
+        for lower in sorted(self.buckets):
+            seen += self.buckets[lower]
+            if seen >= target:
+                _, upper = self._bucket_bounds(lower)
+                # Report the bucket midpoint, clamped to the observed maximum
+                return min((lower + upper) / 2.0, self.max_us) / 1000.0
+        return self.max_us / 1000.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Machine-readable summary with raw buckets for later merging"""
+        return {
+            "count": self.count,
+            "min_ms": (self.min_us or 0) / 1000.0,
+            "mean_ms": (self.total_us / self.count / 1000.0) if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "p999_ms": self.percentile(99.9),
+            "max_ms": self.max_us / 1000.0,
+            "total_s": self.total_us / 1_000_000.0,
+            "buckets_us": {str(k): v for k, v in sorted(self.buckets.items())},
+        }
+
+
+class ScrapeMetrics:
+    """Thread-safe collection of phase histograms and status counters"""
+
+    def __init__(self):
+        self.histograms = defaultdict(LatencyHistogram)
+        self.status_counts = defaultdict(Counter)  # endpoint -> status -> count
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, seconds: float):
+        """Record a latency sample for a phase"""
+        with self._lock:
+            self.histograms[phase].record(seconds)
+
+    @contextmanager
+    def time_phase(self, phase: str):
+        """Context manager timing the enclosed block as one phase sample"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start)
+
+    def count_status(self, status, endpoint: str = "product"):
+        """Count an HTTP status code (or error class such as 'timeout')"""
+        with self._lock:
+            self.status_counts[endpoint][str(status)] += 1
+
+    def get_phase(self, phase: str) -> Optional[LatencyHistogram]:
+        """Return the histogram for a phase if any samples were recorded"""
+        return self.histograms.get(phase)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Snapshot of all metrics as plain JSON-serializable data"""
+        with self._lock:
+            return {
+                "uptime_s": time.time() - self.started_at,
+                "phases": {
+                    phase: histogram.to_dict()
+                    for phase, histogram in sorted(self.histograms.items())
+                },
+                "http_status": {
+                    endpoint: dict(sorted(counts.items()))
+                    for endpoint, counts in sorted(self.status_counts.items())
+                },
+            }
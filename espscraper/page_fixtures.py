@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Product Page Fixtures for ESP Product Scraper
+
+Records the raw page snapshots taken by ``ProductDetailScraper`` (the HTML
+plus the Angular/JS data blobs) during real runs, one gzip file per
+product, and replays them offline through the Selenium extraction code.
+
+Replay runs against a stub driver, so no browser or login is needed. The
+benchmark reports time and peak allocations per extractor so parser
+changes can be measured locally:
+
+    python -m espscraper.page_fixtures fixtures/ --repeat 5 --memory
+"""
+
+import os
+import re
+import json
+import gzip
+import glob
+import time
+import logging
+import threading
+import tracemalloc
+import collections
+from typing import Any, Dict, List, Optional
+
+
+# Extraction methods timed by the benchmark; nested calls count inclusively
+BENCHMARK_EXTRACTORS = (
+    "scrape_product_detail_page",
+    "take_page_snapshot",
+    "extract_product_from_snapshot",
+    "extract_pricing_table",
+    "extract_comprehensive_pricing",
+    "extract_pricing_from_html",
+    "parse_html_table_pricing",
+    "extract_comprehensive_imprint",
+    "extract_imprint_from_html",
+    "extract_comprehensive_production_info",
+    "extract_shipping_info",
+    "extract_safety_compliance",
+    "extract_supplier_info",
+    "extract_supplier_from_html",
+    "get_related_products",
+)
+
+
+class FixtureRecorder:
+    """Saves raw page snapshots as gzip JSON files named by product ID"""
+
+    def __init__(self, fixture_dir: str, limit: int = 200):
+        self.fixture_dir = fixture_dir
+        self.limit = limit
+        self.recorded = 0
+        self._lock = threading.Lock()
+        os.makedirs(fixture_dir, exist_ok=True)
+
+    def record(self, snapshot: Dict[str, Any]) -> Optional[str]:
+        """Write a snapshot unless the limit is reached; returns its path"""
+        with self._lock:
+            if self.limit and self.recorded >= self.limit:
+                return None
+            self.recorded += 1
+
+        match = re.search(r"productID=(\d+)", snapshot.get("url") or "")
+        name = match.group(1) if match else f"page_{int(time.time() * 1000)}"
+        path = os.path.join(self.fixture_dir, f"{name}.json.gz")
+        try:
+            with gzip.open(path, "wt", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+        except Exception as e:
+            logging.warning(f"⚠️ Could not record page fixture {path}: {e}")
+            return None
+        return path
+
+
+def load_fixtures(fixture_dir: str) -> List[Dict[str, Any]]:
+    """Load every recorded snapshot (.json.gz or .json) in a directory"""
+    fixtures = []
+    paths = sorted(
+        glob.glob(os.path.join(fixture_dir, "*.json.gz"))
+        + glob.glob(os.path.join(fixture_dir, "*.json"))
+    )
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        try:
+            with opener(path, "rt", encoding="utf-8") as f:
+                fixtures.append(json.load(f))
+        except Exception as e:
+            logging.warning(f"⚠️ Skipping unreadable fixture {path}: {e}")
+    return fixtures
+
+
+class StubDriver:
+    """Minimal WebDriver stand-in that serves one recorded snapshot"""
+
+    def __init__(self, snapshot: Optional[Dict[str, Any]] = None):
+        self.snapshot = snapshot or {}
+
+    @property
+    def current_url(self) -> str:
+        return self.snapshot.get("url", "")
+
+    def execute_script(self, script, *args):
+        # The scraper decodes the result in place, so hand out a copy
+        return dict(self.snapshot)
+
+    def execute_async_script(self, script, *args):
+        return "ready"
+
+    def quit(self):
+        pass
+
+
+class ExtractorProfiler:
+    """Wraps scraper methods to collect per-extractor time and peak memory"""
+
+    def __init__(self, scraper, names=BENCHMARK_EXTRACTORS, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.calls = collections.Counter()
+        self.seconds = collections.defaultdict(float)
+        self.peak_bytes = collections.defaultdict(int)
+        self._frames = []  # [start_bytes, peak_bytes] of each active call
+        for name in names:
+            setattr(scraper, name, self._wrap(name, getattr(scraper, name)))
+
+    def _wrap(self, name, method):
+        def wrapper(*args, **kwargs):
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                if self._frames:
+                    # Keep the caller's peak before the child resets it
+                    self._frames[-1][1] = max(self._frames[-1][1], peak)
+                tracemalloc.reset_peak()
+                self._frames.append([current, current])
+
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.seconds[name] += time.perf_counter() - start
+                self.calls[name] += 1
+                if self.trace_memory:
+                    start_bytes, peak = self._frames.pop()
+                    peak = max(peak, tracemalloc.get_traced_memory()[1])
+                    self.peak_bytes[name] = max(
+                        self.peak_bytes[name], peak - start_bytes
+                    )
+                    if self._frames:
+                        self._frames[-1][1] = max(self._frames[-1][1], peak)
+
+        return wrapper
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Rows sorted by total time, slowest first"""
+        rows = []
+        for name, calls in self.calls.items():
+            row = {
+                "extractor": name,
+                "calls": calls,
+                "total_ms": self.seconds[name] * 1000,
+                "mean_ms": self.seconds[name] * 1000 / calls,
+            }
+            if self.trace_memory:
+                row["peak_kib"] = self.peak_bytes[name] / 1024
+            rows.append(row)
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+
+def replay_scraper(session_manager=None):
+    """A ProductDetailScraper on a stub driver with network lookups disabled"""
+    from espscraper.scrape_product_details import ProductDetailScraper
+
+    scraper = ProductDetailScraper(session_manager, driver=StubDriver())
+    # Related products come from the recorded HTML instead of the live API
+    scraper.get_related_products = (
+        lambda product_id, soup=None: scraper._related_products_from_html(soup)
+    )
+    return scraper
+
+
+def run_benchmark(
+    fixtures: List[Dict[str, Any]], repeat: int = 3, trace_memory: bool = False
+) -> Dict[str, Any]:
+    """Replay fixtures through the extraction code and profile each extractor"""
+    scraper = replay_scraper()
+    timing = ExtractorProfiler(scraper)
+
+    failures = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for snapshot in fixtures:
+            scraper.driver.snapshot = snapshot
+            if not scraper.scrape_product_detail_page():
+                failures += 1
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "fixtures": len(fixtures),
+        "repeat": repeat,
+        "pages_per_second": (len(fixtures) * repeat) / elapsed if elapsed else 0,
+        "failures": failures,
+        "extractors": timing.report(),
+    }
+
+    if trace_memory:
+        # Separate pass: tracing allocations distorts the timings
+        scraper = replay_scraper()
+        memory = ExtractorProfiler(scraper, trace_memory=True)
+        tracemalloc.start()
+        try:
+            for snapshot in fixtures:
+                scraper.driver.snapshot = snapshot
+                scraper.scrape_product_detail_page()
+        finally:
+            tracemalloc.stop()
+        peaks = {row["extractor"]: row["peak_kib"] for row in memory.report()}
+        for row in result["extractors"]:
+            row["peak_kib"] = peaks.get(row["extractor"], 0.0)
+
+    return result
+
+
+def print_report(result: Dict[str, Any]):
+    """Print a benchmark result as a table"""
+    print(
+        f"📊 {result['fixtures']} fixtures x {result['repeat']}: "
+        f"{result['pages_per_second']:.1f} pages/s, {result['failures']} failed"
+    )
+    has_memory = any("peak_kib" in row for row in result["extractors"])
+    header = f"{'extractor':<40}{'calls':>8}{'total ms':>12}{'mean ms':>10}"
+    print(header + (f"{'peak KiB':>12}" if has_memory else ""))
+    for row in result["extractors"]:
+        line = (
+            f"{row['extractor']:<40}{row['calls']:>8}"
+            f"{row['total_ms']:>12.1f}{row['mean_ms']:>10.2f}"
+        )
+        if has_memory:
+            line += f"{row.get('peak_kib', 0.0):>12.1f}"
+        print(line)
+
+
+def main():
+    """Benchmark the Selenium extraction code on recorded page fixtures"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Replay recorded product pages through the extraction code"
+    )
+    parser.add_argument(
+        "fixture_dir",
+        nargs="?",
+        default=os.getenv("SCRAPER_FIXTURE_DIR", "page_fixtures"),
+        help="Directory of recorded snapshots",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timing passes")
+    parser.add_argument(
+        "--memory", action="store_true", help="Also measure peak allocations"
+    )
+    parser.add_argument("--json", type=str, help="Write the result to a JSON file")
+    args = parser.parse_args()
+    # Per-page progress logging from the scraper would drown the report
+    logging.getLogger().setLevel(logging.WARNING)
+
+    fixtures = load_fixtures(args.fixture_dir)
+    if not fixtures:
+        print(f"❌ No fixtures found in {args.fixture_dir}")
+        return
+
+    result = run_benchmark(fixtures, repeat=args.repeat, trace_memory=args.memory)
+    print_report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Product Extraction for ESP Product Scraper
+
+Turns a raw ESP product API response (and its suggestions response) into
+``ProductData``. Shared by the API scraper and by the Selenium scraper when
+it captures the same JSON from the page's XHRs, so both produce identical
+records.
+"""
+
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from espscraper.product_data import ProductData
+
+
+class ApiProductExtractor:
+    """Builds ProductData from raw ESP product API responses"""
+
+    def _parse_related_products(self, data: Optional[Dict]) -> List[Dict]:
+        """Build related product entries from a raw suggestions response"""
+        if not data:
+            return []
+
+        related = []
+        for item in data.get("Results", []):
+            pid = item.get("Id")
+            name = item.get("Name")
+            image = item.get("ImageUrl")
+
+            # Build proper image URL
+            if image and not image.startswith("http"):
+                image = f"https://api.asicentral.com/v1/{image.lstrip('/')}"
+
+            # Build product URL
+            url = self._build_product_url(pid) if pid else ""
+
+            related.append(
+                {
+                    "id": pid,
+                    "name": name,
+                    "image_url": image,
+                    "product_url": url,
+                }
+            )
+
+        return related
+
+    def _build_product_url(self, product_id: str) -> str:
+        """Build product URL for WordPress import"""
+        return f"https://espweb.asicentral.com/Default.aspx?appCode=WESP&appVersion=4.1.0&page=ProductDetails&productID={product_id}&autoLaunchVS=0&tab=list"
+
+    def _build_image_url(self, image_path: str) -> str:
+        """Build proper image URL for WordPress import"""
+        if not image_path:
+            return ""
+
+        if image_path.startswith("http"):
+            return image_path
+
+        # Remove leading slash and build full URL
+        clean_path = image_path.lstrip("/")
+        return f"https://api.asicentral.com/v1/{clean_path}"
+
+    def _slugify(self, value: str) -> str:
+        """Slugify a string for use in URLs"""
+        value = value.lower()
+        value = re.sub(r"[^a-z0-9]+", "-", value)
+        value = re.sub(r"-+", "-", value)
+        return value.strip("-")
+
+    def _extract_product_data(
+        self,
+        data: Dict,
+        product_id: str,
+        extraction_time: float,
+        related_products: List[Dict] = None,
+        extraction_method: str = "api",
+    ) -> ProductData:
+        """Extract structured product data from API response with enhanced image handling and custom fields"""
+        # Build proper image URLs
+        main_image_url = self._build_image_url(data.get("ImageUrl", ""))
+
+        # ProductURL: from link file if present, else construct
+        product_url = data.get("ProductUrl")
+        if not product_url:
+            product_url = f"https://espweb.asicentral.com/Default.aspx?appCode=WESP&appVersion=4.1.0&page=ProductDetails&referrerPage=ProductResults&referrerModule=PRDRES&refModSufx=Generic&PCUrl=1&productID={product_id}&autoLaunchVS=0&tab=list"
+
+        # ProductNumber: from numbers key (use first if list)
+        numbers = data.get("numbers") or data.get("Numbers")
+        product_number = ""
+        if numbers:
+            if isinstance(numbers, list):
+                product_number = str(numbers[0]) if numbers else ""
+            else:
+                product_number = str(numbers)
+
+        # VendorProductURL
+        name = data.get("Name", "product")
+        slug = self._slugify(name)
+        vendor_product_url = (
+            f"https://www.hitpromo.net/product/show/{product_number}/{slug}"
+            if product_number
+            else ""
+        )
+
+        # ProductArtURL
+        product_art_url = (
+            f"https://www.hitpromo.net/fs/artTemplates/{product_number}/{product_number}.pdf"
+            if product_number
+            else ""
+        )
+
+        # Process variants with proper image URLs
+        variants = data.get("Variants", [])
+        processed_variants = []
+        for variant in variants:
+            processed_variant = variant.copy()
+            processed_variant["image_url"] = self._build_image_url(
+                variant.get("ImageUrl", "")
+            )
+            processed_variants.append(processed_variant)
+
+        # Process images array
+        images = data.get("Images", [])
+        processed_images = []
+        for image in images:
+            if isinstance(image, dict):
+                processed_image = image.copy()
+                processed_image["url"] = self._build_image_url(
+                    image.get("url", image.get("Url", ""))
+                )
+                processed_images.append(processed_image)
+            elif isinstance(image, str):
+                processed_images.append(
+                    {"url": self._build_image_url(image), "type": "product_image"}
+                )
+
+        # Process virtual sample images
+        virtual_samples = data.get("VirtualSampleImages", [])
+        processed_virtual_samples = []
+        for sample in virtual_samples:
+            if isinstance(sample, dict):
+                processed_sample = sample.copy()
+                processed_sample["url"] = self._build_image_url(
+                    sample.get("url", sample.get("Url", ""))
+                )
+                processed_virtual_samples.append(processed_sample)
+            elif isinstance(sample, str):
+                processed_virtual_samples.append(
+                    {"url": self._build_image_url(sample), "type": "virtual_sample"}
+                )
+
+        # Compose ProductData with new fields
+        return ProductData(
+            product_id=product_id,
+            name=name,
+            sku=data.get("SKU", "N/A"),
+            description=data.get("Description", ""),
+            short_description=data.get("ShortDescription", ""),
+            image_url=main_image_url,
+            product_url=product_url,
+            supplier_info=self._extract_supplier_info(data),
+            pricing_info=self._extract_pricing_info(data),
+            production_info=self._extract_production_info(data),
+            attributes=self._extract_attributes(data),
+            imprinting=self._extract_imprinting_info(data),
+            shipping=self._extract_shipping_info(data),
+            variants=processed_variants,
+            warnings=data.get("Warnings", []),
+            services=data.get("Services", []),
+            images=processed_images,
+            virtual_samples=processed_virtual_samples,
+            related_products=related_products or [],
+            raw_data=data,
+            extraction_time=extraction_time,
+            extraction_method=extraction_method,
+            scraped_date=datetime.now().isoformat(),
+            # Custom fields (snake_case)
+            product_number=product_number,
+            vendor_product_url=vendor_product_url,
+            product_art_url=product_art_url,
+        )
+
+    def _extract_supplier_info(self, data: Dict) -> Dict:
+        """Extract supplier information"""
+        supplier = data.get("Supplier", {})
+        return {
+            "supplier_name": supplier.get("Name", ""),
+            "supplier_id": supplier.get("Id", ""),
+            "supplier_rating": supplier.get("Rating", {}).get("Rating", ""),
+            "supplier_location": supplier.get("Location", ""),
+            "asi_number": supplier.get("AsiNumber", ""),
+            "email": supplier.get("Email", ""),
+            "phone": supplier.get("Phone", {}).get("Primary", ""),
+            "websites": supplier.get("Websites", []),
+        }
+
+    def _extract_pricing_info(self, data: Dict) -> Dict:
+        """Extract pricing information"""
+        return {
+            "base_price": data.get("LowestPrice", ""),
+            "discount_price": data.get("HighestPrice", ""),
+            "bulk_pricing": data.get("Prices", []),
+            "currency": data.get("Currency", "USD"),
+        }
+
+    def _extract_production_info(self, data: Dict) -> Dict:
+        """Extract production information"""
+        return {
+            "production_time": data.get("ProductionTime", []),
+            "minimum_order": data.get("MinimumOrder", ""),
+            "maximum_order": data.get("MaximumOrder", ""),
+            "production_methods": data.get("ProductionMethods", []),
+            "origin": data.get("Origin", []),
+            "trade_names": data.get("TradeNames", []),
+        }
+
+    def _extract_attributes(self, data: Dict) -> Dict:
+        """Extract product attributes"""
+        attributes = data.get("Attributes", {})
+        return {
+            "category": data.get("Category", ""),
+            "subcategory": data.get("Subcategory", ""),
+            "tags": data.get("Tags", []),
+            "features": data.get("Features", []),
+            "colors": attributes.get("Colors", {}).get("Values", []),
+            "sizes": attributes.get("Sizes", {}).get("Values", []),
+            "materials": attributes.get("Materials", {}).get("Values", []),
+        }
+
+    def _extract_imprinting_info(self, data: Dict) -> Dict:
+        """Extract imprinting information"""
+        imprinting = data.get("Imprinting", {})
+        return {
+            "imprinting_methods": imprinting.get("Methods", {}).get("Values", []),
+            "imprinting_locations": imprinting.get("Locations", {}).get("Values", []),
+            "imprinting_colors": imprinting.get("Colors", {}).get("Values", []),
+            "setup_charges": imprinting.get("Services", {}).get("Values", []),
+        }
+
+    def _extract_shipping_info(self, data: Dict) -> Dict:
+        """Extract shipping information"""
+        shipping = data.get("Shipping", {})
+        return {
+            "shipping_methods": shipping.get("Methods", {}).get("Values", []),
+            "shipping_time": shipping.get("Time", ""),
+            "shipping_cost": shipping.get("Cost", ""),
+            "free_shipping_threshold": shipping.get("FreeThreshold", ""),
+            "weight_unit": shipping.get("WeightUnit", ""),
+            "weight_per_package": shipping.get("WeightPerPackage", ""),
+            "package_unit": shipping.get("PackageUnit", ""),
+            "items_per_package": shipping.get("ItemsPerPackage", ""),
+            "fob_points": shipping.get("FOBPoints", {}).get("Values", []),
+        }
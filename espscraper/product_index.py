@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Incremental Product Index for ESP Product Scraper
+
+Keeps ``product_index.json`` next to the detail output file, mapping each
+scraped product ID to the offset of its line and its scrape date:
+
+    {"output_file": "...", "bytes": 123456, "output_state": {...},
+     "products": {"555": {"offset": 0, "scraped_date": "..."}, ...}}
+
+The scraper calls ``add`` on every append, so start-up and retry filtering
+are lookups instead of full scans of the output file. Offsets count
+uncompressed bytes, which for plain JSONL is the position to seek to.
+
+``add`` only appends a line to ``product_index.json.log``; ``save`` compacts
+that log into the index file, so a run costs one full write at the end
+rather than one per batch of appends. Loading replays whatever log a
+crashed run left behind. The saved index records the output file's size,
+mtime, inode and a hash of its first bytes.
+If any of those changed, ``sync`` catches up by reading only the new tail
+when a plain file was merely appended to (same inode and head). Otherwise
+(compressed or rewritten output) it rebuilds the index with one full scan.
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional, Set
+
+from espscraper.jsonl_io import open_jsonl, detect_compression
+
+
+INDEX_FILENAME = "product_index.json"
+
+# Sidecar log of appends since the index file was last written
+LOG_SUFFIX = ".log"
+
+# Bytes at the start of the output hashed to detect a rewritten file
+HEAD_BYTES = 4096
+
+
+def record_product_id(record: Dict[str, Any]) -> Optional[str]:
+    """Product ID of an output record, falling back to its SourceURL"""
+    for key in ("ProductID", "product_id", "id"):
+        if record.get(key):
+            return str(record[key])
+    match = re.search(r"productID=(\d+)", record.get("SourceURL") or "")
+    return match.group(1) if match else None
+
+
+class ProductIndex:
+    """Product ID -> (line offset, scrape date) index of a JSONL output file"""
+
+    def __init__(self, output_file: str, index_file: Optional[str] = None):
+        self.output_file = output_file
+        self.index_file = index_file or os.path.join(
+            os.path.dirname(output_file), INDEX_FILENAME
+        )
+        self.log_file = self.index_file + LOG_SUFFIX
+        self.products = {}
+        self.bytes = 0  # Uncompressed bytes of the output covered by the index
+        self.output_state = {}  # Output file fingerprint at the last sync/save
+        self._log = None  # Append handle of the sidecar log, opened on first add
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def __contains__(self, product_id) -> bool:
+        return str(product_id) in self.products
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def ids(self) -> Set[str]:
+        """All indexed product IDs"""
+        return set(self.products)
+
+    def get(self, product_id) -> Optional[Dict[str, Any]]:
+        """Index entry (offset, scraped_date) for a product"""
+        return self.products.get(str(product_id))
+
+    def _output_state(self, head_bytes: int = HEAD_BYTES) -> Dict[str, Any]:
+        """Size, mtime, inode and head hash of the output file ({} if missing)"""
+        try:
+            stat = os.stat(self.output_file)
+            with open(self.output_file, "rb") as f:
+                head = f.read(min(head_bytes, stat.st_size))
+        except OSError:
+            return {}
+        return {
+            "file_size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "inode": stat.st_ino,
+            "head_bytes": len(head),
+            "head_hash": hashlib.blake2b(head, digest_size=16).hexdigest(),
+        }
+
+    def _appended_only(self, current: Dict[str, Any]) -> bool:
+        """Whether a plain output file only grew since the last sync/save"""
+        previous = self.output_state
+        return (
+            bool(previous)
+            and detect_compression(self.output_file) is None
+            and current.get("inode") == previous.get("inode")
+            and current.get("head_hash") == previous.get("head_hash")
+            and current["file_size"] > self.bytes
+        )
+
+    def _index_line(self, line: bytes, offset: int) -> Optional[str]:
+        """Add one output line at an uncompressed offset (lock held)
+
+        Returns the product ID it was indexed under, if any.
+        """
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None  # Partial line from an interrupted write
+        product_id = record_product_id(record) if isinstance(record, dict) else None
+        if product_id:
+            self.products[product_id] = {
+                "offset": offset,
+                "scraped_date": record.get("ScrapedDate")
+                or record.get("scraped_date", ""),
+            }
+        return product_id
+
+    def _scan(self, start: int = 0):
+        """Index output lines from an uncompressed offset (lock held)"""
+        offset = 0
+        with open_jsonl(self.output_file, "rb") as f:
+            if start:
+                f.seek(start)
+                offset = start
+            for line in f:
+                if line.strip():
+                    self._index_line(line, offset)
+                offset += len(line)
+        self.bytes = offset
+
+    def _load_saved(self) -> bool:
+        """Read the saved index; False if it's missing or for another file"""
+        if not os.path.exists(self.index_file):
+            return False
+        try:
+            with open(self.index_file, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            logging.warning(f"⚠️ Could not read product index: {e}")
+            return False
+        if not isinstance(data, dict) or data.get("output_file") != os.path.basename(
+            self.output_file
+        ):
+            return False
+        self.products = data.get("products", {})
+        self.bytes = data.get("bytes", 0)
+        self.output_state = data.get("output_state") or {}
+        self._replay_log()
+        return True
+
+    def _replay_log(self):
+        """Apply appends logged after the index file was last written"""
+        if not os.path.exists(self.log_file):
+            return
+        replayed = 0
+        with open(self.log_file, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # Partial line from an interrupted write
+                if entry.get("id"):
+                    self.products[entry["id"]] = {
+                        "offset": entry["offset"],
+                        "scraped_date": entry["scraped_date"],
+                    }
+                self.bytes = entry["bytes"]
+                if self.output_state:
+                    # The output's head and inode are unchanged by appends
+                    self.output_state = dict(
+                        self.output_state,
+                        file_size=entry["file_size"],
+                        mtime_ns=entry["mtime_ns"],
+                    )
+                replayed += 1
+        logging.info(f"📇 Replayed {replayed} logged appends to the product index")
+
+    def sync(self) -> "ProductIndex":
+        """Load the index and bring it up to date with the output file"""
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                if not self._load_saved():
+                    self.products, self.bytes, self.output_state = {}, 0, {}
+
+            # Hash the same head length as last time so appends compare equal
+            current = self._output_state(
+                self.output_state.get("head_bytes", HEAD_BYTES)
+            )
+            if current and current == self.output_state:
+                return self
+
+            if not current:
+                self.products, self.bytes = {}, 0
+            elif self._appended_only(current):
+                before = len(self.products)
+                self._scan(self.bytes)
+                logging.info(
+                    f"📇 Product index caught up: {len(self.products) - before} "
+                    f"new products in {self.output_file}"
+                )
+            else:
+                self.products = {}
+                self._scan()
+                logging.info(
+                    f"📇 Rebuilt product index: {len(self.products)} products "
+                    f"in {self.output_file}"
+                )
+
+            self.output_state = self._output_state()
+            self._save_locked()
+        return self
+
+    def add(self, record: Dict[str, Any], line: str):
+        """Index a record just appended (and flushed) to the output as ``line``"""
+        encoded = line.encode("utf-8")
+        with self._lock:
+            product_id = self._index_line(encoded, self.bytes)
+            self.bytes += len(encoded)
+            entry = {"id": product_id, "bytes": self.bytes}
+            if product_id:
+                entry.update(self.products[product_id])
+            try:
+                stat = os.stat(self.output_file)
+                entry.update(file_size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+                if self._log is None:
+                    self._log = open(self.log_file, "a")
+                self._log.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                self._log.flush()
+            except OSError as e:
+                logging.warning(f"⚠️ Could not log product index append: {e}")
+
+    def save(self):
+        """Compact the log into the index, recording the output's current state"""
+        with self._lock:
+            self.output_state = self._output_state()
+            self._save_locked()
+
+    def _save_locked(self):
+        """Atomically write the index file (lock held)"""
+        data = {
+            "output_file": os.path.basename(self.output_file),
+            "bytes": self.bytes,
+            "output_state": self.output_state,
+            "products": self.products,
+        }
+        temp_file = self.index_file + ".tmp"
+        try:
+            with open(temp_file, "w") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(temp_file, self.index_file)
+        except Exception as e:
+            logging.warning(f"⚠️ Could not save product index: {e}")
+            return
+
+        # Everything logged so far is now in the index file
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        if os.path.exists(self.log_file):
+            os.remove(self.log_file)
+
+    def read_product(self, product_id) -> Optional[Dict[str, Any]]:
+        """Read one product's record from the output file via its offset"""
+        entry = self.get(product_id)
+        if not entry:
+            return None
+        with open_jsonl(self.output_file, "rb") as f:
+            if detect_compression(self.output_file) is None:
+                f.seek(entry["offset"])
+            else:
+                # Compressed streams can't seek; skip ahead by uncompressed bytes
+                skipped = 0
+                while skipped < entry["offset"]:
+                    line = f.readline()
+                    if not line:
+                        return None
+                    skipped += len(line)
+            line = f.readline()
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Product Store for ESP Product Scraper
+
+Stores each distinct product payload once, as a gzip blob named after the
+hash of its content (``objects/ab/cdef....json.gz``). Batch, merged and
+enhanced JSONL files can then hold small reference records instead of
+full copies of the product:
+
+    {"product_id": "123", "$blob": "<hash>", "scraped_date": "...", ...}
+
+Per-scrape fields (scrape time, extraction time) stay in the reference so
+an unchanged product re-scraped in a later run maps to the same blob and
+costs no new bytes. ``materialize`` turns a reference back into the full
+product for upload or enhancement.
+"""
+
+import os
+import json
+import gzip
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, Optional, Iterable, Set
+
+from espscraper.jsonl_io import open_jsonl, detect_compression, sync_file
+
+
+REF_KEY = "$blob"
+
+# Fields that change on every scrape and are kept in the reference
+VOLATILE_FIELDS = ("scraped_date", "extraction_time")
+
+
+def is_product_ref(record: Dict[str, Any]) -> bool:
+    """Check whether a JSONL record is a product store reference"""
+    return isinstance(record, dict) and REF_KEY in record
+
+
+class ProductStore:
+    """Content-addressed blob store for product payloads"""
+
+    def __init__(self, store_dir: str = "product_store", compress_level: int = 6):
+        self.store_dir = store_dir
+        self.objects_dir = os.path.join(store_dir, "objects")
+        self.compress_level = compress_level
+        self.stats = {"blobs_written": 0, "blobs_reused": 0, "bytes_written": 0}
+
+        self._known = set()  # Blob keys seen by this process
+        self._lock = threading.Lock()
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    def _blob_path(self, key: str) -> str:
+        """Path of the blob file for a key"""
+        return os.path.join(self.objects_dir, key[:2], key[2:] + ".json.gz")
+
+    def put(self, payload: Dict[str, Any]) -> str:
+        """Store a product payload (if new) and return its content key"""
+        data = json.dumps(
+            payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str
+        ).encode("utf-8")
+        key = hashlib.blake2b(data, digest_size=20).hexdigest()
+
+        with self._lock:
+            if key in self._known:
+                self.stats["blobs_reused"] += 1
+                return key
+
+        path = self._blob_path(key)
+        if os.path.exists(path):
+            with self._lock:
+                self._known.add(key)
+                self.stats["blobs_reused"] += 1
+            return key
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with gzip.open(temp_path, "wb", compresslevel=self.compress_level) as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        with self._lock:
+            self._known.add(key)
+            self.stats["blobs_written"] += 1
+            self.stats["bytes_written"] += os.path.getsize(path)
+        return key
+
+    def get(self, key: str) -> Dict[str, Any]:
+        """Load a stored payload by key (raises KeyError if missing)"""
+        path = self._blob_path(key)
+        try:
+            with gzip.open(path, "rb") as f:
+                return json.loads(f.read())
+        except FileNotFoundError:
+            raise KeyError(f"Product blob {key} not found in {self.store_dir}")
+
+    def make_ref(self, product: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a product and return the reference record that replaces it"""
+        if is_product_ref(product):
+            return product
+
+        payload = {k: v for k, v in product.items() if k not in VOLATILE_FIELDS}
+        ref = {REF_KEY: self.put(payload)}
+
+        product_id = (
+            product.get("product_id") or product.get("productId") or product.get("id")
+        )
+        if product_id:
+            ref["product_id"] = str(product_id)
+        for field in VOLATILE_FIELDS:
+            if field in product:
+                ref[field] = product[field]
+        return ref
+
+    def materialize(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the full product for a reference (other records unchanged)"""
+        if not is_product_ref(record):
+            return record
+
+        product = self.get(record[REF_KEY])
+        for field in VOLATILE_FIELDS:
+            if field in record:
+                product[field] = record[field]
+        return product
+
+    def materialize_file(self, input_path: str, output_path: str) -> int:
+        """Write a copy of a JSONL file with every reference expanded"""
+        count = 0
+        temp_path = output_path + ".tmp"
+        with open_jsonl(input_path, "r") as src, open_jsonl(
+            temp_path, "w", compression=detect_compression(output_path)
+        ) as dst:
+            for line in src:
+                if not line.strip():
+                    continue
+                record = self.materialize(json.loads(line))
+                dst.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += 1
+            sync_file(dst)
+        os.replace(temp_path, output_path)
+        logging.info(f"📦 Materialized {count} products: {input_path} -> {output_path}")
+        return count
+
+    def referenced_keys(self, paths: Iterable[str]) -> Set[str]:
+        """Collect the blob keys referenced by a set of JSONL files"""
+        keys = set()
+        for path in paths:
+            with open_jsonl(path, "r") as f:
+                for line in f:
+                    if REF_KEY not in line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if is_product_ref(record):
+                        keys.add(record[REF_KEY])
+        return keys
+
+    def collect_garbage(self, live_keys: Set[str], dry_run: bool = False) -> int:
+        """Delete blobs not in live_keys; returns the number removed"""
+        removed = 0
+        for shard in os.listdir(self.objects_dir):
+            shard_dir = os.path.join(self.objects_dir, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for filename in os.listdir(shard_dir):
+                if not filename.endswith(".json.gz"):
+                    continue
+                key = shard + filename[: -len(".json.gz")]
+                if key in live_keys:
+                    continue
+                removed += 1
+                if not dry_run:
+                    os.remove(os.path.join(shard_dir, filename))
+                    self._known.discard(key)
+
+        action = "Would remove" if dry_run else "Removed"
+        logging.info(f"🧹 {action} {removed} unreferenced product blobs")
+        return removed
+
+
+_default_store = None
+
+
+def get_default_store() -> ProductStore:
+    """Shared store at PRODUCT_STORE_DIR (default: product_store)"""
+    global _default_store
+    if _default_store is None:
+        _default_store = ProductStore(os.getenv("PRODUCT_STORE_DIR", "product_store"))
+    return _default_store
+
+
+def materialize_product(
+    record: Dict[str, Any], store: Optional[ProductStore] = None
+) -> Dict[str, Any]:
+    """Expand a reference record using the given or default store"""
+    if not is_product_ref(record):
+        return record
+    return (store or get_default_store()).materialize(record)
+
+
+def main():
+    """Materialize reference files or garbage-collect the store"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Content-addressed product store")
+    parser.add_argument(
+        "--store-dir",
+        default=os.getenv("PRODUCT_STORE_DIR", "product_store"),
+        help="Product store directory",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    materialize_parser = subparsers.add_parser(
+        "materialize", help="Expand references in a JSONL file"
+    )
+    materialize_parser.add_argument("input", help="JSONL file with references")
+    materialize_parser.add_argument("output", help="Output JSONL file")
+
+    gc_parser = subparsers.add_parser(
+        "gc", help="Remove blobs not referenced by the given JSONL files"
+    )
+    gc_parser.add_argument("files", nargs="+", help="JSONL files to keep blobs for")
+    gc_parser.add_argument("--dry-run", action="store_true", help="Only count")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+
+    store = ProductStore(args.store_dir)
+    if args.command == "materialize":
+        store.materialize_file(args.input, args.output)
+    elif args.command == "gc":
+        store.collect_garbage(store.referenced_keys(args.files), dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
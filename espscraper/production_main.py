@@ -25,6 +25,7 @@ from espscraper.api_product_detail_scraper import (
     ApiProductDetailScraper,
     ScrapingConfig,
 )
+from espscraper.hybrid_detail_scraper import HybridDetailScraper
 
 
 def setup_logging(log_file=None, log_level="INFO"):
@@ -193,7 +194,14 @@ def process_products_phase(logger, session_manager, args):
         )
 
         # Initialize product detail scraper
-        detail_scraper = ApiProductDetailScraper(session_manager, detail_config)
+        if args.hybrid:
+            detail_scraper = HybridDetailScraper(
+                session_manager,
+                detail_config,
+                browser_workers=args.browser_workers,
+            )
+        else:
+            detail_scraper = ApiProductDetailScraper(session_manager, detail_config)
 
         # Process products with specified parameters
         logger.info(
@@ -332,6 +340,17 @@ def main():
     parser.add_argument(
         "--product-limit", type=int, help="Limit number of products to process"
     )
+    parser.add_argument(
+        "--hybrid",
+        action="store_true",
+        help="Fall back to Selenium browsers for products the API fails or leaves incomplete",
+    )
+    parser.add_argument(
+        "--browser-workers",
+        type=int,
+        default=int(os.getenv("SCRAPER_WORKERS", "1")),
+        help="Browsers for the hybrid fallback pool (0 = size from CPU and memory)",
+    )
 
     # Configuration arguments
     parser.add_argument(
@@ -375,6 +394,7 @@ def main():
             f"📊 Link collection: {'forced' if args.force_link_collection else 'conditional'}"
         )
         print(f"📊 Product mode: {args.mode}")
+        print(f"📊 Hybrid browser fallback: {'on' if args.hybrid else 'off'}")
         print("✅ Configuration test completed successfully")
         return
 
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Raw API Response Archive for ESP Product Scraper
+
+Stores the raw product and suggestion responses returned by the ESP API in
+compressed, append-only segment files so products can be re-extracted
+offline when the extraction logic changes.
+
+Each run writes its own gzip segment (``raw_<timestamp>_<pid>.jsonl.gz``);
+existing segments are never rewritten. Every line is one record keyed by
+product ID and fetch time.
+"""
+
+import os
+import json
+import gzip
+import zlib
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, Iterator, Optional, List
+
+
+class ResponseArchive:
+    """Append-only, gzip-compressed archive of raw API responses"""
+
+    SEGMENT_PREFIX = "raw_"
+    SEGMENT_SUFFIX = ".jsonl.gz"
+
+    def __init__(self, archive_dir: str, compress_level: int = 6):
+        self.archive_dir = archive_dir
+        self.compress_level = compress_level
+        self.segment_path = None
+        self.records_written = 0
+
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _open_segment(self):
+        """Open a new segment file for this run"""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"{self.SEGMENT_PREFIX}{timestamp}_{os.getpid()}{self.SEGMENT_SUFFIX}"
+        self.segment_path = os.path.join(self.archive_dir, filename)
+        self._file = gzip.open(
+            self.segment_path, "ab", compresslevel=self.compress_level
+        )
+        logging.info(f"🗄️ Archiving raw API responses to {self.segment_path}")
+
+    def append(
+        self,
+        product_id: str,
+        product_response: Dict[str, Any],
+        suggestions_response: Optional[Dict[str, Any]] = None,
+        fetched_at: Optional[str] = None,
+    ) -> bool:
+        """Append one raw product/suggestions response pair to the archive"""
+        record = {
+            "product_id": str(product_id),
+            "fetched_at": fetched_at or datetime.now().isoformat(),
+            "product": product_response,
+            "suggestions": suggestions_response,
+        }
+
+        try:
+            line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+            with self._lock:
+                if self._file is None:
+                    self._open_segment()
+                self._file.write(line.encode("utf-8"))
+                # Sync flush keeps every completed record readable even if the
+                # process dies before the gzip trailer is written
+                self._file.flush(zlib.Z_SYNC_FLUSH)
+                self.records_written += 1
+            return True
+
+        except Exception as e:
+            logging.warning(f"⚠️ Could not archive raw response for {product_id}: {e}")
+            return False
+
+    def close(self):
+        """Close the current segment, writing the gzip trailer"""
+        with self._lock:
+            if self._file is not None:
+                try:
+                    self._file.close()
+                    logging.info(
+                        f"🗄️ Closed raw archive segment {os.path.basename(self.segment_path)} "
+                        f"({self.records_written} records)"
+                    )
+                except Exception as e:
+                    logging.warning(f"⚠️ Error closing raw archive segment: {e}")
+                finally:
+                    self._file = None
+
+    def list_segments(self) -> List[str]:
+        """Return archive segment paths, oldest first"""
+        if not os.path.exists(self.archive_dir):
+            return []
+
+        segments = [
+            os.path.join(self.archive_dir, filename)
+            for filename in os.listdir(self.archive_dir)
+            if filename.startswith(self.SEGMENT_PREFIX)
+            and filename.endswith(self.SEGMENT_SUFFIX)
+        ]
+        segments.sort()
+        return segments
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over every archived record in fetch order"""
+        for segment_path in self.list_segments():
+            filename = os.path.basename(segment_path)
+            line_num = 0
+            try:
+                with gzip.open(segment_path, "rt", encoding="utf-8") as f:
+                    for line in f:
+                        line_num += 1
+                        if not line.strip():
+                            continue
+                        try:
+                            yield json.loads(line)
+                        except json.JSONDecodeError:
+                            logging.warning(
+                                f"⚠️ Invalid JSON in {filename} line {line_num}"
+                            )
+                            continue
+            except (EOFError, zlib.error):
+                # Segment of an interrupted run: everything up to the last
+                # sync flush has already been yielded
+                logging.info(
+                    f"ℹ️ {filename} is truncated after {line_num} records (interrupted run)"
+                )
+            except Exception as e:
+                logging.warning(f"⚠️ Error reading archive segment {filename}: {e}")
+
+    def load_latest(self) -> Dict[str, Dict[str, Any]]:
+        """Return the most recently fetched record for each product ID"""
+        latest = {}
+        for record in self.iter_records():
+            product_id = record.get("product_id")
+            if not product_id or not record.get("product"):
+                continue
+            existing = latest.get(product_id)
+            if existing is None or record.get("fetched_at", "") >= existing.get(
+                "fetched_at", ""
+            ):
+                latest[product_id] = record
+
+        logging.info(f"🗄️ Loaded {len(latest)} archived products from {self.archive_dir}")
+        return latest
@@ -1,11 +1,23 @@
 from espscraper.base_scraper import BaseScraper
 from espscraper.session_manager import SessionManager
+from espscraper.jsonl_io import open_jsonl
+from espscraper.product_store import ProductStore
+from espscraper.product_extraction import ApiProductExtractor
+from espscraper.page_fixtures import FixtureRecorder
+from espscraper.product_index import ProductIndex
+from espscraper.browser_pool import (
+    BrowserWorkerPool,
+    RateBudget,
+    driver_process_rss_mb,
+    recommended_worker_count,
+)
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from bs4 import BeautifulSoup
+import soupsieve
 import time
 import json
 from selenium.webdriver.common.action_chains import ActionChains
@@ -14,17 +26,652 @@ from selenium.webdriver.support import expected_conditions as EC
 import os
 import re
 from selenium.webdriver.common.keys import Keys
+from selenium.common.exceptions import (
+    InvalidSessionIdException,
+    NoSuchWindowException,
+    TimeoutException,
+)
 import argparse
+import base64
 import urllib.parse
 import random
+import shutil
 
 import requests
 import collections
+import copy
 import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from lxml import html, etree
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
+# URL patterns blocked through CDP, by resource category. The product data
+# comes from the HTML and XHRs, so none of these are needed for scraping.
+BLOCKED_RESOURCE_PATTERNS = {
+    "images": [
+        "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp",
+    ],
+    "fonts": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+    "media": ["*.mp4", "*.webm", "*.mp3", "*.wav", "*.ogg"],
+    "analytics": [
+        "*google-analytics.com*",
+        "*googletagmanager.com*",
+        "*doubleclick.net*",
+        "*connect.facebook.net*",
+        "*hotjar.com*",
+        "*nr-data.net*",
+        "*js-agent.newrelic.com*",
+        "*clarity.ms*",
+        "*intercom.io*",
+        "*zendesk.com*",
+    ],
+    # Off by default: ng-cloak/ng-hide rely on CSS, but the scraper reads the DOM
+    "stylesheets": ["*.css"],
+}
+
+DEFAULT_BLOCKED_RESOURCES = "images,fonts,media,analytics"
+
+PAGE_LOAD_STRATEGIES = ("normal", "eager", "none")
+
+# Explicit readiness condition; with the eager/none strategies driver.get
+# returns before the page has finished loading
+PAGE_READY_SCRIPT = """
+    return document.readyState !== 'loading'
+        && !!document.querySelector('#productDetailsMain');
+"""
+
+# XHRs the product page makes to the ESP API ({product_id} is substituted);
+# SCRAPER_PRODUCT_XHR_PATTERN overrides the product pattern
+PRODUCT_XHR_PATTERN = r"/products/{product_id}(?:\.json)?(?:\?|$)"
+SUGGESTIONS_XHR_PATTERN = r"/products/{product_id}/suggestions"
+
+# Async script resolving once ProductDetailCtrl has vm.product and Angular
+# has no outstanding $http requests, or when the timeout (ms) runs out.
+# Re-checks on DOM mutations under #productDetailsMain plus a light poll,
+# since a scope change without a re-render produces no mutation.
+ANGULAR_READY_SCRIPT = """
+    var timeoutMs = arguments[0];
+    var done = arguments[arguments.length - 1];
+    var finished = false;
+    var observer = null;
+    var poll = null;
+    var timer = null;
+
+    function finish(reason) {
+        if (finished) { return; }
+        finished = true;
+        if (observer) { observer.disconnect(); }
+        clearInterval(poll);
+        clearTimeout(timer);
+        done(reason);
+    }
+
+    if (typeof angular === 'undefined') {
+        finish('no-angular');
+        return;
+    }
+
+    var root = document.querySelector('[ng-app]') || document.body;
+    var injector = angular.element(root).injector();
+    var $http = null;
+    var $browser = null;
+    try {
+        $http = injector ? injector.get('$http') : null;
+        $browser = injector ? injector.get('$browser') : null;
+    } catch (e) {}
+
+    function controllers() {
+        return document.querySelectorAll('[ng-controller*="ProductDetailCtrl"]');
+    }
+
+    function productLoaded() {
+        var elements = controllers();
+        for (var i = 0; i < elements.length; i++) {
+            var scope = angular.element(elements[i]).scope();
+            if (scope && scope.vm && scope.vm.product) { return true; }
+        }
+        return false;
+    }
+
+    function check() {
+        if (finished) { return; }
+        if ($http && $http.pendingRequests.length) { return; }
+        if (!productLoaded() && controllers().length) { return; }
+        if ($browser && $browser.notifyWhenNoOutstandingRequests) {
+            $browser.notifyWhenNoOutstandingRequests(function() { finish('ready'); });
+        } else {
+            finish('ready');
+        }
+    }
+
+    timer = setTimeout(function() { finish('timeout'); }, timeoutMs);
+    observer = new MutationObserver(check);
+    observer.observe(document.querySelector('#productDetailsMain') || document.body, {
+        childList: true, subtree: true, attributes: true, characterData: true
+    });
+    poll = setInterval(check, 100);
+    check();
+"""
+
+
+# One call returning everything the extractors need from the page: the
+# rendered HTML plus the Angular/JS data. Object parts are JSON-encoded in
+# the page so one unserializable scope can't fail the whole snapshot.
+PAGE_SNAPSHOT_SCRIPT = """
+    function findAngularProduct() {
+        // Enhanced AngularJS data extraction with multiple fallback strategies
+        var productData = {};
+        var scopeFound = false;
+
+        // Method 1: Try to find the ProductDetailCtrl controller scope (most reliable)
+        if (typeof angular !== 'undefined') {
+            try {
+                // Find the ProductDetailCtrl controller
+                var productDetailElements = document.querySelectorAll('[ng-controller*="ProductDetailCtrl"]');
+                for (var i = 0; i < productDetailElements.length; i++) {
+                    var element = productDetailElements[i];
+                    var scope = angular.element(element).scope();
+                    if (scope && scope.vm && scope.vm.product) {
+                        var vm = scope.vm;
+                        productData = {
+                            product: vm.product || {},
+                            pricing: vm.product.Prices || [],
+                            variants: vm.product.Variants || [],
+                            imprinting: vm.product.Imprinting || {},
+                            shipping: vm.product.Shipping || {},
+                            supplier: vm.product.Supplier || {},
+                            attributes: vm.product.Attributes || {},
+                            warnings: vm.product.Warnings || [],
+                            certifications: vm.product.Certifications || []
+                        };
+                        scopeFound = true;
+                        break;
+                    }
+                }
+            } catch (e) {
+                // Continue to next method
+            }
+        }
+
+        // Method 2: Try to find any controller with vm.product
+        if (!scopeFound && typeof angular !== 'undefined') {
+            try {
+                var controllers = document.querySelectorAll('[ng-controller]');
+                for (var i = 0; i < controllers.length; i++) {
+                    var controllerScope = angular.element(controllers[i]).scope();
+                    if (controllerScope && controllerScope.vm && controllerScope.vm.product) {
+                        var vm = controllerScope.vm;
+                        productData = {
+                            product: vm.product || {},
+                            pricing: vm.product.Prices || [],
+                            variants: vm.product.Variants || [],
+                            imprinting: vm.product.Imprinting || {},
+                            shipping: vm.product.Shipping || {},
+                            supplier: vm.product.Supplier || {},
+                            attributes: vm.product.Attributes || {},
+                            warnings: vm.product.Warnings || [],
+                            certifications: vm.product.Certifications || []
+                        };
+                        scopeFound = true;
+                        break;
+                    }
+                }
+            } catch (e) {
+                // Continue to next method
+            }
+        }
+
+        // Method 3: Try to find any scope with product data
+        if (!scopeFound && typeof angular !== 'undefined') {
+            try {
+                // Try multiple elements to find the scope
+                var elements = [
+                    document.body,
+                    document.querySelector('#productDetailsMain'),
+                    document.querySelector('.product-details'),
+                    document.querySelector('[ng-controller]'),
+                    document.querySelector('[ng-model]')
+                ];
+
+                for (var i = 0; i < elements.length; i++) {
+                    if (elements[i]) {
+                        var scope = angular.element(elements[i]).scope();
+                        if (scope && scope.product) {
+                            productData = {
+                                product: scope.product || {},
+                                pricing: scope.product.Prices || [],
+                                variants: scope.product.Variants || [],
+                                imprinting: scope.product.Imprinting || {},
+                                shipping: scope.product.Shipping || {},
+                                supplier: scope.product.Supplier || {},
+                                attributes: scope.product.Attributes || {},
+                                warnings: scope.product.Warnings || [],
+                                certifications: scope.product.Certifications || []
+                            };
+                            scopeFound = true;
+                            break;
+                        }
+                    }
+                }
+            } catch (e) {
+                // Continue to next method
+            }
+        }
+
+        // Method 4: Try to extract from ng-model attributes (enhanced)
+        if (!scopeFound) {
+            var ngModels = document.querySelectorAll('[ng-model]');
+            for (var i = 0; i < ngModels.length; i++) {
+                var model = ngModels[i].getAttribute('ng-model');
+                if (model && (model.includes('product') || model.includes('vm') || model.includes('pricing'))) {
+                    // Try to evaluate the model
+                    try {
+                        var modelValue = eval(model);
+                        if (modelValue && typeof modelValue === 'object') {
+                            productData = {
+                                product: modelValue || {},
+                                pricing: modelValue.Prices || [],
+                                variants: modelValue.Variants || [],
+                                imprinting: modelValue.Imprinting || {},
+                                shipping: modelValue.Shipping || {},
+                                supplier: modelValue.Supplier || {},
+                                attributes: modelValue.Attributes || {},
+                                warnings: modelValue.Warnings || [],
+                                certifications: modelValue.Certifications || []
+                            };
+                            scopeFound = true;
+                            break;
+                        }
+                    } catch (e) {
+                        // Continue to next model
+                    }
+                }
+            }
+        }
+
+        // Method 5: Try to extract from data attributes
+        if (!scopeFound) {
+            var dataElements = document.querySelectorAll('[data-product]');
+            if (dataElements.length > 0) {
+                try {
+                    var dataProduct = JSON.parse(dataElements[0].getAttribute('data-product'));
+                    if (dataProduct) {
+                        productData = {
+                            product: dataProduct || {},
+                            pricing: dataProduct.Prices || [],
+                            variants: dataProduct.Variants || [],
+                            imprinting: dataProduct.Imprinting || {},
+                            shipping: dataProduct.Shipping || {},
+                            supplier: dataProduct.Supplier || {},
+                            attributes: dataProduct.Attributes || {},
+                            warnings: dataProduct.Warnings || [],
+                            certifications: dataProduct.Certifications || []
+                        };
+                        scopeFound = true;
+                    }
+                } catch (e) {
+                    // Continue to next method
+                }
+            }
+        }
+
+        // Method 6: Try to extract from window object (some apps expose data here)
+        if (!scopeFound) {
+            if (window.productData || window.Product || window.product) {
+                var windowData = window.productData || window.Product || window.product;
+                if (windowData && typeof windowData === 'object') {
+                    productData = {
+                        product: windowData || {},
+                        pricing: windowData.Prices || [],
+                        variants: windowData.Variants || [],
+                        imprinting: windowData.Imprinting || {},
+                        shipping: windowData.Shipping || {},
+                        supplier: windowData.Supplier || {},
+                        attributes: windowData.Attributes || {},
+                        warnings: windowData.Warnings || [],
+                        certifications: windowData.Certifications || []
+                    };
+                    scopeFound = true;
+                }
+            }
+        }
+
+        // Method 7: Enhanced - Try to extract from any AngularJS scope with product data
+        if (!scopeFound && typeof angular !== 'undefined') {
+            try {
+                // Get all AngularJS scopes
+                var allScopes = [];
+                function collectAllScopes(scope) {
+                    if (scope) {
+                        allScopes.push(scope);
+                        if (scope.$$childHead) {
+                            collectAllScopes(scope.$$childHead);
+                        }
+                        if (scope.$$nextSibling) {
+                            collectAllScopes(scope.$$nextSibling);
+                        }
+                    }
+                }
+
+                var rootScope = angular.element(document.body).scope();
+                if (rootScope) {
+                    collectAllScopes(rootScope);
+
+                    // Check each scope for product data
+                    for (var i = 0; i < allScopes.length; i++) {
+                        var scope = allScopes[i];
+                        if (scope.product || (scope.vm && scope.vm.product)) {
+                            var product = scope.product || (scope.vm ? scope.vm.product : null);
+                            if (product) {
+                                productData = {
+                                    product: product || {},
+                                    pricing: product.Prices || [],
+                                    variants: product.Variants || [],
+                                    imprinting: product.Imprinting || {},
+                                    shipping: product.Shipping || {},
+                                    supplier: product.Supplier || {},
+                                    attributes: product.Attributes || {},
+                                    warnings: product.Warnings || [],
+                                    certifications: product.Certifications || []
+                                };
+                                scopeFound = true;
+                                break;
+                            }
+                        }
+                    }
+                }
+            } catch (e) {
+                // Continue to next method
+            }
+        }
+
+        return {
+            data: productData,
+            scopeFound: scopeFound,
+            availableScopes: {
+                angular: typeof angular !== 'undefined',
+                windowProduct: !!(window.productData || window.Product || window.product),
+                totalScopes: allScopes ? allScopes.length : 0
+            }
+        };
+    }
+
+    function vmPricing() {
+        var pricing_tables = [];
+        if (typeof vm !== 'undefined' && vm && vm.product && vm.product.Prices) {
+            pricing_tables.push({type: 'main_product', data: vm.product.Prices});
+        }
+        if (typeof vm !== 'undefined' && vm && vm.product && vm.product.Variants) {
+            for (var i = 0; i < vm.product.Variants.length; i++) {
+                var variant = vm.product.Variants[i];
+                if (variant.Prices) {
+                    pricing_tables.push({
+                        type: 'variant_' + (variant.Number || i),
+                        data: variant.Prices
+                    });
+                }
+            }
+        }
+        return pricing_tables;
+    }
+
+    function vmImprint() {
+        var imprint_info = {};
+        if (typeof vm !== 'undefined' && vm && vm.product && vm.product.Imprinting) {
+            var imprinting = vm.product.Imprinting;
+            imprint_info.General = {
+                Colors: imprinting.Colors || [],
+                Sizes: imprinting.Sizes || [],
+                Locations: imprinting.Locations || [],
+                FullColorProcess: imprinting.FullColorProcess,
+                Personalization: imprinting.Personalization,
+                SoldUnimprinted: imprinting.SoldUnimprinted
+            };
+            if (imprinting.Methods && imprinting.Methods.Values) {
+                imprint_info.Methods = {};
+                for (var i = 0; i < imprinting.Methods.Values.length; i++) {
+                    var method = imprinting.Methods.Values[i];
+                    imprint_info.Methods[method.Name || 'Method_' + i] = {
+                        Description: method.Description || '',
+                        Charges: method.Charges || []
+                    };
+                }
+            }
+            if (imprinting.Services && imprinting.Services.Values) {
+                imprint_info.Services = {};
+                for (var i = 0; i < imprinting.Services.Values.length; i++) {
+                    var service = imprinting.Services.Values[i];
+                    imprint_info.Services[service.Name || 'Service_' + i] = {
+                        Description: service.Description || '',
+                        Charges: service.Charges || []
+                    };
+                }
+            }
+        }
+        return imprint_info;
+    }
+
+    function pricingModelValues() {
+        // Values of pricing ng-model expressions, evaluated in global scope
+        var values = {};
+        var sections = document.querySelectorAll(
+            '#pnlPricing, .pricing-section, [id*="pricing"], [class*="pricing"]');
+        for (var i = 0; i < sections.length; i++) {
+            var models = sections[i].querySelectorAll(
+                'product-table-charges, [ng-model*="Prices"], [ng-model*="pricing"]');
+            for (var j = 0; j < models.length; j++) {
+                var model = models[j].getAttribute('ng-model') || '';
+                if (model in values) { continue; }
+                if (model.indexOf('Prices') < 0 && model.indexOf('pricing') < 0) { continue; }
+                try {
+                    values[model] = (0, eval)(model) || [];
+                } catch (e) {
+                    values[model] = [];
+                }
+            }
+        }
+        return values;
+    }
+
+    function asJson(fn) {
+        try {
+            return JSON.stringify(fn());
+        } catch (e) {
+            return null;
+        }
+    }
+
+    return {
+        html: document.documentElement.outerHTML,
+        url: window.location.href,
+        product: (typeof Product !== 'undefined') ? asJson(function() { return Product; }) : null,
+        angular: asJson(findAngularProduct),
+        vmPricing: asJson(vmPricing),
+        vmImprint: asJson(vmImprint),
+        pricingModels: asJson(pricingModelValues)
+    };
+"""
+
+# Snapshot fields sent as JSON strings, with their value when missing
+SNAPSHOT_JSON_FIELDS = {
+    "product": None,
+    "angular": {},
+    "vmPricing": [],
+    "vmImprint": {},
+    "pricingModels": {},
+}
+
+
+
+def selenium_record_from_product_data(product, url=""):
+    """Map API-extracted ProductData onto the record the DOM extractor emits"""
+    raw = product.raw_data or {}
+    pricing = product.pricing_info or {}
+    production = product.production_info or {}
+    supplier_info = product.supplier_info or {}
+    return {
+        "ProductID": product.product_id,
+        "UpdateDate": raw.get("UpdateDate"),
+        "ProductURL": product.vendor_product_url,
+        "ProductCPN": raw.get("CPN"),
+        "URL": product.product_url or url,
+        "Name": product.name,
+        "SKU": product.sku,
+        "ProductNumber": product.product_number,
+        "ShortDescription": product.short_description,
+        "ImageURL": product.image_url,
+        "VariantImages": product.images or [],
+        "Price": pricing.get("base_price", ""),
+        "PricingTable": pricing.get("bulk_pricing", []),
+        "Colors": (product.attributes or {}).get("colors", []),
+        "ProductionTime": production.get("production_time", ""),
+        "Supplier": supplier_info.get("supplier_name", ""),
+        "RelatedProduct": product.related_products or [],
+        "Imprint": product.imprinting or {},
+        "ProductionInfo": production,
+        "Shipping": product.shipping or {},
+        "SafetyAndCompliance": product.warnings or [],
+        "SupplierInfo": supplier_info,
+        "ProductArtURL": product.product_art_url,
+        "ScrapedDate": product.scraped_date,
+    }
+
+
+class SelectorGroup:
+    """Fallback CSS selectors, compiled once and tried in priority order"""
+
+    def __init__(self, *selectors):
+        self.selectors = selectors
+        self._compiled = [soupsieve.compile(selector) for selector in selectors]
+
+    def first(self, root, accept=None):
+        """First element matched by the earliest selector that accept() allows"""
+        for pattern in self._compiled:
+            element = pattern.select_one(root)
+            if element is not None and (accept is None or accept(element)):
+                return element
+        return None
+
+    def all(self, root):
+        """All matches of the earliest selector that matches anything"""
+        for pattern in self._compiled:
+            elements = pattern.select(root)
+            if elements:
+                return elements
+        return []
+
+
+# Extraction plan for product pages, compiled once per process
+SELECTORS = {
+    "name": SelectorGroup(
+        "#productDetailsMain h3.text-primary",
+        "h1.product-title",
+        ".product-name h1",
+        "h1[data-product-name]",
+        ".product-header h1",
+        "h1",
+    ),
+    # Based on actual HTML structure: product number span first
+    "sku": SelectorGroup(
+        "span.product-number.ng-binding",
+        "span.product-number",
+        ".product-sku",
+        "[data-product-sku]",
+        ".product-id",
+        'span[translate*="PRODUCT_NO"]',
+    ),
+    "description": SelectorGroup(
+        "#productDetailsMain div.product-info p.ng-binding",
+        ".product-description p",
+        ".product-summary p",
+        "[data-product-description]",
+    ),
+    "images": SelectorGroup(
+        '#productImages input[type="image"]',
+        ".product-images img",
+        ".variant-images img",
+        "img[data-product-image]",
+    ),
+    "price": SelectorGroup(
+        ".product-price a.ng-binding",
+        '.product-price a[ng-click*="scrollTo"]',
+        ".product-price .ng-binding",
+        ".product-price strong + a",
+        "[data-product-price]",
+        ".price-range",
+    ),
+    "colors": SelectorGroup(
+        'span:-soup-contains("Colors") + span',
+        ".product-colors span",
+        "[data-product-colors]",
+    ),
+    "update_date": SelectorGroup(
+        "span.text-light-2.text-medium.ng-binding",
+        ".last-updated",
+        "[data-last-updated]",
+    ),
+    "cpn": SelectorGroup(
+        "div.product-cpn.ng-binding", ".product-cpn", "[data-product-cpn]"
+    ),
+    "product_number": SelectorGroup("span.product-number[translate-values]"),
+    "pricing_section": SelectorGroup(
+        "#pnlPricing", ".pricing-section", '[id*="pricing"]', '[class*="pricing"]'
+    ),
+    "pricing_sections": SelectorGroup(
+        '#pnlPricing, .pricing-section, [id*="pricing"], [class*="pricing"]'
+    ),
+    "pricing_models": SelectorGroup(
+        'product-table-charges, [ng-model*="Prices"], [ng-model*="pricing"]'
+    ),
+    "imprint_section": SelectorGroup("#pnlImprint"),
+    "options_section": SelectorGroup("#pnlOptions"),
+    "shipping_section": SelectorGroup("#pnlShipping"),
+    "safety_section": SelectorGroup("#pnlSafety"),
+    "supplier_section": SelectorGroup("#pnlSupplierInfo"),
+    "attribute": SelectorGroup("div.product-attribute"),
+    "attribute_label": SelectorGroup("span.attribute-header, span.property-label"),
+    "attribute_header": SelectorGroup("span.attribute-header"),
+    "binding": SelectorGroup("span.ng-binding"),
+    "production_time": SelectorGroup('div[ng-repeat*="ProductionTime"]'),
+    "rush_service": SelectorGroup('p[ng-if*="HasRushService"]'),
+    "origin": SelectorGroup('p[ng-if*="Origin"]'),
+    "prop65_warnings": SelectorGroup('p[ng-repeat*="PROP"]'),
+    "safety_warnings": SelectorGroup('p[ng-repeat*="SWCH"]'),
+    "certifications": SelectorGroup('p[ng-if*="Certifications"]'),
+    "supplier_name": SelectorGroup(".supplier-name"),
+    "asi_number": SelectorGroup(".asi-num"),
+    "supplier_phone": SelectorGroup(".col-xs-6.text-right div"),
+    "supplier_website": SelectorGroup('a[href*="http"]'),
+    "supplier_fax": SelectorGroup('div:-soup-contains("Fax:")'),
+    "related_item": SelectorGroup('div[class*="product-list-item"]'),
+    "related_name": SelectorGroup(".prod-name a"),
+    "related_image": SelectorGroup(".prod-img-inner img"),
+}
+
+
+# Failure classes of the detail loop, each with its cheapest remedy
+FAILURE_EXTRACTION_ERROR = "extraction-error"  # skip the product
+FAILURE_PAGE_TIMEOUT = "page-timeout"  # reload the page
+FAILURE_SESSION_EXPIRED = "session-expired"  # refresh the session cookies
+FAILURE_BROWSER_DEAD = "browser-dead"  # restart the driver
+
+# WebDriver error messages meaning Chrome or chromedriver is gone
+BROWSER_DEAD_MARKERS = (
+    "invalid session id",
+    "no such window",
+    "no such session",
+    "session deleted",
+    "chrome not reachable",
+    "disconnected",
+    "tab crashed",
+    "target window already closed",
+    "connection refused",
+    "max retries exceeded",
+)
+
 
 class ProductDetailScraper(BaseScraper):
     def __init__(
@@ -38,6 +685,12 @@ class ProductDetailScraper(BaseScraper):
         max_retries=5,
         batch_retry_limit=2,
         debug_mode=False,
+        workers=1,
+        page_load_strategy=None,
+        blocked_resources=None,
+        capture_xhr=None,
+        fixture_dir=None,
+        driver=None,
     ):
         super().__init__(session_manager)
         # Don't load .env file in production - use environment variables directly
@@ -54,6 +707,8 @@ class ProductDetailScraper(BaseScraper):
         self.LINKS_FILE = links_file or os.getenv(
             "DETAILS_LINKS_FILE", os.path.join(data_dir, "api_scraped_links.jsonl")
         )
+        # Product ID -> offset/scrape date, kept current on every append
+        self.product_index = ProductIndex(self.OUTPUT_FILE)
         self.limit = limit
         self.headless = headless
         self.max_retries = max_retries
@@ -61,12 +716,87 @@ class ProductDetailScraper(BaseScraper):
         self.debug_mode = debug_mode
         self.headless_failed = False  # Track if headless mode failed
 
+        # Browser workers (0 = size from available CPU and memory)
+        self.workers = workers
+        self.worker_id = None  # Set on pool worker copies of the scraper
+        self._login_lock = threading.Lock()
+
+        # Lighter page loads: stop waiting for the load event, skip assets
+        self.page_load_strategy = (
+            page_load_strategy or os.getenv("SCRAPER_PAGE_LOAD_STRATEGY", "eager")
+        ).lower()
+        if self.page_load_strategy not in PAGE_LOAD_STRATEGIES:
+            raise ValueError(
+                f"Unknown page load strategy '{self.page_load_strategy}' "
+                f"(use one of {', '.join(PAGE_LOAD_STRATEGIES)})"
+            )
+        if blocked_resources is None:
+            blocked_resources = os.getenv(
+                "SCRAPER_BLOCK_RESOURCES", DEFAULT_BLOCKED_RESOURCES
+            )
+        self.blocked_url_patterns = self._blocked_url_patterns(blocked_resources)
+
+        # Read product JSON from the page's XHRs instead of parsing the DOM
+        if capture_xhr is None:
+            capture_xhr = os.getenv("SCRAPER_CAPTURE_XHR", "").lower() in (
+                "1",
+                "true",
+                "yes",
+            )
+        self.capture_xhr = capture_xhr
+        self.api_extractor = ApiProductExtractor()
+        # Full ProductData behind the last XHR-captured record, None for DOM pages
+        self.last_product_data = None
+        self.product_xhr_pattern = os.getenv(
+            "SCRAPER_PRODUCT_XHR_PATTERN", PRODUCT_XHR_PATTERN
+        )
+
+        # Upper bound on waiting for Angular to settle on a product page
+        self.angular_ready_timeout = float(os.getenv("SCRAPER_ANGULAR_TIMEOUT", "10"))
+
+        # Batch files hold references into the product store when configured
+        product_store_dir = os.getenv("PRODUCT_STORE_DIR")
+        self.product_store = (
+            ProductStore(product_store_dir) if product_store_dir else None
+        )
+
+        # Save raw page snapshots for offline extraction benchmarks
+        fixture_dir = fixture_dir or os.getenv("SCRAPER_FIXTURE_DIR")
+        self.fixture_recorder = (
+            FixtureRecorder(
+                fixture_dir, int(os.getenv("SCRAPER_FIXTURE_LIMIT", "200"))
+            )
+            if fixture_dir
+            else None
+        )
+
+        # Replace the driver before Chrome bloats: after N pages or once its
+        # process tree exceeds a memory budget (0 disables either trigger)
+        self.recycle_after_pages = int(os.getenv("SCRAPER_RECYCLE_PAGES", "250"))
+        self.driver_memory_budget_mb = int(
+            os.getenv("SCRAPER_DRIVER_MEMORY_MB", "1500")
+        )
+        self._replacement = None  # Future of a driver starting in the background
+        self._next_recycle_check = 0
+
         # Use simple Selenium driver instead of resilient manager
         self.driver = None
-        self._setup_simple_driver()
+        self._user_data_dir = None
+        self._owns_driver = driver is None
+        if driver is not None:
+            # Caller-supplied driver, e.g. a stub replaying recorded pages
+            self.driver = driver
+            self._pages_on_driver = 0
+        else:
+            self._setup_simple_driver()
 
     def _setup_simple_driver(self):
         """Setup a simple Selenium driver without the resilient manager"""
+        self.driver, self._user_data_dir = self._create_driver()
+        self._pages_on_driver = 0
+
+    def _create_driver(self):
+        """Start a configured Chrome driver; returns (driver, user_data_dir)"""
         from selenium.webdriver.chrome.options import Options
         from selenium.webdriver.chrome.service import Service
         from webdriver_manager.chrome import ChromeDriverManager
@@ -107,7 +837,8 @@ class ProductDetailScraper(BaseScraper):
         import tempfile
         import os
         import time
-        unique_id = f"{int(time.time())}_{os.getpid()}"
+        # Pool workers start drivers concurrently, so the PID alone isn't unique
+        unique_id = f"{int(time.time())}_{os.getpid()}_{uuid.uuid4().hex[:8]}"
         user_data_dir = os.path.join(tempfile.gettempdir(), f"chrome_temp_{unique_id}")
         options.add_argument(f"--user-data-dir={user_data_dir}")
         options.add_argument("--incognito")
@@ -120,14 +851,21 @@ class ProductDetailScraper(BaseScraper):
         if not self.headless:
             options.add_argument("--start-maximized")
 
+        options.page_load_strategy = self.page_load_strategy
+        if self.capture_xhr:
+            # Network events land in the performance log for XHR capture
+            options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
         service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=options)
-        self.driver.set_page_load_timeout(30)  # Increased from 15 to 30 seconds
-        self.driver.implicitly_wait(10)  # Increased from 5 to 10 seconds
+        driver = webdriver.Chrome(service=service, options=options)
+        driver.set_page_load_timeout(30)  # Increased from 15 to 30 seconds
+        driver.implicitly_wait(10)  # Increased from 5 to 10 seconds
+        # Leave room for the async Angular readiness wait
+        driver.set_script_timeout(self.angular_ready_timeout + 5)
 
         # Remove webdriver property to avoid detection
         try:
-            self.driver.execute_cdp_cmd(
+            driver.execute_cdp_cmd(
                 "Page.addScriptToEvaluateOnNewDocument",
                 {
                     "source": """
@@ -138,7 +876,51 @@ class ProductDetailScraper(BaseScraper):
         except Exception:
             pass
 
-        logging.info("✅ Simple Chrome driver started successfully")
+        self._block_resources(driver)
+        if self.capture_xhr:
+            try:
+                driver.execute_cdp_cmd("Network.enable", {})
+            except Exception as e:
+                logging.warning(f"⚠️ Could not enable network capture: {e}")
+
+        logging.info(
+            f"✅ Simple Chrome driver started successfully "
+            f"(pageLoadStrategy={self.page_load_strategy})"
+        )
+        return driver, user_data_dir
+
+    @staticmethod
+    def _blocked_url_patterns(blocked_resources):
+        """Expand a category list ("images,fonts" or a list) into URL patterns"""
+        if isinstance(blocked_resources, str):
+            blocked_resources = blocked_resources.split(",")
+
+        patterns = []
+        for category in blocked_resources:
+            category = category.strip().lower()
+            if not category or category == "none":
+                continue
+            if category in BLOCKED_RESOURCE_PATTERNS:
+                patterns.extend(BLOCKED_RESOURCE_PATTERNS[category])
+            else:
+                # Anything else is taken as a literal URL pattern
+                patterns.append(category)
+        return patterns
+
+    def _block_resources(self, driver):
+        """Block configured resource URLs in a driver via CDP"""
+        if not self.blocked_url_patterns:
+            return
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd(
+                "Network.setBlockedURLs", {"urls": self.blocked_url_patterns}
+            )
+            logging.info(
+                f"🚫 Blocking {len(self.blocked_url_patterns)} resource URL patterns"
+            )
+        except Exception as e:
+            logging.warning(f"⚠️ Could not enable resource blocking: {e}")
 
 
 
@@ -274,27 +1056,7 @@ class ProductDetailScraper(BaseScraper):
     def _load_cookies_into_driver(self, cookies):
         """Load cookies into the current driver and validate session"""
         try:
-            # First navigate to the domain to set cookies
-            self.driver.get(self.PRODUCTS_URL)
-            time.sleep(2)
-
-            # Add cookies to the driver
-            for cookie in cookies:
-                try:
-                    # Remove problematic attributes that Selenium doesn't like
-                    cookie_dict = {
-                        "name": cookie["name"],
-                        "value": cookie["value"],
-                        "domain": cookie.get("domain", ""),
-                        "path": cookie.get("path", "/"),
-                    }
-                    self.driver.add_cookie(cookie_dict)
-                except Exception as e:
-                    logging.warning(
-                        f"⚠️ Could not add cookie {cookie.get('name', 'unknown')}: {e}"
-                    )
-
-            logging.info(f"✅ Loaded {len(cookies)} cookies into driver")
+            self._transfer_cookies(self.driver, cookies)
 
             # Validate session by checking if we're still logged in
             self._validate_session()
@@ -302,6 +1064,37 @@ class ProductDetailScraper(BaseScraper):
         except Exception as e:
             logging.error(f"⚠️ Error loading cookies into driver: {e}")
 
+    def _transfer_cookies(self, driver, cookies):
+        """Open the ESP domain in a driver and add session cookies to it"""
+        # First navigate to the domain to set cookies
+        driver.get(self.PRODUCTS_URL)
+        self._wait_for_document(driver)
+
+        # Add cookies to the driver
+        for cookie in cookies:
+            try:
+                # Remove problematic attributes that Selenium doesn't like
+                cookie_dict = {
+                    "name": cookie["name"],
+                    "value": cookie["value"],
+                    "domain": cookie.get("domain", ""),
+                    "path": cookie.get("path", "/"),
+                }
+                driver.add_cookie(cookie_dict)
+            except Exception as e:
+                logging.warning(
+                    f"⚠️ Could not add cookie {cookie.get('name', 'unknown')}: {e}"
+                )
+
+        logging.info(f"✅ Loaded {len(cookies)} cookies into driver")
+
+    def _wait_for_document(self, driver=None, timeout=30):
+        """Wait until the current document has been parsed"""
+        WebDriverWait(driver or self.driver, timeout, poll_frequency=0.1).until(
+            lambda driver: driver.execute_script("return document.readyState")
+            != "loading"
+        )
+
     def _validate_session(self):
         """Validate that the session is still active"""
         try:
@@ -431,12 +1224,16 @@ class ProductDetailScraper(BaseScraper):
         except Exception:
             pass
         # Only try HTML if API failed or returned no results
+        return self._related_products_from_html(soup)
+
+    def _related_products_from_html(self, soup):
+        """Related products listed on the product page itself"""
         related = []
         if soup:
-            for item in soup.find_all("div", class_=re.compile(r"product-list-item")):
-                name_tag = item.select_one(".prod-name a")
+            for item in SELECTORS["related_item"].all(soup):
+                name_tag = SELECTORS["related_name"].first(item)
                 name = name_tag.text.strip() if name_tag else "N/A"
-                img_tag = item.select_one(".prod-img-inner img")
+                img_tag = SELECTORS["related_image"].first(item)
                 image = img_tag["src"] if img_tag and img_tag.has_attr("src") else ""
                 pid_match = re.search(r"/([0-9]+)(?:\?|$)", image)
                 pid = pid_match.group(1) if pid_match else None
@@ -447,93 +1244,212 @@ class ProductDetailScraper(BaseScraper):
     def build_product_url(self, product_id):
         return f"https://espweb.asicentral.com/Default.aspx?appCode=WESP&appVersion=4.1.0&page=ProductDetails&productID={product_id}&autoLaunchVS=0&tab=list"
 
+    def _drain_performance_log(self):
+        """Return and clear the buffered performance log entries"""
+        try:
+            return self.driver.get_log("performance")
+        except Exception:
+            return []
+
+    def _response_json(self, request_id):
+        """Fetch and decode a captured JSON response body via CDP"""
+        result = self.driver.execute_cdp_cmd(
+            "Network.getResponseBody", {"requestId": request_id}
+        )
+        body = result.get("body", "")
+        if result.get("base64Encoded"):
+            body = base64.b64decode(body).decode("utf-8")
+        return json.loads(body)
+
+    def capture_product_xhr(self, product_id):
+        """Return (product, suggestions) JSON captured from the page's XHRs"""
+        product_re = re.compile(
+            self.product_xhr_pattern.format(product_id=re.escape(str(product_id)))
+        )
+        suggestions_re = re.compile(
+            SUGGESTIONS_XHR_PATTERN.format(product_id=re.escape(str(product_id)))
+        )
+
+        product = suggestions = None
+        for entry in self._drain_performance_log():
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            if message.get("method") != "Network.responseReceived":
+                continue
+
+            params = message.get("params", {})
+            response = params.get("response", {})
+            url = response.get("url", "")
+            if response.get("status") != 200:
+                continue
+            is_suggestions = bool(suggestions_re.search(url))
+            if not is_suggestions and not product_re.search(url):
+                continue
+
+            try:
+                data = self._response_json(params["requestId"])
+            except Exception as e:
+                logging.warning(f"⚠️ Could not read captured response {url}: {e}")
+                continue
+
+            if is_suggestions:
+                suggestions = data
+            elif isinstance(data, dict) and ("Name" in data or "Id" in data):
+                product = data
+
+        return product, suggestions
+
+    def scrape_product(self, url, product_id):
+        """Load a product page and return its data"""
+        if self.capture_xhr:
+            # Drop events from earlier pages so only this page's XHRs match
+            self._drain_performance_log()
+
+        self.last_product_data = None
+        start = time.time()
+        if not self._load_product_page(url):
+            raise TimeoutException(f"Product page {product_id} never rendered")
+
+        if self.capture_xhr:
+            self._wait_for_angular_ready()
+            data, suggestions = self.capture_product_xhr(product_id)
+            if data:
+                product = self.api_extractor._extract_product_data(
+                    data,
+                    str(product_id),
+                    time.time() - start,
+                    self.api_extractor._parse_related_products(suggestions),
+                    extraction_method="xhr_capture",
+                )
+                self.last_product_data = product
+                scraped_data = selenium_record_from_product_data(product, url)
+                scraped_data["SourceURL"] = url
+                return scraped_data
+            logging.warning(
+                f"⚠️ No product XHR captured for {product_id}, parsing the DOM instead"
+            )
+
+        scraped_data = self.scrape_product_detail_page()
+        if not scraped_data:
+            raise ValueError(f"No product data extracted for {product_id}")
+        scraped_data["SourceURL"] = url
+        return scraped_data
+
+    def scrape_product_with_recovery(self, url, product_id):
+        """Scrape a product, recovering from one failure; None if it still fails"""
+        for attempt in range(2):
+            try:
+                return self.scrape_product(url, product_id)
+            except Exception as e:
+                failure = self.classify_failure(e)
+                logging.error(
+                    f"❌ FAILED to scrape page for Product ID {product_id} "
+                    f"({failure}). Error: {e}"
+                )
+                # Apply only the remedy this failure needs, then try once more
+                try:
+                    retry = self.recover_from_failure(failure)
+                except Exception as recover_e:
+                    logging.warning(f"⚠️ Could not recover from {failure}: {recover_e}")
+                    return None
+                if attempt or not retry:
+                    return None
+        return None
+
+    def _wait_for_angular_ready(self):
+        """Wait until the product controller is loaded and Angular is idle"""
+        start = time.time()
+        try:
+            reason = self.driver.execute_async_script(
+                ANGULAR_READY_SCRIPT, int(self.angular_ready_timeout * 1000)
+            )
+        except Exception as e:
+            reason = f"error: {e}"
+
+        elapsed = time.time() - start
+        if reason == "timeout" or str(reason).startswith("error"):
+            logging.warning(
+                f"⚠️ Angular not settled after {elapsed:.2f}s ({reason}), extracting anyway"
+            )
+        else:
+            logging.info(f"⚡ Angular ready in {elapsed:.2f}s ({reason})")
+        return reason
+
+    def take_page_snapshot(self):
+        """Collect the current page's HTML, URL and Angular/JS data in one call"""
+        self._wait_for_angular_ready()
+        snapshot = self.driver.execute_script(PAGE_SNAPSHOT_SCRIPT) or {}
+        if self.fixture_recorder:
+            self.fixture_recorder.record(snapshot)
+        for field, default in SNAPSHOT_JSON_FIELDS.items():
+            try:
+                value = json.loads(snapshot[field]) if snapshot.get(field) else None
+            except ValueError:
+                value = None
+            snapshot[field] = default if value is None else value
+        return snapshot
+
     def scrape_product_detail_page(self):
         """
         Scrapes product details from the currently opened product detail page.
         """
         try:
-            # Use LXML for better performance
-            detail_soup = BeautifulSoup(self.driver.page_source, "lxml")
+            return self.extract_product_from_snapshot(self.take_page_snapshot())
+        except Exception as e:
+            logging.error(f"❌ Error scraping product detail page: {e}")
+            return None
+
+    def extract_product_from_snapshot(self, snapshot):
+        """Build the product record from a page snapshot (no driver access)"""
+        try:
+            # Parse the snapshot once; every extractor below shares this tree
+            detail_soup = BeautifulSoup(snapshot.get("html", ""), "lxml")
+            current_url = snapshot.get("url", "")
+
+            def has_text(element):
+                return element.text.strip()
 
             # --- Product Name (updated selectors) ---
             name = "N/A"
             try:
-                # Try multiple selectors for product name
-                name_selectors = [
-                    "#productDetailsMain h3.text-primary",
-                    "h1.product-title",
-                    ".product-name h1",
-                    "h1[data-product-name]",
-                    ".product-header h1",
-                    "h1",
-                ]
-                for selector in name_selectors:
-                    name_elem = detail_soup.select_one(selector)
-                    if name_elem and name_elem.text.strip():
-                        name = name_elem.text.strip()
-                        break
+                name_elem = SELECTORS["name"].first(detail_soup, has_text)
+                if name_elem:
+                    name = name_elem.text.strip()
             except:
                 pass
 
             # Product Number (SKU) - updated selectors based on actual HTML structure
             sku = "N/A"
             try:
-                sku_selectors = [
-                    "span.product-number.ng-binding",  # Direct product number span
-                    "span.product-number",  # Fallback to any product-number
-                    ".product-sku",
-                    "[data-product-sku]",
-                    ".product-id",
-                    'span[translate*="PRODUCT_NO"]',  # Translate attribute approach
-                ]
-                for selector in sku_selectors:
-                    sku_elem = detail_soup.select_one(selector)
-                    if sku_elem:
-                        sku_text = sku_elem.text.strip()
-                        # Clean up the text (remove "Product #:" prefix)
-                        if "Product #:" in sku_text:
-                            sku = sku_text.replace("Product #:", "").strip()
-                        else:
-                            sku = sku_text
-                        break
+                sku_elem = SELECTORS["sku"].first(detail_soup)
+                if sku_elem:
+                    sku_text = sku_elem.text.strip()
+                    # Clean up the text (remove "Product #:" prefix)
+                    if "Product #:" in sku_text:
+                        sku = sku_text.replace("Product #:", "").strip()
+                    else:
+                        sku = sku_text
             except:
                 pass
 
             # Short Description - updated selectors
             short_description = "N/A"
             try:
-                desc_selectors = [
-                    "#productDetailsMain div.product-info p.ng-binding",
-                    ".product-description p",
-                    ".product-summary p",
-                    "[data-product-description]",
-                ]
-                for selector in desc_selectors:
-                    desc_elem = detail_soup.select_one(selector)
-                    if desc_elem and desc_elem.text.strip():
-                        short_description = desc_elem.text.strip()
-                        break
+                desc_elem = SELECTORS["description"].first(detail_soup, has_text)
+                if desc_elem:
+                    short_description = desc_elem.text.strip()
             except:
                 pass
 
             # --- Variant Images (simplified) ---
             variant_images = []
             try:
-                # Try multiple image selectors
-                img_selectors = [
-                    '#productImages input[type="image"]',
-                    ".product-images img",
-                    ".variant-images img",
-                    "img[data-product-image]",
-                ]
-                for selector in img_selectors:
-                    images = detail_soup.select(selector)
-                    if images:
-                        for img in images:
-                            src = img.get("src", "")
-                            if src and src not in variant_images:
-                                variant_images.append(src)
-                        break
+                for img in SELECTORS["images"].all(detail_soup):
+                    src = img.get("src", "")
+                    if src and src not in variant_images:
+                        variant_images.append(src)
             except:
                 pass
 
@@ -543,46 +1459,29 @@ class ProductDetailScraper(BaseScraper):
             # Price Range - updated selectors based on actual HTML structure
             price = "N/A"
             try:
-                price_selectors = [
-                    ".product-price a.ng-binding",  # Direct price link
-                    '.product-price a[ng-click*="scrollTo"]',  # Price with ng-click
-                    ".product-price .ng-binding",  # Any ng-binding in price div
-                    ".product-price strong + a",  # Link after "Price" label
-                    "[data-product-price]",
-                    ".price-range",
-                ]
-                for selector in price_selectors:
-                    price_elem = detail_soup.select_one(selector)
-                    if price_elem and price_elem.text.strip():
-                        price = price_elem.text.strip()
-                        break
+                price_elem = SELECTORS["price"].first(detail_soup, has_text)
+                if price_elem:
+                    price = price_elem.text.strip()
             except:
                 pass
 
             # Colors - updated selectors
             colors = []
             try:
-                color_selectors = [
-                    'span:-soup-contains("Colors") + span',
-                    ".product-colors span",
-                    "[data-product-colors]",
-                ]
-                for selector in color_selectors:
-                    color_elem = detail_soup.select_one(selector)
-                    if color_elem:
-                        color_text = color_elem.get_text(strip=True)
-                        if color_text and color_text != "N/A":
-                            colors = [
-                                c.strip() for c in color_text.split(",") if c.strip()
-                            ]
-                            break
+                color_elem = SELECTORS["colors"].first(
+                    detail_soup,
+                    lambda e: e.get_text(strip=True) not in ("", "N/A"),
+                )
+                if color_elem:
+                    color_text = color_elem.get_text(strip=True)
+                    colors = [c.strip() for c in color_text.split(",") if c.strip()]
             except:
                 pass
 
             # --- ProductID from URL ---
             product_id = None
             try:
-                parsed_url = urllib.parse.urlparse(self.driver.current_url)
+                parsed_url = urllib.parse.urlparse(current_url)
                 for part in urllib.parse.parse_qsl(parsed_url.query):
                     if part[0].lower() == "productid":
                         product_id = part[1]
@@ -590,46 +1489,42 @@ class ProductDetailScraper(BaseScraper):
             except:
                 pass
 
-            # --- UpdateDate and ProductURL ---
+            # --- UpdateDate and ProductURL (from the page's JS Product object) ---
             update_date = None
             product_url = None
-            try:
-                # Try to extract from JS context
-                product_json = self.driver.execute_script(
-                    "return (typeof Product !== 'undefined') ? JSON.stringify(Product) : null;"
-                )
-                if product_json:
-                    import json as _json
-
-                    product_js = _json.loads(product_json)
-                    update_date = product_js.get("UpdateDate")
-                    product_url = product_js.get("ProductURL")
-            except:
-                pass
+            product_js = snapshot.get("product")
+            if isinstance(product_js, dict):
+                update_date = product_js.get("UpdateDate")
+                product_url = product_js.get("ProductURL")
 
             # Fallback to HTML if not found
             if not update_date:
                 try:
-                    update_selectors = [
-                        "span.text-light-2.text-medium.ng-binding",
-                        ".last-updated",
-                        "[data-last-updated]",
-                    ]
-                    for selector in update_selectors:
-                        update_elem = detail_soup.select_one(selector)
-                        if update_elem and "Last updated" in update_elem.text:
-                            update_date = update_elem.text.replace(
-                                "Last updated:", ""
-                            ).strip()
-                            break
+                    update_elem = SELECTORS["update_date"].first(
+                        detail_soup, lambda e: "Last updated" in e.text
+                    )
+                    if update_elem:
+                        update_date = update_elem.text.replace(
+                            "Last updated:", ""
+                        ).strip()
                 except:
                     pass
 
             # --- Comprehensive AngularJS Data Extraction ---
-            angular_data = self.get_angular_product_data()
+            angular_result = snapshot.get("angular") or {}
+            if angular_result.get("scopeFound"):
+                logging.info("✅ Extracted AngularJS product data successfully")
+                angular_data = angular_result.get("data") or {}
+            else:
+                logging.warning(
+                    f"⚠️ No AngularJS scope found. Available: {angular_result.get('availableScopes', {})}"
+                )
+                angular_data = {}
 
             # --- Enhanced Imprint Section with Charges ---
-            imprint_info = self.extract_comprehensive_imprint(detail_soup, angular_data)
+            imprint_info = self.extract_comprehensive_imprint(
+                detail_soup, angular_data, snapshot
+            )
 
             # --- Enhanced Production Info ---
             production_info = self.extract_comprehensive_production_info(
@@ -675,22 +1570,15 @@ class ProductDetailScraper(BaseScraper):
             # --- ProductCPN ---
             product_cpn = None
             try:
-                cpn_selectors = [
-                    "div.product-cpn.ng-binding",
-                    ".product-cpn",
-                    "[data-product-cpn]",
-                ]
-                for selector in cpn_selectors:
-                    cpn_elem = detail_soup.select_one(selector)
-                    if cpn_elem:
-                        product_cpn = cpn_elem.text.strip()
-                        break
+                cpn_elem = SELECTORS["cpn"].first(detail_soup)
+                if cpn_elem:
+                    product_cpn = cpn_elem.text.strip()
             except:
                 pass
 
             # --- Comprehensive Pricing Tables ---
             pricing_table = self.extract_comprehensive_pricing(
-                detail_soup, angular_data
+                detail_soup, angular_data, snapshot
             )
 
             # --- Related Products (simplified) ---
@@ -703,15 +1591,10 @@ class ProductDetailScraper(BaseScraper):
                 except Exception as e:
                     logging.warning(f"[RelatedProduct] Error: {e}")
 
-            # Get current URL
-            current_url = self.driver.current_url
-
             # --- ProductNumber extraction (from HTML) ---
             product_number = ""
             try:
-                product_number_elem = detail_soup.select_one(
-                    "span.product-number[translate-values]"
-                )
+                product_number_elem = SELECTORS["product_number"].first(detail_soup)
                 if product_number_elem:
                     attr = product_number_elem.get("translate-values", "")
                     # Try to parse as JSON/dict
@@ -722,523 +1605,92 @@ class ProductDetailScraper(BaseScraper):
                     try:
                         d = json.loads(attr_fixed)
                         product_number = d.get("productno", "")
-                    except Exception:
-                        # Fallback: try to extract number from text
-                        match = re.search(r"(\\d+)", product_number_elem.text)
-                        if match:
-                            product_number = match.group(1)
-                # If still not found, fallback to SKU if numeric
-                if not product_number and sku and sku.isdigit():
-                    product_number = sku
-            except Exception:
-                pass
-
-            # --- ProductURL and ProductArtURL construction ---
-            product_url = (
-                f"https://www.hitpromo.net/product/show/{product_number}"
-                if product_number
-                else ""
-            )
-            product_art_url = (
-                f"https://www.hitpromo.net/fs/artTemplates/{product_number}/{product_number}.pdf"
-                if product_number
-                else ""
-            )
-
-            # Add scraped date
-            scraped_date = time.strftime("%Y-%m-%d %H:%M:%S")
-
-            return {
-                "ProductID": product_id,
-                "UpdateDate": update_date,
-                "ProductURL": product_url,
-                "ProductCPN": product_cpn,
-                "URL": current_url,
-                "Name": name,
-                "SKU": sku,
-                "ProductNumber": product_number,
-                "ShortDescription": short_description,
-                "ImageURL": image_url,
-                "VariantImages": variant_images,
-                "Price": price,  # Added price field
-                "PricingTable": pricing_table,
-                "Colors": colors,
-                "ProductionTime": production_time,
-                "Supplier": supplier,
-                "RelatedProduct": related_products,
-                "Imprint": imprint_info,
-                "ProductionInfo": production_info,
-                "Shipping": shipping_info,
-                "SafetyAndCompliance": safety_info,
-                "SupplierInfo": supplier_info,
-                "ProductArtURL": product_art_url,
-                "ScrapedDate": scraped_date,
-            }
-
-        except Exception as e:
-            logging.error(f"❌ Error scraping product detail page: {e}")
-            return None
-
-    def extract_pricing_table(self):
-        """
-        Extracts the pricing table from the product detail page with robust parsing.
-        """
-        pricing_table = []
-        try:
-            # Try to find pricing section with multiple selectors
-            pricing_section = None
-            pricing_selectors = [
-                "#pnlPricing",
-                ".pricing-section",
-                '[id*="pricing"]',
-                '[class*="pricing"]',
-            ]
-
-            for selector in pricing_selectors:
-                try:
-                    pricing_section = WebDriverWait(
-                        self.driver, 10
-                    ).until(  # Increased from 3 to 10
-                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                    )
-                    if pricing_section:
-                        break
-                except:
-                    continue
-
-            if not pricing_section:
-                logging.warning("⚠️ No pricing section found, skipping pricing table")
-                return []
-
-            pricing_soup = BeautifulSoup(
-                pricing_section.get_attribute("innerHTML"), "lxml"
-            )
-            table = pricing_soup.find("table")
-
-            if not table:
-                logging.warning(
-                    "⚠️ Pricing table element not found within pricing section."
-                )
-                return []
-
-            rows = table.find_all("tr")
-            if not rows or len(rows) < 2:
-                logging.warning("⚠️ Pricing table has no header or data rows.")
-                return []
-
-            # Find the header row with quantities and create a column map {index: quantity}
-            header_row = rows[0]
-            quantity_map = {}
-            for i, th in enumerate(header_row.find_all(["th", "td"])):
-                if i == 0:
-                    continue  # Skip the first column
-                try:
-                    quantity = int(re.sub(r"[^0-9]", "", th.text))
-                    if quantity > 0:
-                        quantity_map[i] = quantity
-                except (ValueError, TypeError):
-                    continue
-
-            if not quantity_map:
-                logging.warning(
-                    "⚠️ Could not parse quantities from the pricing table header."
-                )
-                return []
-
-            # Process data rows
-            for row in rows[1:]:
-                cells = row.find_all(["td", "th"])
-                if not cells or len(cells) <= 1:
-                    continue
-
-                row_label = cells[0].get_text(strip=True)
-                if not row_label or self.is_price(row_label):
-                    continue
-
-                breaks = []
-                for i, cell in enumerate(cells):
-                    if i in quantity_map:
-                        quantity = quantity_map[i]
-                        price_str = cell.get_text(strip=True)
-                        discount_code = None
-
-                        dc_elem = cell.find("small", class_="price-code") or cell.find(
-                            "span", class_="price-code"
-                        )
-                        if dc_elem:
-                            discount_code = dc_elem.get_text(strip=True).strip("()")
-
-                        price_match = re.search(r"[\d.,]+\d", price_str)
-                        if price_match:
-                            try:
-                                price = float(price_match.group().replace(",", ""))
-                                breaks.append(
-                                    {
-                                        "quantity": quantity,
-                                        "price": price,
-                                        "discount_code": discount_code,
-                                    }
-                                )
-                            except (ValueError, TypeError):
-                                continue
-
-                if breaks:
-                    pricing_table.append({"type": row_label, "breaks": breaks})
-
-            if not pricing_table:
-                logging.warning(
-                    "⚠️ Pricing table was parsed, but no valid data was extracted."
-                )
-
-            return pricing_table
-
-        except Exception as e:
-            logging.warning(f"⚠️ Error in extract_pricing_table: {e}")
-            return []
-
-    def get_angular_product_data(self):
-        """Extract complete product data from AngularJS with enhanced script execution and waiting"""
-        try:
-            # First, ensure all scripts are executed and AngularJS is fully loaded
-            logging.info("🔄 Ensuring all JavaScript scripts are executed...")
-
-            # Wait for AngularJS to be fully loaded and trigger digest cycles
-            self.driver.execute_script(
-                """
-                // Wait for AngularJS to be available
-                if (typeof angular !== 'undefined') {
-                    // Trigger multiple digest cycles to ensure all data is populated
-                    var $rootScope = angular.element(document.body).scope();
-                    if ($rootScope) {
-                        // Force multiple digest cycles
-                        for (var i = 0; i < 3; i++) {
-                            $rootScope.$apply();
-                            $rootScope.$digest();
-                        }
-
-                        // Wait for any pending async operations
-                        if ($rootScope.$$phase) {
-                            $rootScope.$evalAsync(function() {});
-                        }
-                    }
-
-                    // Trigger any pending timeouts or intervals
-                    if (window.setTimeout) {
-                        // Force execution of any pending timeouts
-                        var originalSetTimeout = window.setTimeout;
-                        window.setTimeout = function(fn, delay) {
-                            if (delay === 0) {
-                                fn();
-                            } else {
-                                originalSetTimeout(fn, delay);
-                            }
-                        };
-                    }
-
-                    // Execute any pending scripts
-                    var scripts = document.querySelectorAll('script');
-                    for (var i = 0; i < scripts.length; i++) {
-                        var script = scripts[i];
-                        if (script.type === 'text/javascript' || !script.type) {
-                            try {
-                                if (script.innerHTML) {
-                                    eval(script.innerHTML);
-                                }
-                            } catch (e) {
-                                // Ignore script execution errors
-                            }
-                        }
-                    }
-
-                    // Force execution of any AngularJS watchers
-                    var allScopes = [];
-                    function collectScopes(scope) {
-                        allScopes.push(scope);
-                        if (scope.$$childHead) {
-                            collectScopes(scope.$$childHead);
-                        }
-                        if (scope.$$nextSibling) {
-                            collectScopes(scope.$$nextSibling);
-                        }
-                    }
-
-                    if ($rootScope) {
-                        collectScopes($rootScope);
-                        allScopes.forEach(function(scope) {
-                            if (scope.$digest) {
-                                scope.$digest();
-                            }
-                        });
-                    }
-                }
-
-                // Wait for any dynamic content to load
-                return new Promise(function(resolve) {
-                    setTimeout(function() {
-                        resolve('Scripts executed and AngularJS ready');
-                    }, 2000);
-                });
-            """
-            )
-
-            # Wait for the script execution to complete
-            time.sleep(3)
-
-            # Now extract the AngularJS data with enhanced methods
-            angular_data = self.driver.execute_script(
-                """
-                // Enhanced AngularJS data extraction with multiple fallback strategies
-                var productData = {};
-                var scopeFound = false;
-
-                // Method 1: Try to find the ProductDetailCtrl controller scope (most reliable)
-                if (typeof angular !== 'undefined') {
-                    try {
-                        // Find the ProductDetailCtrl controller
-                        var productDetailElements = document.querySelectorAll('[ng-controller*="ProductDetailCtrl"]');
-                        for (var i = 0; i < productDetailElements.length; i++) {
-                            var element = productDetailElements[i];
-                            var scope = angular.element(element).scope();
-                            if (scope && scope.vm && scope.vm.product) {
-                                var vm = scope.vm;
-                                productData = {
-                                    product: vm.product || {},
-                                    pricing: vm.product.Prices || [],
-                                    variants: vm.product.Variants || [],
-                                    imprinting: vm.product.Imprinting || {},
-                                    shipping: vm.product.Shipping || {},
-                                    supplier: vm.product.Supplier || {},
-                                    attributes: vm.product.Attributes || {},
-                                    warnings: vm.product.Warnings || [],
-                                    certifications: vm.product.Certifications || []
-                                };
-                                scopeFound = true;
-                                break;
-                            }
-                        }
-                    } catch (e) {
-                        // Continue to next method
-                    }
-                }
-
-                // Method 2: Try to find any controller with vm.product
-                if (!scopeFound && typeof angular !== 'undefined') {
-                    try {
-                        var controllers = document.querySelectorAll('[ng-controller]');
-                        for (var i = 0; i < controllers.length; i++) {
-                            var controllerScope = angular.element(controllers[i]).scope();
-                            if (controllerScope && controllerScope.vm && controllerScope.vm.product) {
-                                var vm = controllerScope.vm;
-                                productData = {
-                                    product: vm.product || {},
-                                    pricing: vm.product.Prices || [],
-                                    variants: vm.product.Variants || [],
-                                    imprinting: vm.product.Imprinting || {},
-                                    shipping: vm.product.Shipping || {},
-                                    supplier: vm.product.Supplier || {},
-                                    attributes: vm.product.Attributes || {},
-                                    warnings: vm.product.Warnings || [],
-                                    certifications: vm.product.Certifications || []
-                                };
-                                scopeFound = true;
-                                break;
-                            }
-                        }
-                    } catch (e) {
-                        // Continue to next method
-                    }
-                }
-
-                // Method 3: Try to find any scope with product data
-                if (!scopeFound && typeof angular !== 'undefined') {
-                    try {
-                        // Try multiple elements to find the scope
-                        var elements = [
-                            document.body,
-                            document.querySelector('#productDetailsMain'),
-                            document.querySelector('.product-details'),
-                            document.querySelector('[ng-controller]'),
-                            document.querySelector('[ng-model]')
-                        ];
-
-                        for (var i = 0; i < elements.length; i++) {
-                            if (elements[i]) {
-                                var scope = angular.element(elements[i]).scope();
-                                if (scope && scope.product) {
-                                    productData = {
-                                        product: scope.product || {},
-                                        pricing: scope.product.Prices || [],
-                                        variants: scope.product.Variants || [],
-                                        imprinting: scope.product.Imprinting || {},
-                                        shipping: scope.product.Shipping || {},
-                                        supplier: scope.product.Supplier || {},
-                                        attributes: scope.product.Attributes || {},
-                                        warnings: scope.product.Warnings || [],
-                                        certifications: scope.product.Certifications || []
-                                    };
-                                    scopeFound = true;
-                                    break;
-                                }
-                            }
-                        }
-                    } catch (e) {
-                        // Continue to next method
-                    }
-                }
+                    except Exception:
+                        # Fallback: try to extract number from text
+                        match = re.search(r"(\\d+)", product_number_elem.text)
+                        if match:
+                            product_number = match.group(1)
+                # If still not found, fallback to SKU if numeric
+                if not product_number and sku and sku.isdigit():
+                    product_number = sku
+            except Exception:
+                pass
 
-                // Method 4: Try to extract from ng-model attributes (enhanced)
-                if (!scopeFound) {
-                    var ngModels = document.querySelectorAll('[ng-model]');
-                    for (var i = 0; i < ngModels.length; i++) {
-                        var model = ngModels[i].getAttribute('ng-model');
-                        if (model && (model.includes('product') || model.includes('vm') || model.includes('pricing'))) {
-                            // Try to evaluate the model
-                            try {
-                                var modelValue = eval(model);
-                                if (modelValue && typeof modelValue === 'object') {
-                                    productData = {
-                                        product: modelValue || {},
-                                        pricing: modelValue.Prices || [],
-                                        variants: modelValue.Variants || [],
-                                        imprinting: modelValue.Imprinting || {},
-                                        shipping: modelValue.Shipping || {},
-                                        supplier: modelValue.Supplier || {},
-                                        attributes: modelValue.Attributes || {},
-                                        warnings: modelValue.Warnings || [],
-                                        certifications: modelValue.Certifications || []
-                                    };
-                                    scopeFound = true;
-                                    break;
-                                }
-                            } catch (e) {
-                                // Continue to next model
-                            }
-                        }
-                    }
-                }
+            # --- ProductURL and ProductArtURL construction ---
+            product_url = (
+                f"https://www.hitpromo.net/product/show/{product_number}"
+                if product_number
+                else ""
+            )
+            product_art_url = (
+                f"https://www.hitpromo.net/fs/artTemplates/{product_number}/{product_number}.pdf"
+                if product_number
+                else ""
+            )
 
-                // Method 5: Try to extract from data attributes
-                if (!scopeFound) {
-                    var dataElements = document.querySelectorAll('[data-product]');
-                    if (dataElements.length > 0) {
-                        try {
-                            var dataProduct = JSON.parse(dataElements[0].getAttribute('data-product'));
-                            if (dataProduct) {
-                                productData = {
-                                    product: dataProduct || {},
-                                    pricing: dataProduct.Prices || [],
-                                    variants: dataProduct.Variants || [],
-                                    imprinting: dataProduct.Imprinting || {},
-                                    shipping: dataProduct.Shipping || {},
-                                    supplier: dataProduct.Supplier || {},
-                                    attributes: dataProduct.Attributes || {},
-                                    warnings: dataProduct.Warnings || [],
-                                    certifications: dataProduct.Certifications || []
-                                };
-                                scopeFound = true;
-                            }
-                        } catch (e) {
-                            // Continue to next method
-                        }
-                    }
-                }
+            # Add scraped date
+            scraped_date = time.strftime("%Y-%m-%d %H:%M:%S")
 
-                // Method 6: Try to extract from window object (some apps expose data here)
-                if (!scopeFound) {
-                    if (window.productData || window.Product || window.product) {
-                        var windowData = window.productData || window.Product || window.product;
-                        if (windowData && typeof windowData === 'object') {
-                            productData = {
-                                product: windowData || {},
-                                pricing: windowData.Prices || [],
-                                variants: windowData.Variants || [],
-                                imprinting: windowData.Imprinting || {},
-                                shipping: windowData.Shipping || {},
-                                supplier: windowData.Supplier || {},
-                                attributes: windowData.Attributes || {},
-                                warnings: windowData.Warnings || [],
-                                certifications: windowData.Certifications || []
-                            };
-                            scopeFound = true;
-                        }
-                    }
-                }
+            return {
+                "ProductID": product_id,
+                "UpdateDate": update_date,
+                "ProductURL": product_url,
+                "ProductCPN": product_cpn,
+                "URL": current_url,
+                "Name": name,
+                "SKU": sku,
+                "ProductNumber": product_number,
+                "ShortDescription": short_description,
+                "ImageURL": image_url,
+                "VariantImages": variant_images,
+                "Price": price,  # Added price field
+                "PricingTable": pricing_table,
+                "Colors": colors,
+                "ProductionTime": production_time,
+                "Supplier": supplier,
+                "RelatedProduct": related_products,
+                "Imprint": imprint_info,
+                "ProductionInfo": production_info,
+                "Shipping": shipping_info,
+                "SafetyAndCompliance": safety_info,
+                "SupplierInfo": supplier_info,
+                "ProductArtURL": product_art_url,
+                "ScrapedDate": scraped_date,
+            }
 
-                // Method 7: Enhanced - Try to extract from any AngularJS scope with product data
-                if (!scopeFound && typeof angular !== 'undefined') {
-                    try {
-                        // Get all AngularJS scopes
-                        var allScopes = [];
-                        function collectAllScopes(scope) {
-                            if (scope) {
-                                allScopes.push(scope);
-                                if (scope.$$childHead) {
-                                    collectAllScopes(scope.$$childHead);
-                                }
-                                if (scope.$$nextSibling) {
-                                    collectAllScopes(scope.$$nextSibling);
-                                }
-                            }
-                        }
+        except Exception as e:
+            logging.error(f"❌ Error extracting product from page snapshot: {e}")
+            return None
 
-                        var rootScope = angular.element(document.body).scope();
-                        if (rootScope) {
-                            collectAllScopes(rootScope);
-
-                            // Check each scope for product data
-                            for (var i = 0; i < allScopes.length; i++) {
-                                var scope = allScopes[i];
-                                if (scope.product || (scope.vm && scope.vm.product)) {
-                                    var product = scope.product || (scope.vm ? scope.vm.product : null);
-                                    if (product) {
-                                        productData = {
-                                            product: product || {},
-                                            pricing: product.Prices || [],
-                                            variants: product.Variants || [],
-                                            imprinting: product.Imprinting || {},
-                                            shipping: product.Shipping || {},
-                                            supplier: product.Supplier || {},
-                                            attributes: product.Attributes || {},
-                                            warnings: product.Warnings || [],
-                                            certifications: product.Certifications || []
-                                        };
-                                        scopeFound = true;
-                                        break;
-                                    }
-                                }
-                            }
-                        }
-                    } catch (e) {
-                        // Continue to next method
-                    }
-                }
+    def extract_pricing_table(self, detail_soup):
+        """
+        Extracts the pricing table from the product detail page with robust parsing.
+        """
+        try:
+            pricing_section = SELECTORS["pricing_section"].first(detail_soup)
+            if not pricing_section:
+                logging.warning("⚠️ No pricing section found, skipping pricing table")
+                return []
 
-                return {
-                    data: productData,
-                    scopeFound: scopeFound,
-                    availableScopes: {
-                        angular: typeof angular !== 'undefined',
-                        windowProduct: !!(window.productData || window.Product || window.product),
-                        totalScopes: allScopes ? allScopes.length : 0
-                    }
-                };
-            """
-            )
+            table = pricing_section.find("table")
+            if not table:
+                logging.warning(
+                    "⚠️ Pricing table element not found within pricing section."
+                )
+                return []
 
-            if angular_data.get("scopeFound"):
-                logging.info("✅ Extracted AngularJS product data successfully")
-                return angular_data.get("data", {})
-            else:
+            pricing_table = self.parse_html_table_pricing(table)
+            if not pricing_table:
                 logging.warning(
-                    f"⚠️ No AngularJS scope found. Available: {angular_data.get('availableScopes', {})}"
+                    "⚠️ Pricing table was parsed, but no valid data was extracted."
                 )
-                return {}
+            return pricing_table
 
         except Exception as e:
-            logging.warning(f"⚠️ Failed to extract AngularJS data: {e}")
-            return {}
+            logging.warning(f"⚠️ Error in extract_pricing_table: {e}")
+            return []
 
-    def extract_comprehensive_pricing(self, detail_soup, angular_data):
+    def extract_comprehensive_pricing(self, detail_soup, angular_data, page_data=None):
         """Extract all pricing tables including variants and nested charges"""
         pricing_tables = []
 
@@ -1262,107 +1714,59 @@ class ProductDetailScraper(BaseScraper):
 
             # Method 2: Extract from HTML pricing sections
             if not pricing_tables:
-                pricing_tables = self.extract_pricing_from_html(detail_soup)
+                pricing_tables = self.extract_pricing_from_html(detail_soup, page_data)
 
             # Method 3: Fallback to original table extraction
             if not pricing_tables:
-                pricing_tables = self.extract_pricing_table()
+                pricing_tables = self.extract_pricing_table(detail_soup)
 
             logging.info(f"✅ Extracted {len(pricing_tables)} pricing tables")
             return pricing_tables
 
         except Exception as e:
             logging.warning(f"⚠️ Error extracting comprehensive pricing: {e}")
-            return self.extract_pricing_table()  # Fallback to original method
+            return self.extract_pricing_table(detail_soup)  # Fallback to original method
+
+    def extract_pricing_from_html(self, detail_soup, page_data=None):
+        """Extract pricing from HTML sections including AngularJS components
 
-    def extract_pricing_from_html(self, detail_soup):
-        """Extract pricing from HTML sections including AngularJS components"""
+        page_data is the page snapshot holding the vm/ng-model pricing values
+        read in the browser.
+        """
         pricing_tables = []
+        page_data = page_data or {}
 
         try:
             # Method 1: Extract directly from AngularJS scope (preferred)
-            pricing_data = self.driver.execute_script(
-                """
-                var pricing_tables = [];
-
-                // Extract main product pricing
-                if (typeof vm !== 'undefined' && vm && vm.product && vm.product.Prices) {
-                    pricing_tables.push({
-                        type: 'main_product',
-                        data: vm.product.Prices
-                    });
-                }
-
-                // Extract variant pricing
-                if (typeof vm !== 'undefined' && vm && vm.product && vm.product.Variants) {
-                    for (var i = 0; i < vm.product.Variants.length; i++) {
-                        var variant = vm.product.Variants[i];
-                        if (variant.Prices) {
-                            pricing_tables.push({
-                                type: 'variant_' + (variant.Number || i),
-                                data: variant.Prices
-                            });
-                        }
-                    }
-                }
-
-                return pricing_tables;
-            """
-            )
-
-            if pricing_data:
-                for table_info in pricing_data:
-                    if table_info.get("data"):
-                        parsed_pricing = self.parse_angular_pricing(
-                            table_info["data"], table_info["type"]
-                        )
-                        pricing_tables.extend(parsed_pricing)
+            for table_info in page_data.get("vmPricing") or []:
+                if table_info.get("data"):
+                    parsed_pricing = self.parse_angular_pricing(
+                        table_info["data"], table_info["type"]
+                    )
+                    pricing_tables.extend(parsed_pricing)
 
             # Method 2: Extract from rendered HTML components
             if not pricing_tables:
-                pricing_sections = detail_soup.select(
-                    '#pnlPricing, .pricing-section, [id*="pricing"], [class*="pricing"]'
-                )
+                model_values = page_data.get("pricingModels") or {}
 
-                for section in pricing_sections:
+                for section in SELECTORS["pricing_sections"].all(detail_soup):
                     # Look for product-table-charges components
-                    product_tables = section.select(
-                        'product-table-charges, [ng-model*="Prices"], [ng-model*="pricing"]'
-                    )
-
-                    for table in product_tables:
-                        # Extract data from ng-model attributes
+                    for table in SELECTORS["pricing_models"].all(section):
+                        # Values of the ng-model expressions come from the snapshot
                         ng_model = table.get("ng-model", "")
                         if "Prices" in ng_model or "pricing" in ng_model:
-                            try:
-                                # Execute JavaScript to get the data
-                                pricing_data = self.driver.execute_script(
-                                    f"""
-                                    try {{
-                                        return {ng_model} || [];
-                                    }} catch(e) {{
-                                        return [];
-                                    }}
-                                """
-                                )
-
-                                if pricing_data:
-                                    model_name = ng_model.replace(
-                                        "vm.product.", ""
-                                    ).replace("vm.", "")
-                                    parsed_pricing = self.parse_angular_pricing(
-                                        pricing_data, f"html_{model_name}"
-                                    )
-                                    pricing_tables.extend(parsed_pricing)
-
-                            except Exception as e:
-                                logging.warning(
-                                    f"⚠️ Could not extract pricing from {ng_model}: {e}"
+                            pricing_data = model_values.get(ng_model)
+                            if pricing_data:
+                                model_name = ng_model.replace(
+                                    "vm.product.", ""
+                                ).replace("vm.", "")
+                                parsed_pricing = self.parse_angular_pricing(
+                                    pricing_data, f"html_{model_name}"
                                 )
+                                pricing_tables.extend(parsed_pricing)
 
                     # Also look for standard tables as fallback
-                    tables = section.select("table")
-                    for table in tables:
+                    for table in section.find_all("table"):
                         table_pricing = self.parse_html_table_pricing(table)
                         if table_pricing:
                             pricing_tables.extend(table_pricing)
@@ -1475,57 +1879,13 @@ class ProductDetailScraper(BaseScraper):
             logging.warning(f"⚠️ Error parsing AngularJS pricing: {e}")
             return []
 
-    def extract_comprehensive_imprint(self, detail_soup, angular_data):
+    def extract_comprehensive_imprint(self, detail_soup, angular_data, page_data=None):
         """Extract comprehensive imprint information including nested charges"""
         imprint_info = {"General": {}, "Methods": {}, "Services": {}, "Other": {}}
 
         try:
             # Method 1: Extract directly from AngularJS scope (preferred)
-            imprint_data = self.driver.execute_script(
-                """
-                var imprint_info = {};
-
-                if (typeof vm !== 'undefined' && vm && vm.product && vm.product.Imprinting) {
-                    var imprinting = vm.product.Imprinting;
-
-                    // Extract general info
-                    imprint_info.General = {
-                        Colors: imprinting.Colors || [],
-                        Sizes: imprinting.Sizes || [],
-                        Locations: imprinting.Locations || [],
-                        FullColorProcess: imprinting.FullColorProcess,
-                        Personalization: imprinting.Personalization,
-                        SoldUnimprinted: imprinting.SoldUnimprinted
-                    };
-
-                    // Extract methods with charges
-                    if (imprinting.Methods && imprinting.Methods.Values) {
-                        imprint_info.Methods = {};
-                        for (var i = 0; i < imprinting.Methods.Values.length; i++) {
-                            var method = imprinting.Methods.Values[i];
-                            imprint_info.Methods[method.Name || 'Method_' + i] = {
-                                Description: method.Description || '',
-                                Charges: method.Charges || []
-                            };
-                        }
-                    }
-
-                    // Extract services with nested charges
-                    if (imprinting.Services && imprinting.Services.Values) {
-                        imprint_info.Services = {};
-                        for (var i = 0; i < imprinting.Services.Values.length; i++) {
-                            var service = imprinting.Services.Values[i];
-                            imprint_info.Services[service.Name || 'Service_' + i] = {
-                                Description: service.Description || '',
-                                Charges: service.Charges || []
-                            };
-                        }
-                    }
-                }
-
-                return imprint_info;
-            """
-            )
+            imprint_data = (page_data or {}).get("vmImprint")
 
             if imprint_data:
                 imprint_info.update(imprint_data)
@@ -1571,7 +1931,7 @@ class ProductDetailScraper(BaseScraper):
 
             # Method 3: Fallback to HTML extraction
             if not imprint_info["Methods"]:
-                imprint_section = detail_soup.select_one("#pnlImprint")
+                imprint_section = SELECTORS["imprint_section"].first(detail_soup)
                 if imprint_section:
                     imprint_info = self.extract_imprint_from_html(imprint_section)
 
@@ -1608,15 +1968,13 @@ class ProductDetailScraper(BaseScraper):
 
         try:
             # Extract basic imprint info
-            for attr_div in imprint_section.select("div.product-attribute"):
-                header_elem = attr_div.select_one(
-                    "span.attribute-header, span.property-label"
-                )
+            for attr_div in SELECTORS["attribute"].all(imprint_section):
+                header_elem = SELECTORS["attribute_label"].first(attr_div)
                 if header_elem:
                     key = header_elem.get_text(strip=True).replace(":", "")
                     values = [
                         span.get_text(strip=True)
-                        for span in attr_div.select("span.ng-binding")
+                        for span in SELECTORS["binding"].all(attr_div)
                         if span.get_text(strip=True)
                     ]
                     if key and values:
@@ -1662,7 +2020,7 @@ class ProductDetailScraper(BaseScraper):
                             production_info[f"{attr_type}"] = attr_data["Values"]
 
             # Fallback to HTML extraction
-            options_section = detail_soup.select_one("#pnlOptions")
+            options_section = SELECTORS["options_section"].first(detail_soup)
             if options_section:
                 production_info.update(
                     self.extract_production_from_html(options_section)
@@ -1680,13 +2038,13 @@ class ProductDetailScraper(BaseScraper):
         production_info = {}
 
         try:
-            for attr_div in options_section.select("div.product-attribute"):
-                header_elem = attr_div.select_one("span.attribute-header")
+            for attr_div in SELECTORS["attribute"].all(options_section):
+                header_elem = SELECTORS["attribute_header"].first(attr_div)
                 if header_elem:
                     key = header_elem.get_text(strip=True)
                     values = [
                         span.get_text(strip=True)
-                        for span in attr_div.select("span.ng-binding")
+                        for span in SELECTORS["binding"].all(attr_div)
                         if span.get_text(strip=True)
                     ]
                     if key and values:
@@ -1729,7 +2087,7 @@ class ProductDetailScraper(BaseScraper):
                     ]
 
             # Extract from HTML as fallback
-            shipping_section = detail_soup.select_one("#pnlShipping")
+            shipping_section = SELECTORS["shipping_section"].first(detail_soup)
             if shipping_section:
                 shipping_info.update(self.extract_shipping_from_html(shipping_section))
 
@@ -1746,21 +2104,19 @@ class ProductDetailScraper(BaseScraper):
 
         try:
             # Extract production time
-            production_time_elem = shipping_section.select_one(
-                'div[ng-repeat*="ProductionTime"]'
-            )
+            production_time_elem = SELECTORS["production_time"].first(shipping_section)
             if production_time_elem:
                 shipping_info["ProductionTime"] = production_time_elem.get_text(
                     strip=True
                 )
 
             # Extract rush service
-            rush_elem = shipping_section.select_one('p[ng-if*="HasRushService"]')
+            rush_elem = SELECTORS["rush_service"].first(shipping_section)
             if rush_elem:
                 shipping_info["RushService"] = "Yes"
 
             # Extract country of origin
-            origin_elem = shipping_section.select_one('p[ng-if*="Origin"]')
+            origin_elem = SELECTORS["origin"].first(shipping_section)
             if origin_elem:
                 shipping_info["CountryOfOrigin"] = origin_elem.get_text(strip=True)
 
@@ -1782,7 +2138,7 @@ class ProductDetailScraper(BaseScraper):
                 safety_info["Certifications"] = angular_data["certifications"]
 
             # Extract from HTML as fallback
-            safety_section = detail_soup.select_one("#pnlSafety")
+            safety_section = SELECTORS["safety_section"].first(detail_soup)
             if safety_section:
                 safety_info.update(self.extract_safety_from_html(safety_section))
 
@@ -1799,21 +2155,21 @@ class ProductDetailScraper(BaseScraper):
 
         try:
             # Extract Prop 65 warnings
-            prop_warnings = safety_section.select('p[ng-repeat*="PROP"]')
+            prop_warnings = SELECTORS["prop65_warnings"].all(safety_section)
             if prop_warnings:
                 safety_info["Prop65Warnings"] = [
                     w.get_text(strip=True) for w in prop_warnings
                 ]
 
             # Extract safety warnings
-            safety_warnings = safety_section.select('p[ng-repeat*="SWCH"]')
+            safety_warnings = SELECTORS["safety_warnings"].all(safety_section)
             if safety_warnings:
                 safety_info["SafetyWarnings"] = [
                     w.get_text(strip=True) for w in safety_warnings
                 ]
 
             # Extract certifications
-            cert_elem = safety_section.select_one('p[ng-if*="Certifications"]')
+            cert_elem = SELECTORS["certifications"].first(safety_section)
             if cert_elem:
                 safety_info["Certifications"] = cert_elem.get_text(strip=True)
 
@@ -1840,7 +2196,7 @@ class ProductDetailScraper(BaseScraper):
                 )
 
             # Extract from HTML (including ASINumber)
-            supplier_section = detail_soup.select_one("#pnlSupplierInfo")
+            supplier_section = SELECTORS["supplier_section"].first(detail_soup)
             if supplier_section:
                 supplier_info.update(self.extract_supplier_from_html(supplier_section))
 
@@ -1857,12 +2213,12 @@ class ProductDetailScraper(BaseScraper):
 
         try:
             # Extract supplier name
-            name_elem = supplier_section.select_one(".supplier-name")
+            name_elem = SELECTORS["supplier_name"].first(supplier_section)
             if name_elem:
                 supplier_info["Name"] = name_elem.get_text(strip=True)
 
             # Extract ASINumber
-            asi_elem = supplier_section.select_one(".asi-num")
+            asi_elem = SELECTORS["asi_number"].first(supplier_section)
             if asi_elem:
                 asi_text = asi_elem.get_text(strip=True)
                 # Extract ASI number from "asi/61125" format
@@ -1871,17 +2227,17 @@ class ProductDetailScraper(BaseScraper):
                     supplier_info["ASINumber"] = asi_match.group(1)
 
             # Extract phone number
-            phone_elem = supplier_section.select_one(".col-xs-6.text-right div")
+            phone_elem = SELECTORS["supplier_phone"].first(supplier_section)
             if phone_elem:
                 supplier_info["Phone"] = phone_elem.get_text(strip=True)
 
             # Extract website
-            website_elem = supplier_section.select_one('a[href*="http"]')
+            website_elem = SELECTORS["supplier_website"].first(supplier_section)
             if website_elem:
                 supplier_info["Website"] = website_elem.get("href", "")
 
             # Extract fax
-            fax_elem = supplier_section.select_one('div:-soup-contains("Fax:")')
+            fax_elem = SELECTORS["supplier_fax"].first(supplier_section)
             if fax_elem:
                 fax_text = fax_elem.get_text(strip=True)
                 fax_match = re.search(r"Fax:\s*([^)]+)", fax_text)
@@ -1898,43 +2254,8 @@ class ProductDetailScraper(BaseScraper):
         return bool(re.match(r"^\$?\d+(\.\d+)?$", text.strip()))
 
     def get_scraped_ids(self):
-        scraped_ids = set()
-
-        # Check the main output file
-        if os.path.exists(self.OUTPUT_FILE):
-            with open(self.OUTPUT_FILE, "r") as f:
-                for line in f:
-                    try:
-                        data = json.loads(line)
-                        # Try multiple ID fields to be more robust
-                        if "ProductID" in data and data["ProductID"]:
-                            scraped_ids.add(str(data["ProductID"]))
-                        elif "id" in data and data["id"]:
-                            scraped_ids.add(str(data["id"]))
-                        elif "SourceURL" in data and data["SourceURL"]:
-                            # Extract product ID from URL as fallback
-                            import re
-
-                            url_match = re.search(r"productID=(\d+)", data["SourceURL"])
-                            if url_match:
-                                scraped_ids.add(url_match.group(1))
-                    except Exception:
-                        continue
-
-        # Also check the product index file if it exists
-        index_file = os.path.join(
-            os.path.dirname(self.OUTPUT_FILE), "product_index.json"
-        )
-        if os.path.exists(index_file):
-            try:
-                with open(index_file, "r") as f:
-                    index_data = json.load(f)
-                    for product_id in index_data.keys():
-                        scraped_ids.add(str(product_id))
-            except Exception as e:
-                logging.warning(f"⚠️ Could not read product index: {e}")
-
-        return scraped_ids
+        """IDs already in the output file, from the incremental product index"""
+        return self.product_index.sync().ids()
 
     def post_single_product_to_wordpress(self, product, api_url, api_key):
         """
@@ -2016,6 +2337,200 @@ class ProductDetailScraper(BaseScraper):
             logging.error(f"Failed to fetch existing products: {e}")
             return set(), set()
 
+    def spawn_worker(self, worker_id, cookies):
+        """Create a copy of this scraper with its own driver and the shared cookies"""
+        worker = copy.copy(self)
+        worker.worker_id = worker_id
+        worker.driver = None
+        worker._replacement = None
+        worker._setup_simple_driver()
+        worker._load_cookies_into_driver(cookies)
+        logging.info(f"🧵 Browser worker {worker_id} ready")
+        return worker
+
+    def _start_browser_workers(self):
+        """Return the scrapers to run pages on: this one plus any extra workers"""
+        worker_memory_mb = int(os.getenv("SCRAPER_WORKER_MEMORY_MB", "600"))
+        count = recommended_worker_count(self.workers, worker_memory_mb)
+        if count <= 1:
+            return [self]
+
+        # Extra workers reuse the cookies of the logged-in main driver
+        cookies = self.driver.get_cookies()
+        workers = [self]
+        with ThreadPoolExecutor(max_workers=count - 1) as executor:
+            futures = [
+                executor.submit(self.spawn_worker, worker_id, cookies)
+                for worker_id in range(1, count)
+            ]
+            for future in futures:
+                try:
+                    workers.append(future.result())
+                except Exception as e:
+                    logging.warning(f"⚠️ Could not start browser worker: {e}")
+
+        logging.info(f"🧵 Started {len(workers)} browser workers")
+        return workers
+
+    def _stop_browser_workers(self, workers):
+        """Quit the drivers of extra pool workers"""
+        for worker in workers:
+            if worker is not self:
+                worker.cleanup()
+
+    def _restart_driver(self):
+        """Replace a broken driver with a fresh logged-in one"""
+        self._retire_driver(self.driver, self._user_data_dir)
+        time.sleep(3)
+        self._setup_simple_driver()
+        # Workers share the session files, so only one logs in at a time
+        with self._login_lock:
+            self.login(force_relogin=False)
+
+    def _refresh_session(self):
+        """Reload the saved session cookies, logging in again only if stale"""
+        # Another worker may already have logged in and saved fresh cookies
+        with self._login_lock:
+            self.login(force_relogin=False)
+
+    def classify_failure(self, error):
+        """Sort a failed product scrape into one of the FAILURE_* classes"""
+        message = str(error).lower()
+        if isinstance(
+            error, (InvalidSessionIdException, NoSuchWindowException, ConnectionError)
+        ) or any(marker in message for marker in BROWSER_DEAD_MARKERS):
+            return FAILURE_BROWSER_DEAD
+
+        # A dead browser cannot even report its URL
+        try:
+            current_url = self.driver.current_url.lower()
+        except Exception:
+            return FAILURE_BROWSER_DEAD
+
+        if "login" in current_url or "asilogin" in current_url:
+            return FAILURE_SESSION_EXPIRED
+        if isinstance(error, TimeoutException):
+            return FAILURE_PAGE_TIMEOUT
+        return FAILURE_EXTRACTION_ERROR
+
+    def recover_from_failure(self, failure):
+        """Apply the cheapest remedy for a failure class; True if worth retrying"""
+        if failure == FAILURE_EXTRACTION_ERROR:
+            # The page loaded fine; trying it again would fail the same way
+            return False
+        if failure == FAILURE_PAGE_TIMEOUT:
+            try:
+                self.driver.execute_script("window.stop();")
+            except Exception:
+                pass
+            return True
+        if failure == FAILURE_SESSION_EXPIRED:
+            logging.info("🔑 Session expired, refreshing cookies...")
+            self._refresh_session()
+            return True
+
+        logging.info("🔄 Browser is gone, restarting the driver...")
+        self._restart_driver()
+        return True
+
+    def _recycle_reason(self):
+        """Why the current driver should be replaced now, or None"""
+        if time.time() < self._next_recycle_check:
+            return None
+        if self.recycle_after_pages and self._pages_on_driver >= self.recycle_after_pages:
+            return f"{self._pages_on_driver} pages"
+        if self.driver_memory_budget_mb:
+            rss_mb = driver_process_rss_mb(self.driver)
+            if rss_mb and rss_mb > self.driver_memory_budget_mb:
+                return f"{rss_mb:.0f}MB RSS"
+        return None
+
+    def _prepare_replacement_driver(self, cookies):
+        """Start a new driver carrying the current session cookies"""
+        driver, user_data_dir = self._create_driver()
+        try:
+            self._transfer_cookies(driver, cookies)
+        except Exception:
+            self._retire_driver(driver, user_data_dir)
+            raise
+        return driver, user_data_dir
+
+    @staticmethod
+    def _retire_driver(driver, user_data_dir):
+        """Quit a driver and remove its profile directory"""
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        if user_data_dir:
+            shutil.rmtree(user_data_dir, ignore_errors=True)
+
+    def maybe_recycle_driver(self):
+        """Count a finished page; swap in a fresh driver when one is due and ready"""
+        self._pages_on_driver += 1
+
+        replacement = self._replacement
+        if replacement is not None:
+            if not replacement.done():
+                return  # Keep scraping on the old driver meanwhile
+            self._replacement = None
+            try:
+                driver, user_data_dir = replacement.result()
+            except Exception as e:
+                logging.warning(f"⚠️ Replacement driver failed to start: {e}")
+                self._next_recycle_check = time.time() + 60
+                return
+
+            old_driver, old_user_data_dir = self.driver, self._user_data_dir
+            self.driver, self._user_data_dir = driver, user_data_dir
+            self._pages_on_driver = 0
+            threading.Thread(
+                target=self._retire_driver,
+                args=(old_driver, old_user_data_dir),
+                daemon=True,
+            ).start()
+            logging.info("♻️ Swapped in a fresh Chrome driver")
+            return
+
+        reason = self._recycle_reason()
+        if not reason:
+            return
+
+        # Cookies come from the live driver, so the new one needs no login
+        logging.info(f"♻️ Recycling Chrome driver after {reason}, starting replacement")
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="driver-recycle")
+        self._replacement = executor.submit(
+            self._prepare_replacement_driver, self.driver.get_cookies()
+        )
+        executor.shutdown(wait=False)
+
+    def _load_product_page(self, url):
+        """Open a product page and wait for it to render; False if it never did"""
+        self.driver.get(url)
+        try:
+            # Poll in JS: find_element would stall on the implicit wait
+            WebDriverWait(self.driver, 30, poll_frequency=0.1).until(
+                lambda driver: driver.execute_script(PAGE_READY_SCRIPT)
+            )
+            return True
+        except Exception:
+            # Try alternative selectors
+            alternative_selectors = [
+                "h3.text-primary",
+                ".product-info",
+                "span.product-number",
+                "body",
+            ]
+            for selector in alternative_selectors:
+                try:
+                    WebDriverWait(self.driver, 10).until(  # Increased from 5 to 10
+                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+                    )
+                    return True
+                except:
+                    continue
+            return False
+
     def scrape_all_details(self, force_relogin=False, mode="scrape"):
         self.login(force_relogin=force_relogin)
         product_links = self.read_product_links()
@@ -2131,12 +2646,16 @@ class ProductDetailScraper(BaseScraper):
         )
 
         # --- Hardcoded Robust Rate Limiting ---
-        max_requests_per_minute = 25
+        # One budget for all browser workers, so more browsers never means
+        # more requests per minute against ESP
+        max_requests_per_minute = int(
+            os.getenv("SCRAPER_MAX_REQUESTS_PER_MINUTE", "25")
+        )
         # Smaller batch size for GitHub Actions to ensure batch files are created
         batch_size = 5 if os.getenv("GITHUB_ACTIONS") == "true" else 15
         batch_pause = 5
         min_delay = 1.5
-        request_times = collections.deque()
+        rate_budget = RateBudget(max_requests_per_minute, min_delay)
 
         batch = []
         api_url = os.getenv("WP_API_URL")  # Optional - can be empty
@@ -2150,22 +2669,6 @@ class ProductDetailScraper(BaseScraper):
                 "⚠️ WordPress integration not configured - data will be saved locally only"
             )
 
-        def rate_limit_pause():
-            now = time.time()
-            # Remove requests older than 60 seconds
-            while request_times and now - request_times[0] > 60:
-                request_times.popleft()
-            if len(request_times) >= max_requests_per_minute:
-                wait_time = 60 - (now - request_times[0])
-                if wait_time > 0 and wait_time < 30:  # never sleep too long
-                    time.sleep(wait_time)
-            # Enforce minimum delay between requests
-            if request_times and now - request_times[-1] < min_delay:
-                delay = min_delay - (now - request_times[-1])
-                if delay > 0 and delay < 10:
-                    time.sleep(delay)
-            request_times.append(time.time())
-
         def save_batch_to_file(batch_data, batch_num=None):
             """Save batch to file with better naming"""
             if not batch_data:
@@ -2177,131 +2680,125 @@ class ProductDetailScraper(BaseScraper):
 
             batch_filename = f"batch_{batch_num}_{len(batch_data)}.jsonl"
             try:
+                # Serialize once; with a product store both copies are
+                # lightweight references to the same blobs
+                lines = [
+                    json.dumps(
+                        self.product_store.make_ref(product)
+                        if self.product_store
+                        else product
+                    )
+                    + "\n"
+                    for product in batch_data
+                ]
                 with open(batch_filename, "w", encoding="utf-8") as batch_file:
-                    for product in batch_data:
-                        batch_file.write(json.dumps(product) + "\n")
+                    batch_file.writelines(lines)
 
                 # Also save to data directory for backup
                 data_batch_filename = os.path.join("espscraper/data", batch_filename)
                 with open(data_batch_filename, "w", encoding="utf-8") as batch_file:
-                    for product in batch_data:
-                        batch_file.write(json.dumps(product) + "\n")
+                    batch_file.writelines(lines)
 
             except Exception as e:
                 logging.error(f"❌ Failed to save batch file: {e}")
 
-        # Open file in append mode to add new products to the end
-        with open(self.OUTPUT_FILE, "a", encoding="utf-8") as f_out:
-            batch_counter = 0
-            products_scraped = 0
-            for i, link_info in enumerate(links_to_process):
-                url = link_info.get("url")
-                product_id = link_info.get("id")
-                if not url or not product_id:
-                    continue
-                # Update heartbeat every 20 seconds
+        # Output file, batch and counters are shared by the browser workers
+        results_lock = threading.Lock()
+        batch_counter = 0
+        products_scraped = 0
+
+        def record_product(scraped_data):
+            """Append a scraped product to the output and the current batch"""
+            nonlocal batch, batch_counter, products_scraped
+            full_batch = None
+            with results_lock:
+                # Append to the main output file (adds to end of file)
+                line = json.dumps(scraped_data) + "\n"
+                f_out.write(line)
+                f_out.flush()  # Ensure data is written immediately
+                self.product_index.add(scraped_data, line)
+                products_scraped += 1
+                batch.append(scraped_data)
+                # Create batch files more frequently
+                if len(batch) >= batch_size:
+                    batch_counter += 1
+                    full_batch, batch = batch, []
+                    full_batch_number = batch_counter
+            logging.info(f"   ✅ Scraped: {scraped_data.get('Name', 'N/A')}")
+
+            # LIVE STREAMING: Send immediately to WordPress
+            if api_url and api_key:
+                self.post_single_product_to_wordpress(scraped_data, api_url, api_key)
+                logging.info(f"   🚀 Live streamed to WordPress")
+
+            if full_batch:
+                save_batch_to_file(full_batch, full_batch_number)
+                # Post batch to WordPress (as backup)
+                self.post_batch_to_wordpress(full_batch, api_url, api_key)
+
+        def process_link(scraper, item):
+            """Scrape one product page with the given (worker) scraper"""
+            nonlocal last_heartbeat
+            i, link_info = item
+            url = link_info.get("url")
+            product_id = link_info.get("id")
+            if not url or not product_id:
+                return
+            # Update heartbeat every 20 seconds
+            with results_lock:
                 if time.time() - last_heartbeat > 20:
                     update_heartbeat(
                         f"running: product {i+1} of {len(links_to_process)}"
                     )
                     last_heartbeat = time.time()
 
-                logging.info(
-                    f"--- ({i+1}/{len(links_to_process)}) Processing Product ID: {product_id}"
-                )
-
-                # --- Rate limiting before each request ---
-                rate_limit_pause()
+            logging.info(
+                f"--- ({i+1}/{len(links_to_process)}) Processing Product ID: {product_id}"
+            )
 
-                # Simple scraping without window switching
+            # Simple scraping without window switching
+            scraped_data = scraper.scrape_product_with_recovery(url, product_id)
+            if scraped_data:
                 try:
-                    # Load the product page directly
-                    self.driver.get(url)
-                    # Wait for the page to load with a more flexible approach
-                    try:
-                        WebDriverWait(self.driver, 30).until(  # Increased from 15 to 30
-                            EC.presence_of_element_located(
-                                (By.CSS_SELECTOR, "#productDetailsMain")
-                            )
-                        )
-                    except Exception as e:
-                        # Try alternative selectors
-                        alternative_selectors = [
-                            "h3.text-primary",
-                            ".product-info",
-                            "span.product-number",
-                            "body",
-                        ]
-                        element_found = False
-                        for selector in alternative_selectors:
-                            try:
-                                WebDriverWait(
-                                    self.driver, 10
-                                ).until(  # Increased from 5 to 10
-                                    EC.presence_of_element_located(
-                                        (By.CSS_SELECTOR, selector)
-                                    )
-                                )
-                                element_found = True
-                                break
-                            except:
-                                continue
-                        if not element_found:
-                            continue
-
-                    scraped_data = self.scrape_product_detail_page()
-                    scraped_data["SourceURL"] = url
-
-                    # Append to the main output file (adds to end of file)
-                    f_out.write(json.dumps(scraped_data) + "\n")
-                    f_out.flush()  # Ensure data is written immediately
-                    products_scraped += 1
-                    batch.append(scraped_data)
-                    logging.info(f"   ✅ Scraped: {scraped_data.get('Name', 'N/A')}")
-
-                    # LIVE STREAMING: Send immediately to WordPress
-                    if api_url and api_key:
-                        self.post_single_product_to_wordpress(
-                            scraped_data, api_url, api_key
-                        )
-                        logging.info(f"   🚀 Live streamed to WordPress")
-
-                    # Create batch files more frequently
-                    if len(batch) >= batch_size:
-                        batch_counter += 1
-                        save_batch_to_file(batch, batch_counter)
-
-                        # Post batch to WordPress (as backup)
-                        self.post_batch_to_wordpress(batch, api_url, api_key)
-                        batch = []
-
+                    record_product(scraped_data)
+                    scraper.maybe_recycle_driver()
+                    return
                 except Exception as e:
                     logging.error(
-                        f"❌ FAILED to scrape page for Product ID {product_id}. Error: {e}"
+                        f"❌ FAILED to save Product ID {product_id}. Error: {e}"
                     )
-                    # Simple error recovery - just restart the driver
-                    try:
-                        self.driver.quit()
-                        time.sleep(3)
-                        self._setup_simple_driver()
-                        # Re-login if needed
-                        self.login(force_relogin=False)
-                    except Exception as restart_e:
-                        logging.warning(f"⚠️ Could not restart driver: {restart_e}")
-                    # Log the failed product ID for later retry
-                    try:
-                        with open("failed_products.txt", "a") as fail_log:
-                            fail_log.write(f"{product_id}\n")
-                    except Exception as log_e:
-                        logging.warning(f"⚠️ Could not log failed product ID: {log_e}")
-                    # Add delay before continuing to next product
-                    time.sleep(3)
-                    continue
 
-                # --- Batch pause after every batch_size products ---
-                if (i + 1) % batch_size == 0 and (i + 1) < len(links_to_process):
-                    logging.info(f"⏸️ Batch pause after {batch_size} products...")
-                    time.sleep(batch_pause)
+            # Log the failed product ID for later retry
+            try:
+                with results_lock:
+                    with open("failed_products.txt", "a") as fail_log:
+                        fail_log.write(f"{product_id}\n")
+            except Exception as log_e:
+                logging.warning(f"⚠️ Could not log failed product ID: {log_e}")
+
+        # Open file in append mode to add new products to the end
+        with open_jsonl(self.OUTPUT_FILE, "a") as f_out:
+            workers = self._start_browser_workers()
+            try:
+                if len(workers) > 1:
+                    pool = BrowserWorkerPool(workers, rate_budget)
+                    pool.run(enumerate(links_to_process), process_link)
+                else:
+                    for i, link_info in enumerate(links_to_process):
+                        # --- Rate limiting before each request ---
+                        rate_budget.acquire()
+                        process_link(self, (i, link_info))
+
+                        # --- Batch pause after every batch_size products ---
+                        if (i + 1) % batch_size == 0 and (i + 1) < len(
+                            links_to_process
+                        ):
+                            logging.info(
+                                f"⏸️ Batch pause after {batch_size} products..."
+                            )
+                            time.sleep(batch_pause)
+            finally:
+                self._stop_browser_workers(workers)
 
             # Save final batch if any products remain
             if batch:
@@ -2310,6 +2807,9 @@ class ProductDetailScraper(BaseScraper):
 
                 # Post final batch to WordPress (as backup, since products were already live streamed)
                 self.post_batch_to_wordpress(batch, api_url, api_key)
+        # Output file is closed, so its size is final for the index
+        self.product_index.save()
+
         # Final heartbeat update
         update_heartbeat("finished")
 
@@ -2344,11 +2844,11 @@ class ProductDetailScraper(BaseScraper):
                 product_links_map = {
                     str(link.get("id")): link for link in product_links
                 }
-                scraped_ids = self.get_scraped_ids()
+                self.product_index.sync()
 
-                with open(self.OUTPUT_FILE, "a", encoding="utf-8") as f_out:
+                with open_jsonl(self.OUTPUT_FILE, "a") as f_out:
                     for product_id in failed_ids:
-                        if product_id in scraped_ids:
+                        if product_id in self.product_index:
                             continue
 
                         link_info = product_links_map.get(product_id)
@@ -2358,54 +2858,29 @@ class ProductDetailScraper(BaseScraper):
                         url = link_info.get("url")
 
                         try:
-                            self.driver.get(url)
-
-                            # Wait for page load with better error handling
-                            try:
-                                WebDriverWait(
-                                    self.driver, 30
-                                ).until(  # Increased from 15 to 30
-                                    EC.presence_of_element_located(
-                                        (By.CSS_SELECTOR, "#productDetailsMain")
-                                    )
-                                )
-                            except Exception as e:
-                                # Try alternative selectors
-                                alternative_selectors = [
-                                    "h3.text-primary",
-                                    ".product-info",
-                                    "span.product-number",
-                                    "body",
-                                ]
-                                element_found = False
-                                for selector in alternative_selectors:
-                                    try:
-                                        WebDriverWait(
-                                            self.driver, 10
-                                        ).until(  # Increased from 5 to 10
-                                            EC.presence_of_element_located(
-                                                (By.CSS_SELECTOR, selector)
-                                            )
-                                        )
-                                        element_found = True
-                                        break
-                                    except:
-                                        continue
-                                if not element_found:
-                                    continue
-
-                            scraped_data = self.scrape_product_detail_page()
+                            scraped_data = self.scrape_product(url, product_id)
                             if scraped_data:
-                                scraped_data["SourceURL"] = url
-                                f_out.write(json.dumps(scraped_data) + "\n")
+                                line = json.dumps(scraped_data) + "\n"
+                                f_out.write(line)
                                 f_out.flush()
+                                self.product_index.add(scraped_data, line)
+                                self.maybe_recycle_driver()
                         except Exception as e:
+                            failure = self.classify_failure(e)
                             logging.error(
-                                f"❌ [RETRY] FAILED to scrape page for Product ID {product_id}. Error: {e}"
+                                f"❌ [RETRY] FAILED to scrape page for Product ID {product_id} ({failure}). Error: {e}"
                             )
+                            try:
+                                self.recover_from_failure(failure)
+                            except Exception as recover_e:
+                                logging.warning(
+                                    f"⚠️ Could not recover from {failure}: {recover_e}"
+                                )
 
                         time.sleep(2)
 
+                self.product_index.save()
+
                 # Clean up retry driver
                 try:
                     self.driver.quit()
@@ -2437,6 +2912,18 @@ class ProductDetailScraper(BaseScraper):
 
     def cleanup(self):
         """Clean up Chrome driver and temporary user data directories"""
+        if not getattr(self, "_owns_driver", True):
+            return  # A caller-supplied driver is the caller's to close
+
+        # A replacement driver may still be starting in the background
+        replacement = getattr(self, "_replacement", None)
+        if replacement is not None:
+            self._replacement = None
+            try:
+                self._retire_driver(*replacement.result(timeout=60))
+            except Exception:
+                pass
+
         try:
             if self.driver:
                 self.driver.quit()
@@ -2445,6 +2932,14 @@ class ProductDetailScraper(BaseScraper):
         except Exception as e:
             logging.warning(f"⚠️ Failed to close Chrome driver: {e}")
 
+        # Pool workers only remove their own profile; the main scraper sweeps all
+        if getattr(self, "worker_id", None) is not None:
+            import shutil
+
+            if getattr(self, "_user_data_dir", None):
+                shutil.rmtree(self._user_data_dir, ignore_errors=True)
+            return
+
         # Clean up any temporary Chrome user data directories
         try:
             import shutil
@@ -2541,6 +3036,32 @@ def main():
         action="store_true",
         help="Enable real-time connection monitoring.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("SCRAPER_WORKERS", "1")),
+        help="Number of browser workers (0 = size from available CPU and memory).",
+    )
+    parser.add_argument(
+        "--page-load-strategy",
+        choices=PAGE_LOAD_STRATEGIES,
+        default=None,
+        help="Chrome pageLoadStrategy (default: SCRAPER_PAGE_LOAD_STRATEGY or eager).",
+    )
+    parser.add_argument(
+        "--block-resources",
+        type=str,
+        default=None,
+        help=f"Comma-separated resource categories or URL patterns to block "
+        f"({', '.join(BLOCKED_RESOURCE_PATTERNS)}; 'none' disables; "
+        f"default: {DEFAULT_BLOCKED_RESOURCES}).",
+    )
+    parser.add_argument(
+        "--capture-xhr",
+        action="store_true",
+        default=None,
+        help="Read product JSON from the page's XHRs instead of parsing the DOM.",
+    )
     args = parser.parse_args()
     if args.overwrite_output:
         output_file = args.output_file or os.getenv(
@@ -2559,6 +3080,10 @@ def main():
         max_retries=args.max_retries,
         batch_retry_limit=args.batch_retry_limit,
         debug_mode=args.debug_mode,
+        workers=args.workers,
+        page_load_strategy=args.page_load_strategy,
+        blocked_resources=args.block_resources,
+        capture_xhr=args.capture_xhr,
     )
     # Batching logic
     if args.batch_size is not None and args.batch_number is not None:
@@ -15,10 +15,18 @@ from typing import Dict, List, Optional, Tuple, Set
 from dataclasses import dataclass
 from datetime import datetime
 import hashlib
+import html
+import time
+
+# WooCommerce rejects batch requests with more than 100 objects
+WC_BATCH_LIMIT = 100
 
 # Add the espscraper directory to the path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "espscraper"))
 
+from espscraper.jsonl_io import open_jsonl
+from espscraper.product_store import materialize_product
+
 
 @dataclass
 class ImportConfig:
@@ -39,6 +47,11 @@ class ImportConfig:
     handle_pricing_tables: bool = True
     handle_supplier_info: bool = True
     handle_imprinting_info: bool = True
+    # Send batches through /wc/v3/products/batch (falls back per product)
+    use_batch_endpoint: bool = True
+    # Product category term cache, persisted between runs
+    category_cache_file: str = None  # defaults to WP_CATEGORY_CACHE_FILE env
+    category_cache_ttl: int = 24 * 3600
 
 
 @dataclass
@@ -84,6 +97,23 @@ class WordPressImporter:
             "end_time": None,
         }
 
+        # Product ID / SKU -> WordPress ID, prefetched once per import session
+        self._wp_ids_by_product_id = None
+        self._wp_ids_by_sku = None
+        self._existing_map_failed = False
+
+        # Source image URL -> media ID, so an image is uploaded at most once
+        self._media_ids = {}
+
+        # Normalized category name -> product_cat term ID
+        self._category_ids = None
+        self._category_total = 0  # Remote term count when the cache was built
+        self._category_fetched_at = 0
+        self._category_map_complete = False  # Only a complete map is saved
+        self.category_cache_file = config.category_cache_file or os.getenv(
+            "WP_CATEGORY_CACHE_FILE", "wp_category_cache.json"
+        )
+
     def _setup_session(self):
         """Setup requests session with authentication"""
         headers = {
@@ -100,41 +130,41 @@ class WordPressImporter:
                 self.config.basic_auth_user, self.config.basic_auth_pass
             )
 
-    def get_existing_products(self) -> Tuple[Set[str], Set[str]]:
-        """Fetch existing products from WordPress"""
-        if not self.config.api_url or not self.config.api_key:
-            return set(), set()
+    def _fetch_existing_products(self) -> List[Dict]:
+        """Product list from the plugin's existing-products endpoint (raises on error)"""
+        # Construct existing products endpoint
+        if self.config.api_url.endswith("/upload"):
+            existing_url = self.config.api_url.replace("/upload", "/existing-products")
+        else:
+            existing_url = self.config.api_url.rstrip("/") + "/existing-products"
 
-        try:
-            # Construct existing products endpoint
-            if self.config.api_url.endswith("/upload"):
-                existing_url = self.config.api_url.replace(
-                    "/upload", "/existing-products"
-                )
-            else:
-                existing_url = self.config.api_url.rstrip("/") + "/existing-products"
+        headers = {"X-API-Key": self.config.api_key}
 
-            headers = {"X-API-Key": self.config.api_key}
+        # Add basic auth if configured
+        auth = None
+        if self.config.basic_auth_user and self.config.basic_auth_pass:
+            from requests.auth import HTTPBasicAuth
 
-            # Add basic auth if configured
-            auth = None
-            if self.config.basic_auth_user and self.config.basic_auth_pass:
-                from requests.auth import HTTPBasicAuth
+            auth = HTTPBasicAuth(
+                self.config.basic_auth_user, self.config.basic_auth_pass
+            )
 
-                auth = HTTPBasicAuth(
-                    self.config.basic_auth_user, self.config.basic_auth_pass
-                )
+        response = self.session.get(
+            existing_url, headers=headers, auth=auth, timeout=30
+        )
+        response.raise_for_status()
+        return response.json().get("products", [])
 
-            response = self.session.get(
-                existing_url, headers=headers, auth=auth, timeout=30
-            )
-            response.raise_for_status()
+    def get_existing_products(self) -> Tuple[Set[str], Set[str]]:
+        """Fetch existing products from WordPress"""
+        if not self.config.api_url or not self.config.api_key:
+            return set(), set()
 
-            data = response.json()
+        try:
             product_ids = set()
             skus = set()
 
-            for product in data.get("products", []):
+            for product in self._fetch_existing_products():
                 if product.get("product_id"):
                     product_ids.add(str(product["product_id"]))
                 if product.get("sku"):
@@ -149,50 +179,33 @@ class WordPressImporter:
             logging.error(f"❌ Failed to fetch existing products: {e}")
             return set(), set()
 
+    def _existing_products_with_dates(self, products: List[Dict]) -> Dict[str, Dict]:
+        """Key an existing-products listing by product ID"""
+        existing_products = {}
+        for product in products:
+            product_id = str(product.get("product_id"))
+            if product_id:
+                existing_products[product_id] = {
+                    "product_id": product_id,
+                    "sku": product.get("sku", ""),
+                    "name": product.get("name", ""),
+                    "wordpress_id": product.get("wp_id"),
+                    "scraped_date": product.get("scraped_date"),
+                    "last_modified": product.get("last_modified"),
+                }
+        return existing_products
+
     def get_existing_products_with_dates(self) -> Dict[str, Dict]:
         """Fetch existing products with their scraped dates for sync comparison"""
         if not self.config.api_url or not self.config.api_key:
             return {}
 
         try:
-            # Construct existing products endpoint
-            if self.config.api_url.endswith("/upload"):
-                existing_url = self.config.api_url.replace(
-                    "/upload", "/existing-products"
-                )
-            else:
-                existing_url = self.config.api_url.rstrip("/") + "/existing-products"
-
-            headers = {"X-API-Key": self.config.api_key}
-
-            # Add basic auth if configured
-            auth = None
-            if self.config.basic_auth_user and self.config.basic_auth_pass:
-                from requests.auth import HTTPBasicAuth
-
-                auth = HTTPBasicAuth(
-                    self.config.basic_auth_user, self.config.basic_auth_pass
-                )
-
-            response = self.session.get(
-                existing_url, headers=headers, auth=auth, timeout=30
+            existing_products = self._existing_products_with_dates(
+                self._fetch_existing_products()
             )
-            response.raise_for_status()
-
-            data = response.json()
-            existing_products = {}
-
-            for product in data.get("products", []):
-                product_id = str(product.get("product_id"))
-                if product_id:
-                    existing_products[product_id] = {
-                        "product_id": product_id,
-                        "sku": product.get("sku", ""),
-                        "name": product.get("name", ""),
-                        "wordpress_id": product.get("wp_id"),
-                        "scraped_date": product.get("scraped_date"),
-                        "last_modified": product.get("last_modified"),
-                    }
+            # The same listing answers "does this product exist?" during import
+            self._index_existing_products(existing_products)
 
             logging.info(
                 f"📊 Found {len(existing_products)} existing products with dates"
@@ -203,6 +216,49 @@ class WordPressImporter:
             logging.error(f"❌ Failed to fetch existing products with dates: {e}")
             return {}
 
+    def _index_existing_products(self, existing_products: Dict[str, Dict]):
+        """Build the product ID/SKU -> WordPress ID maps from existing products"""
+        self._wp_ids_by_product_id = {}
+        self._wp_ids_by_sku = {}
+        for product_id, info in existing_products.items():
+            wordpress_id = info.get("wordpress_id")
+            self._wp_ids_by_product_id[str(product_id)] = wordpress_id
+            if info.get("sku"):
+                self._wp_ids_by_sku[str(info["sku"])] = wordpress_id
+
+    def _load_existing_product_map(self) -> bool:
+        """Prefetch the existing product map once; False if it's unavailable"""
+        if self._wp_ids_by_product_id is not None:
+            return True
+        if self._existing_map_failed or not (
+            self.config.api_url and self.config.api_key
+        ):
+            return False
+
+        try:
+            self._index_existing_products(
+                self._existing_products_with_dates(self._fetch_existing_products())
+            )
+            logging.info(
+                f"📊 Prefetched {len(self._wp_ids_by_product_id)} existing products"
+            )
+            return True
+        except Exception as e:
+            logging.warning(
+                f"⚠️ Could not prefetch existing products, looking up one by one: {e}"
+            )
+            self._existing_map_failed = True
+            return False
+
+    def _remember_product(self, product_data: Dict, wordpress_id: Optional[int]):
+        """Record an imported product in the existing product map"""
+        if self._wp_ids_by_product_id is None or not wordpress_id:
+            return
+        if product_data.get("ProductID"):
+            self._wp_ids_by_product_id[str(product_data["ProductID"])] = wordpress_id
+        if product_data.get("SKU"):
+            self._wp_ids_by_sku[str(product_data["SKU"])] = wordpress_id
+
     def sync_products_from_file(self, input_file: str) -> SyncResult:
         """Sync products from a scraped data file, comparing scrapedDate"""
         if not os.path.exists(input_file):
@@ -216,10 +272,10 @@ class WordPressImporter:
 
         # Read scraped products
         scraped_products = []
-        with open(input_file, "r") as f:
+        with open_jsonl(input_file, "r") as f:
             for line in f:
                 try:
-                    product_data = json.loads(line)
+                    product_data = materialize_product(json.loads(line))
                     scraped_products.append(product_data)
                 except Exception as e:
                     logging.warning(f"⚠️ Invalid JSON line in {input_file}: {e}")
@@ -315,8 +371,10 @@ class WordPressImporter:
         logging.info(f"✅ Sync completed in {sync_result.sync_duration:.1f}s")
         return sync_result
 
-    def import_single_product(self, product_data: Dict) -> ImportResult:
-        """Import a single product to WordPress"""
+    def import_single_product(
+        self, product_data: Dict, existing_id: Optional[int] = None
+    ) -> ImportResult:
+        """Import a single product to WordPress (existing_id skips the lookup)"""
         start_time = datetime.now()
 
         try:
@@ -330,7 +388,8 @@ class WordPressImporter:
                 )
 
             # Check if product already exists
-            existing_id = self._get_existing_product_id(product_data)
+            if not existing_id:
+                existing_id = self._get_existing_product_id(product_data)
 
             if existing_id:
                 # Update existing product
@@ -343,10 +402,9 @@ class WordPressImporter:
 
             if result["success"]:
                 wordpress_id = result.get("id", existing_id)
-
-                # Handle additional features
-                if self.config.enable_woocommerce_features:
-                    self._handle_woocommerce_features(wordpress_id, product_data)
+                self._remember_product(product_data, wordpress_id)
+                if self._images_enabled():
+                    self._attach_product_images(wordpress_id, product_data)
 
                 return ImportResult(
                     success=True,
@@ -378,25 +436,263 @@ class WordPressImporter:
 
     def import_batch(self, products: List[Dict]) -> List[ImportResult]:
         """Import a batch of products"""
-        results = []
+        if (
+            self.config.enable_woocommerce_features
+            and self.config.create_product_categories
+        ):
+            # Create every missing category once, before any product needs it
+            self._ensure_categories(products)
+
+        if self.config.use_batch_endpoint:
+            results = []
+            chunk_size = max(1, min(self.config.batch_size, WC_BATCH_LIMIT))
+            for i in range(0, len(products), chunk_size):
+                results.extend(self._import_chunk(products[i : i + chunk_size]))
+        else:
+            results = [self.import_single_product(product) for product in products]
 
-        for product in products:
-            result = self.import_single_product(product)
-            results.append(result)
-
-            # Update statistics
-            self.stats["total_processed"] += 1
-            if result.action == "created":
-                self.stats["created"] += 1
-            elif result.action == "updated":
-                self.stats["updated"] += 1
-            elif result.action == "skipped":
-                self.stats["skipped"] += 1
-            elif result.action == "error":
-                self.stats["errors"] += 1
+        for result in results:
+            self._record_result(result)
+
+        return results
+
+    def _record_result(self, result: ImportResult):
+        """Update statistics for one import result"""
+        self.stats["total_processed"] += 1
+        if result.action == "created":
+            self.stats["created"] += 1
+        elif result.action == "updated":
+            self.stats["updated"] += 1
+        elif result.action == "skipped":
+            self.stats["skipped"] += 1
+        elif result.action == "error":
+            self.stats["errors"] += 1
+
+    def _import_chunk(self, products: List[Dict]) -> List[ImportResult]:
+        """Create/update up to WC_BATCH_LIMIT products with one batch request"""
+        start_time = time.time()
+        results = [None] * len(products)
+        create, update = [], []  # (index in products, WooCommerce payload)
+
+        for index, product_data in enumerate(products):
+            if not self._validate_product_data(product_data):
+                results[index] = ImportResult(
+                    success=False,
+                    product_id=product_data.get("ProductID"),
+                    action="error",
+                    error_message="Invalid product data",
+                )
+                continue
+            try:
+                payload = self._prepare_woocommerce_product_data(product_data)
+                existing_id = self._get_existing_product_id(product_data)
+            except Exception as e:
+                results[index] = ImportResult(
+                    success=False,
+                    product_id=product_data.get("ProductID"),
+                    action="error",
+                    error_message=str(e),
+                )
+                continue
+            if existing_id:
+                payload["id"] = existing_id
+                update.append((index, payload))
+            else:
+                create.append((index, payload))
+
+        if create or update:
+            response = self._post_products_batch(
+                [(index, payload, "created") for index, payload in create],
+                [(index, payload, "updated") for index, payload in update],
+            )
+            if response is None:
+                # No batch endpoint on this site: import these one at a time.
+                # Nothing was uploaded for the prepared payloads, and the
+                # existing IDs are reused instead of looked up again
+                for index, payload in create + update:
+                    results[index] = self.import_single_product(
+                        products[index], existing_id=payload.get("id")
+                    )
+                return results
+
+            elapsed = (time.time() - start_time) / len(products)
+            for index, payload, action, item in response:
+                results[index] = self._batch_item_result(
+                    products[index], item, action, payload.get("id"), elapsed
+                )
+
+            if self._images_enabled():
+                self._attach_batch_images(
+                    [
+                        (products[index], results[index].wordpress_id)
+                        for index, _ in create + update
+                        if results[index].success
+                    ]
+                )
 
         return results
 
+    def _batch_item_result(
+        self,
+        product_data: Dict,
+        item: Optional[Dict],
+        action: str,
+        existing_id: Optional[int],
+        processing_time: float,
+    ) -> ImportResult:
+        """Map one entry of a batch response back to an ImportResult"""
+        product_id = product_data.get("ProductID")
+        if not item or item.get("error"):
+            error = (item or {}).get("error") or {}
+            return ImportResult(
+                success=False,
+                product_id=product_id,
+                action="error",
+                error_message=error.get("message", "Missing from batch response"),
+                processing_time=processing_time,
+            )
+        wordpress_id = item.get("id", existing_id)
+        self._remember_product(product_data, wordpress_id)
+        return ImportResult(
+            success=True,
+            product_id=product_id,
+            wordpress_id=wordpress_id,
+            action=action,
+            processing_time=processing_time,
+        )
+
+    def _post_products_batch(
+        self,
+        create: List[Tuple[int, Dict, str]],
+        update: List[Tuple[int, Dict, str]],
+    ) -> Optional[List[Tuple[int, Dict, str, Optional[Dict]]]]:
+        """Send (index, payload, action) items through /wc/v3/products/batch
+
+        Returns (index, payload, action, response item) for every item, or
+        None if the endpoint is missing. Updates are safe to re-send, but
+        creates are only retried when the failed request cannot have been
+        processed, or after the existing product map shows which of them
+        WooCommerce created anyway.
+        """
+        url = f"{self.config.base_url}/wp-json/wc/v3/products/batch"
+        headers = {"Authorization": f"Bearer {self.config.api_key}"}
+        unverified = []  # Creates that may have been applied; never re-sent
+        unverified_error = None
+
+        last_error = None
+        for attempt in range(max(1, self.config.retry_attempts)):
+            body = {}
+            if create:
+                body["create"] = [payload for _, payload, _ in create]
+            if update:
+                body["update"] = [payload for _, payload, _ in update]
+            if not body:
+                break
+
+            processed = True  # Whether the server may have applied the batch
+            try:
+                # A full batch takes far longer to process than one product
+                response = self.session.post(
+                    url, json=body, headers=headers, timeout=self.config.timeout * 4
+                )
+                if response.status_code == 404:
+                    logging.warning(
+                        "⚠️ WooCommerce batch endpoint not found, importing one by one"
+                    )
+                    self.config.use_batch_endpoint = False
+                    return None
+                if response.status_code in [200, 201]:
+                    logging.info(
+                        f"📦 Batch import: {len(create)} to create, {len(update)} to update"
+                    )
+                    data = response.json()
+                    return (
+                        self._pair_batch_items(create, data.get("create"))
+                        + self._pair_batch_items(update, data.get("update"))
+                        + self._pair_batch_items(unverified, None, unverified_error)
+                    )
+                last_error = f"HTTP {response.status_code}: {response.text[:200]}"
+                # 4xx rejects the request as a whole; 5xx may come mid-batch
+                processed = response.status_code >= 500
+            except requests.exceptions.ConnectTimeout as e:
+                last_error = str(e)
+                processed = False
+            except Exception as e:
+                last_error = str(e)
+            logging.warning(
+                f"⚠️ Batch request failed (attempt {attempt + 1}): {last_error}"
+            )
+            if attempt + 1 >= self.config.retry_attempts:
+                break
+            if processed and create:
+                create, created, unknown = self._recheck_created(create)
+                update = update + created
+                unverified += unknown
+                unverified_error = (
+                    f"{last_error}; not re-sent as it may already have been created"
+                )
+            time.sleep(2**attempt)
+
+        # Every remaining item is reported with the batch error
+        last_error = last_error or "Batch request failed"
+        return self._pair_batch_items(
+            create + update, None, last_error
+        ) + self._pair_batch_items(unverified, None, unverified_error)
+
+    @staticmethod
+    def _pair_batch_items(
+        items: List[Tuple[int, Dict, str]],
+        returned: Optional[List[Dict]],
+        error: Optional[str] = None,
+    ) -> List[Tuple[int, Dict, str, Optional[Dict]]]:
+        """Attach the response item (or an error item) to each sent item"""
+        if returned is None:
+            returned = [{"id": 0, "error": {"message": error}} for _ in items]
+        paired = []
+        for position, (index, payload, action) in enumerate(items):
+            item = returned[position] if position < len(returned) else None
+            paired.append((index, payload, action, item))
+        return paired
+
+    def _recheck_created(
+        self, create: List[Tuple[int, Dict, str]]
+    ) -> Tuple[List, List, List]:
+        """Split creates of a failed batch into (missing, now updates, unknown)"""
+        # Refetch: the failed request may have created some of the products
+        self._wp_ids_by_product_id = None
+        self._existing_map_failed = False
+        if not self._load_existing_product_map():
+            logging.warning(
+                f"⚠️ Cannot verify {len(create)} products of the failed batch, "
+                f"not re-sending them"
+            )
+            return [], [], create
+
+        missing, created, unknown = [], [], []
+        for index, payload, action in create:
+            meta = {item["key"]: item["value"] for item in payload.get("meta_data", [])}
+            product_id = str(meta.get("external_product_id") or "")
+            sku = str(payload.get("sku") or "")
+            if product_id not in self._wp_ids_by_product_id and (
+                not sku or sku not in self._wp_ids_by_sku
+            ):
+                missing.append((index, payload, action))
+                continue
+            wordpress_id = self._wp_ids_by_product_id.get(
+                product_id
+            ) or self._wp_ids_by_sku.get(sku)
+            if wordpress_id:
+                created.append((index, dict(payload, id=wordpress_id), action))
+            else:
+                unknown.append((index, payload, action))
+
+        if created or unknown:
+            logging.info(
+                f"🔎 Failed batch had already created {len(created) + len(unknown)} "
+                f"products; re-sending those as updates where possible"
+            )
+        return missing, created, unknown
+
     def _validate_product_data(self, product_data: Dict) -> bool:
         """Validate product data has required fields"""
         required_fields = ["ProductID", "Name"]
@@ -409,6 +705,21 @@ class WordPressImporter:
         product_id = product_data.get("ProductID")
         sku = product_data.get("SKU")
 
+        # Resolve from the prefetched map; only entries without a WordPress
+        # ID fall through to the per-product meta lookups
+        if self._load_existing_product_map():
+            known = False
+            for mapping, key in (
+                (self._wp_ids_by_product_id, product_id),
+                (self._wp_ids_by_sku, sku),
+            ):
+                if key and str(key) in mapping:
+                    if mapping[str(key)]:
+                        return mapping[str(key)]
+                    known = True
+            if not known:
+                return None
+
         # Try to find by external product ID first
         if product_id:
             existing = self._find_product_by_meta("external_product_id", product_id)
@@ -510,8 +821,46 @@ class WordPressImporter:
         if product_data.get("Services"):
             wp_data["meta"]["product_services"] = json.dumps(product_data["Services"])
 
+        # WooCommerce extras ride along in the same write, not follow-up PUTs
+        if self.config.enable_woocommerce_features:
+            features = self._prepare_woocommerce_features(product_data)
+            wp_data["meta"].update(features["meta"])
+            if features.get("product_cat"):
+                wp_data["product_cat"] = features["product_cat"]
+
         return wp_data
 
+    def _prepare_woocommerce_product_data(self, product_data: Dict) -> Dict:
+        """Translate the WordPress payload to the WooCommerce REST format"""
+        wp_data = self._prepare_wordpress_product_data(product_data)
+        meta = dict(wp_data["meta"])
+
+        wc_data = {
+            "name": wp_data["title"],
+            "description": wp_data["content"],
+            "short_description": wp_data["excerpt"],
+            "status": wp_data["status"],
+        }
+
+        # Fields WooCommerce manages itself instead of as plain meta
+        if meta.get("_sku"):
+            wc_data["sku"] = str(meta.pop("_sku"))
+        product_type = meta.pop("_product_type", None)
+        if product_type:
+            wc_data["type"] = product_type
+            if product_type == "external" and meta.get("product_url"):
+                wc_data["external_url"] = meta["product_url"]
+
+        if wp_data.get("product_cat"):
+            wc_data["categories"] = [
+                {"id": term_id} for term_id in wp_data["product_cat"]
+            ]
+
+        wc_data["meta_data"] = [
+            {"key": key, "value": value} for key, value in meta.items()
+        ]
+        return wc_data
+
     def _create_product(self, product_data: Dict) -> Dict:
         """Create a new product in WordPress"""
         try:
@@ -566,68 +915,114 @@ class WordPressImporter:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def _handle_woocommerce_features(self, wordpress_id: int, product_data: Dict):
-        """Handle WooCommerce-specific features"""
+    def _prepare_woocommerce_features(self, product_data: Dict) -> Dict:
+        """Collect WooCommerce meta and taxonomy fields for the product write"""
+        features = {"meta": {}}
         try:
             # Set product type
-            self._set_product_type(wordpress_id, product_data)
-
-            # Handle product images
-            if self.config.handle_product_images:
-                self._handle_product_images(wordpress_id, product_data)
+            features["meta"]["_product_type"] = self._get_product_type(product_data)
 
             # Handle product variations
             if self.config.handle_product_variations and product_data.get("Variants"):
-                self._handle_product_variations(wordpress_id, product_data)
+                features["meta"]["product_variations"] = json.dumps(
+                    product_data["Variants"]
+                )
 
             # Handle pricing
             if self.config.handle_pricing_tables and product_data.get("PricingTable"):
-                self._handle_pricing_tables(wordpress_id, product_data)
+                features["meta"]["pricing_table"] = json.dumps(
+                    product_data["PricingTable"]
+                )
 
             # Handle categories
             if self.config.create_product_categories and product_data.get(
                 "ProductionInfo", {}
             ).get("Categories"):
-                self._handle_product_categories(wordpress_id, product_data)
+                category_ids = self._get_product_category_ids(product_data)
+                if category_ids:
+                    features["product_cat"] = category_ids
 
             # Handle attributes
             if product_data.get("Attributes"):
-                self._handle_product_attributes(wordpress_id, product_data)
+                features["meta"]["product_attributes"] = json.dumps(
+                    product_data["Attributes"]
+                )
 
         except Exception as e:
             logging.warning(
-                f"⚠️ Error handling WooCommerce features for product {wordpress_id}: {e}"
+                f"⚠️ Error preparing WooCommerce features for product "
+                f"{product_data.get('ProductID')}: {e}"
             )
+        return features
+
+    def _get_product_type(self, product_data: Dict) -> str:
+        """Determine the WooCommerce product type"""
+        if product_data.get("Variants") and len(product_data["Variants"]) > 1:
+            return "variable"
+        elif product_data.get("ProductURL"):
+            return "external"
+        return "simple"
+
+    def _images_enabled(self) -> bool:
+        """Whether product images are uploaded after each write"""
+        return (
+            self.config.enable_woocommerce_features
+            and self.config.handle_product_images
+        )
 
-    def _set_product_type(self, wordpress_id: int, product_data: Dict):
-        """Set WooCommerce product type"""
-        try:
-            # Determine product type based on data
-            product_type = "simple"
+    def _attach_product_images(self, wordpress_id: int, product_data: Dict):
+        """Upload a written product's images and attach them with one PUT"""
+        image_ids = self._upload_product_images(product_data)
+        if not image_ids:
+            return
 
-            if product_data.get("Variants") and len(product_data["Variants"]) > 1:
-                product_type = "variable"
-            elif product_data.get("ProductURL"):
-                product_type = "external"
+        # Featured image, then the rest as gallery
+        meta = {"_thumbnail_id": image_ids[0]}
+        if len(image_ids) > 1:
+            meta["_product_image_gallery"] = ",".join(map(str, image_ids[1:]))
 
-            # Set product type via meta
-            meta_url = f"{self.config.base_url}/wp-json/wp/v2/product/{wordpress_id}"
+        try:
+            url = f"{self.config.base_url}/wp-json/wp/v2/product/{wordpress_id}"
             headers = {"Authorization": f"Bearer {self.config.api_key}"}
-
-            meta_data = {"meta": {"_product_type": product_type}}
-
             response = self.session.put(
-                meta_url, json=meta_data, headers=headers, timeout=self.config.timeout
+                url, json={"meta": meta}, headers=headers, timeout=self.config.timeout
             )
-
             if response.status_code not in [200, 201]:
-                logging.warning(f"⚠️ Failed to set product type for {wordpress_id}")
-
+                logging.warning(
+                    f"⚠️ Failed to attach images to product {wordpress_id}: "
+                    f"HTTP {response.status_code}"
+                )
         except Exception as e:
-            logging.warning(f"⚠️ Error setting product type: {e}")
+            logging.warning(f"⚠️ Error attaching images to product {wordpress_id}: {e}")
+
+    def _attach_batch_images(self, imported: List[Tuple[Dict, int]]):
+        """Upload images of written products and attach them with one batch update"""
+        update = []
+        for product_data, wordpress_id in imported:
+            image_ids = self._upload_product_images(product_data)
+            if image_ids:
+                update.append(
+                    {
+                        "id": wordpress_id,
+                        "images": [{"id": image_id} for image_id in image_ids],
+                    }
+                )
+        if not update:
+            return
+
+        response = self._post_products_batch(
+            [], [(index, payload, "updated") for index, payload in enumerate(update)]
+        )
+        if response is None:
+            failed = len(update)
+        else:
+            failed = sum(1 for *_, item in response if not item or item.get("error"))
+        if failed:
+            logging.warning(f"⚠️ Could not attach images to {failed} products")
 
-    def _handle_product_images(self, wordpress_id: int, product_data: Dict):
-        """Handle product images"""
+    def _upload_product_images(self, product_data: Dict) -> List[int]:
+        """Upload product images and return their media IDs, featured image first"""
+        uploaded_images = []
         try:
             images = []
 
@@ -643,30 +1038,23 @@ class WordPressImporter:
             if product_data.get("VirtualSampleImages"):
                 images.extend(product_data["VirtualSampleImages"])
 
-            if images:
-                # Upload images to WordPress media library
-                uploaded_images = []
-                for image_url in images[:10]:  # Limit to 10 images
-                    try:
-                        image_id = self._upload_image(image_url)
-                        if image_id:
-                            uploaded_images.append(image_id)
-                    except Exception as e:
-                        logging.warning(f"⚠️ Failed to upload image {image_url}: {e}")
-
-                # Set featured image
-                if uploaded_images:
-                    self._set_featured_image(wordpress_id, uploaded_images[0])
-
-                    # Set gallery images
-                    if len(uploaded_images) > 1:
-                        self._set_gallery_images(wordpress_id, uploaded_images[1:])
+            # Upload images to WordPress media library
+            for image_url in images[:10]:  # Limit to 10 images
+                try:
+                    image_id = self._upload_image(image_url)
+                    if image_id:
+                        uploaded_images.append(image_id)
+                except Exception as e:
+                    logging.warning(f"⚠️ Failed to upload image {image_url}: {e}")
 
         except Exception as e:
             logging.warning(f"⚠️ Error handling product images: {e}")
+        return uploaded_images
 
     def _upload_image(self, image_url: str) -> Optional[int]:
-        """Upload image to WordPress media library"""
+        """Upload image to WordPress media library (once per source URL)"""
+        if image_url in self._media_ids:
+            return self._media_ids[image_url]
         try:
             # Download image
             response = self.session.get(image_url, timeout=self.config.timeout)
@@ -702,6 +1090,7 @@ class WordPressImporter:
 
             if response.status_code in [201, 200]:
                 result = response.json()
+                self._media_ids[image_url] = result.get("id")
                 return result.get("id")
 
             return None
@@ -710,152 +1099,211 @@ class WordPressImporter:
             logging.warning(f"⚠️ Error uploading image {image_url}: {e}")
             return None
 
-    def _set_featured_image(self, product_id: int, image_id: int):
-        """Set featured image for product"""
-        try:
-            meta_url = f"{self.config.base_url}/wp-json/wp/v2/product/{product_id}"
-            headers = {"Authorization": f"Bearer {self.config.api_key}"}
-
-            meta_data = {"meta": {"_thumbnail_id": image_id}}
-
-            response = self.session.put(
-                meta_url, json=meta_data, headers=headers, timeout=self.config.timeout
-            )
-
-            if response.status_code not in [200, 201]:
-                logging.warning(
-                    f"⚠️ Failed to set featured image for product {product_id}"
-                )
-
-        except Exception as e:
-            logging.warning(f"⚠️ Error setting featured image: {e}")
-
-    def _set_gallery_images(self, product_id: int, image_ids: List[int]):
-        """Set gallery images for product"""
-        try:
-            meta_url = f"{self.config.base_url}/wp-json/wp/v2/product/{product_id}"
-            headers = {"Authorization": f"Bearer {self.config.api_key}"}
-
-            meta_data = {
-                "meta": {"_product_image_gallery": ",".join(map(str, image_ids))}
-            }
-
-            response = self.session.put(
-                meta_url, json=meta_data, headers=headers, timeout=self.config.timeout
-            )
-
-            if response.status_code not in [200, 201]:
-                logging.warning(
-                    f"⚠️ Failed to set gallery images for product {product_id}"
-                )
-
-        except Exception as e:
-            logging.warning(f"⚠️ Error setting gallery images: {e}")
-
-    def _handle_product_variations(self, product_id: int, product_data: Dict):
-        """Handle product variations"""
-        try:
-            variants = product_data.get("Variants", [])
-            if not variants:
-                return
-
-            # Store variants as meta data
-            meta_url = f"{self.config.base_url}/wp-json/wp/v2/product/{product_id}"
-            headers = {"Authorization": f"Bearer {self.config.api_key}"}
-
-            meta_data = {"meta": {"product_variations": json.dumps(variants)}}
-
-            response = self.session.put(
-                meta_url, json=meta_data, headers=headers, timeout=self.config.timeout
-            )
-
-            if response.status_code not in [200, 201]:
-                logging.warning(
-                    f"⚠️ Failed to set product variations for product {product_id}"
-                )
-
-        except Exception as e:
-            logging.warning(f"⚠️ Error handling product variations: {e}")
-
-    def _handle_pricing_tables(self, product_id: int, product_data: Dict):
-        """Handle pricing tables"""
-        try:
-            pricing_table = product_data.get("PricingTable", [])
-            if not pricing_table:
-                return
-
-            # Store pricing table as meta data
-            meta_url = f"{self.config.base_url}/wp-json/wp/v2/product/{product_id}"
-            headers = {"Authorization": f"Bearer {self.config.api_key}"}
-
-            meta_data = {"meta": {"pricing_table": json.dumps(pricing_table)}}
-
-            response = self.session.put(
-                meta_url, json=meta_data, headers=headers, timeout=self.config.timeout
-            )
-
-            if response.status_code not in [200, 201]:
-                logging.warning(
-                    f"⚠️ Failed to set pricing table for product {product_id}"
-                )
-
-        except Exception as e:
-            logging.warning(f"⚠️ Error handling pricing tables: {e}")
-
-    def _handle_product_categories(self, product_id: int, product_data: Dict):
-        """Handle product categories"""
+    def _get_product_category_ids(self, product_data: Dict) -> List[int]:
+        """Resolve the product's category names to term IDs"""
+        category_ids = []
         try:
             categories = product_data.get("ProductionInfo", {}).get("Categories", [])
-            if not categories:
-                return
 
             # Create or get category terms
-            category_ids = []
             for category_name in categories:
                 category_id = self._get_or_create_category(category_name)
                 if category_id:
                     category_ids.append(category_id)
 
-            if category_ids:
-                # Set product categories
-                categories_url = (
-                    f"{self.config.base_url}/wp-json/wp/v2/product/{product_id}"
+        except Exception as e:
+            logging.warning(f"⚠️ Error handling product categories: {e}")
+        return category_ids
+
+    @staticmethod
+    def _category_key(category_name: str) -> str:
+        """Normalize a category name for cache lookups (WordPress escapes &)"""
+        return html.unescape(str(category_name)).strip().lower()
+
+    def _load_category_cache(self) -> Dict[str, int]:
+        """Category term map, from the cache file if still valid, else prefetched"""
+        if self._category_ids is not None:
+            return self._category_ids
+
+        cached = None
+        if os.path.exists(self.category_cache_file):
+            try:
+                with open(self.category_cache_file, "r") as f:
+                    cached = json.load(f)
+            except Exception as e:
+                logging.warning(f"⚠️ Could not read category cache: {e}")
+
+        if (
+            cached
+            and cached.get("base_url") == self.config.base_url
+            and time.time() - cached.get("fetched_at", 0)
+            < self.config.category_cache_ttl
+        ):
+            # Terms added or deleted elsewhere change the remote count
+            remote_total = self._count_remote_categories()
+            if remote_total is None or remote_total == cached.get("total"):
+                self._category_ids = cached.get("terms", {})
+                self._category_total = cached.get("total", 0)
+                self._category_fetched_at = cached.get("fetched_at", 0)
+                self._category_map_complete = True
+                logging.info(
+                    f"🏷️ Loaded {len(self._category_ids)} categories from cache"
                 )
-                headers = {"Authorization": f"Bearer {self.config.api_key}"}
+                return self._category_ids
+            logging.info("🏷️ Category cache is stale, refetching terms")
 
-                category_data = {"product_cat": category_ids}
+        self._prefetch_categories()
+        return self._category_ids
 
-                response = self.session.put(
-                    categories_url,
-                    json=category_data,
-                    headers=headers,
+    def _count_remote_categories(self) -> Optional[int]:
+        """Number of product_cat terms on the site (None if unknown)"""
+        try:
+            response = self.session.get(
+                f"{self.config.base_url}/wp-json/wp/v2/product_cat",
+                params={"per_page": 1, "_fields": "id"},
+                timeout=self.config.timeout,
+            )
+            if response.status_code == 200:
+                return int(response.headers.get("X-WP-Total"))
+        except Exception:
+            pass
+        return None
+
+    def _prefetch_categories(self):
+        """Fetch all product_cat terms, 100 per page"""
+        self._category_ids = {}
+        self._category_fetched_at = time.time()
+        self._category_map_complete = False
+        url = f"{self.config.base_url}/wp-json/wp/v2/product_cat"
+        page = 1
+        total_pages = 1
+        try:
+            while page <= total_pages:
+                response = self.session.get(
+                    url,
+                    params={"per_page": 100, "page": page, "_fields": "id,name,slug"},
                     timeout=self.config.timeout,
                 )
-
-                if response.status_code not in [200, 201]:
+                if response.status_code != 200:
+                    # Keep the partial map for this run, but never cache it
                     logging.warning(
-                        f"⚠️ Failed to set categories for product {product_id}"
+                        f"⚠️ Failed to fetch categories page {page}: "
+                        f"HTTP {response.status_code}"
                     )
-
+                    return
+                terms = response.json()
+                if not terms:
+                    break
+                for term in terms:
+                    self._category_ids.setdefault(
+                        self._category_key(term["name"]), term["id"]
+                    )
+                total_pages = int(response.headers.get("X-WP-TotalPages", total_pages))
+                self._category_total = int(
+                    response.headers.get("X-WP-Total", len(self._category_ids))
+                )
+                page += 1
         except Exception as e:
-            logging.warning(f"⚠️ Error handling product categories: {e}")
+            logging.warning(f"⚠️ Error prefetching categories: {e}")
+            return
+
+        logging.info(f"🏷️ Prefetched {len(self._category_ids)} product categories")
+        self._category_map_complete = True
+        self._save_category_cache()
+
+    def _save_category_cache(self):
+        """Persist the category term map for later runs (only if complete)"""
+        if not self._category_map_complete:
+            return
+        data = {
+            "base_url": self.config.base_url,
+            "fetched_at": self._category_fetched_at,
+            "total": self._category_total,
+            "terms": self._category_ids,
+        }
+        temp_file = self.category_cache_file + ".tmp"
+        try:
+            with open(temp_file, "w") as f:
+                json.dump(data, f)
+            os.replace(temp_file, self.category_cache_file)
+        except Exception as e:
+            logging.warning(f"⚠️ Could not save category cache: {e}")
 
-    def _get_or_create_category(self, category_name: str) -> Optional[int]:
-        """Get or create a product category"""
+    def _ensure_categories(self, products: List[Dict]):
+        """Create the categories of a set of products that don't exist yet"""
         try:
-            # Search for existing category
-            search_url = f"{self.config.base_url}/wp-json/wp/v2/product_cat"
-            params = {"search": category_name, "per_page": 1}
+            category_ids = self._load_category_cache()
+            missing = {}
+            for product_data in products:
+                for category_name in product_data.get("ProductionInfo", {}).get(
+                    "Categories", []
+                ):
+                    key = self._category_key(category_name)
+                    if key and key not in category_ids:
+                        missing.setdefault(key, category_name)
+            if missing:
+                self._create_categories(list(missing.values()))
+        except Exception as e:
+            logging.warning(f"⚠️ Error preparing categories: {e}")
+
+    def _create_categories(self, category_names: List[str]):
+        """Create categories via the WooCommerce batch endpoint, one by one if absent"""
+        total_before = self._category_total
+        remaining = list(category_names)
+        if self.config.use_batch_endpoint:
+            url = f"{self.config.base_url}/wp-json/wc/v3/products/categories/batch"
+            headers = {"Authorization": f"Bearer {self.config.api_key}"}
+            for i in range(0, len(category_names), WC_BATCH_LIMIT):
+                chunk = category_names[i : i + WC_BATCH_LIMIT]
+                try:
+                    response = self.session.post(
+                        url,
+                        json={
+                            "create": [
+                                {"name": name, "slug": name.lower().replace(" ", "-")}
+                                for name in chunk
+                            ]
+                        },
+                        headers=headers,
+                        timeout=self.config.timeout * 4,
+                    )
+                except Exception as e:
+                    logging.warning(f"⚠️ Category batch request failed: {e}")
+                    break
+                if response.status_code not in [200, 201]:
+                    break
+                for name, item in zip(chunk, response.json().get("create", [])):
+                    if item.get("id") and not item.get("error"):
+                        term_id = item["id"]
+                        self._category_total += 1
+                    else:
+                        # term_exists: made elsewhere, already in the remote count
+                        term_id = ((item.get("error") or {}).get("data") or {}).get(
+                            "resource_id"
+                        )
+                    if term_id:
+                        self._category_ids[self._category_key(name)] = term_id
+            remaining = [
+                name
+                for name in category_names
+                if self._category_key(name) not in self._category_ids
+            ]
 
-            response = self.session.get(
-                search_url, params=params, timeout=self.config.timeout
-            )
-            if response.status_code == 200:
-                categories = response.json()
-                if categories:
-                    return categories[0]["id"]
+        for name in remaining:
+            self._create_category(name)
 
-            # Create new category
+        logging.info(
+            f"🏷️ Created {self._category_total - total_before} new product categories"
+        )
+        self._save_category_cache()
+
+    def _create_category(self, category_name: str) -> Optional[int]:
+        """Create one product category and cache its term ID
+
+        Only terms this call actually creates are added to the cached remote
+        count; a term_exists answer resolves to the existing term.
+        """
+        try:
             create_url = f"{self.config.base_url}/wp-json/wp/v2/product_cat"
             headers = {"Authorization": f"Bearer {self.config.api_key}"}
 
@@ -871,38 +1319,41 @@ class WordPressImporter:
                 timeout=self.config.timeout,
             )
 
+            term_id = None
             if response.status_code in [201, 200]:
-                result = response.json()
-                return result.get("id")
-
-            return None
+                term_id = response.json().get("id")
+                if term_id:
+                    self._category_total += 1
+            elif response.status_code == 400:
+                # Created elsewhere since the cache was built
+                error = response.json()
+                if error.get("code") == "term_exists":
+                    term_id = (error.get("data") or {}).get("term_id")
+
+            if term_id:
+                self._category_ids[self._category_key(category_name)] = term_id
+            return term_id
 
         except Exception as e:
             logging.warning(f"⚠️ Error creating category {category_name}: {e}")
             return None
 
-    def _handle_product_attributes(self, product_id: int, product_data: Dict):
-        """Handle product attributes"""
+    def _get_or_create_category(self, category_name: str) -> Optional[int]:
+        """Get or create a product category"""
         try:
-            attributes = product_data.get("Attributes", {})
-            if not attributes:
-                return
+            category_ids = self._load_category_cache()
+            term_id = category_ids.get(self._category_key(category_name))
+            if term_id:
+                return term_id
 
-            # Store attributes as meta data
-            meta_url = f"{self.config.base_url}/wp-json/wp/v2/product/{product_id}"
-            headers = {"Authorization": f"Bearer {self.config.api_key}"}
-
-            meta_data = {"meta": {"product_attributes": json.dumps(attributes)}}
-
-            response = self.session.put(
-                meta_url, json=meta_data, headers=headers, timeout=self.config.timeout
-            )
-
-            if response.status_code not in [200, 201]:
-                logging.warning(f"⚠️ Failed to set attributes for product {product_id}")
+            term_id = self._create_category(category_name)
+            if term_id:
+                self._save_category_cache()
+            return term_id
 
         except Exception as e:
-            logging.warning(f"⚠️ Error handling product attributes: {e}")
+            logging.warning(f"⚠️ Error creating category {category_name}: {e}")
+            return None
 
     def get_import_statistics(self) -> Dict:
         """Get import statistics"""
@@ -928,6 +1379,10 @@ class WordPressImporter:
     def start_import_session(self):
         """Start an import session"""
         self.stats["start_time"] = datetime.now()
+        # Refetch the existing product map for the new session
+        self._wp_ids_by_product_id = None
+        self._wp_ids_by_sku = None
+        self._existing_map_failed = False
         self.stats["total_processed"] = 0
         self.stats["created"] = 0
         self.stats["updated"] = 0
@@ -971,6 +1426,11 @@ def main():
         default="sync",
         help="Import mode: import (all) or sync (date-based)",
     )
+    parser.add_argument(
+        "--no-batch-endpoint",
+        action="store_true",
+        help="Import products one request at a time instead of via /wc/v3/products/batch",
+    )
 
     args = parser.parse_args()
 
@@ -980,6 +1440,7 @@ def main():
         api_key=args.api_key,
         base_url=args.base_url,
         batch_size=args.batch_size,
+        use_batch_endpoint=not args.no_batch_endpoint,
     )
 
     # Create importer
@@ -1004,10 +1465,10 @@ def main():
 
         # Read input file
         products = []
-        with open(args.input_file, "r") as f:
+        with open_jsonl(args.input_file, "r") as f:
             for line in f:
                 try:
-                    products.append(json.loads(line))
+                    products.append(materialize_product(json.loads(line)))
                 except Exception as e:
                     logging.warning(f"⚠️ Invalid JSON line: {e}")
 
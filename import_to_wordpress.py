@@ -15,6 +15,8 @@ import logging
 import time
 from datetime import datetime
 from espscraper.batch_processor import BatchProcessor
+from espscraper.jsonl_io import open_jsonl, is_jsonl_file, strip_jsonl_suffix
+from espscraper.product_store import materialize_product
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
@@ -637,10 +639,10 @@ def main():
     import_files = [
         f
         for f in sorted(os.listdir(import_dir))
-        if f.endswith(".jsonl")
+        if is_jsonl_file(f)
         and (
             use_enhanced_files
-            and "_enhanced.jsonl" in f
+            and strip_jsonl_suffix(f).endswith("_enhanced")
             or not use_enhanced_files
             and f.startswith(bp.batch_prefix)
         )
@@ -654,7 +656,7 @@ def main():
 
         print(f"📄 Processing batch file: {batch_file}")
 
-        with open(batch_path, "r") as f:
+        with open_jsonl(batch_path, "r") as f:
             for line_num, line in enumerate(f, 1):
                 if current_imported >= total:
                     print(f"✅ Reached product limit ({total}). Stopping import.")
@@ -672,7 +674,7 @@ def main():
                     continue
 
                 try:
-                    product = json.loads(line)
+                    product = materialize_product(json.loads(line))
 
                     # Handle enhanced file structure where product data is nested
                     if "product" in product and isinstance(product["product"], dict):
@@ -14,6 +14,9 @@ from datetime import datetime
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from espscraper.jsonl_io import open_jsonl, JSONL_SUFFIXES
+from espscraper.product_store import materialize_product
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
@@ -36,16 +39,18 @@ def load_products_from_files(use_enhanced_files=True, product_limit=100):
     products = []
     
     if use_enhanced_files:
-        pattern = "enhanced/*_enhanced.jsonl"
+        pattern = "enhanced/*_enhanced"
     else:
-        pattern = "batch/*.jsonl"
+        pattern = "batch/*"
     
-    files = glob.glob(pattern)
+    files = []
+    for suffix in JSONL_SUFFIXES:
+        files.extend(glob.glob(pattern + suffix))
     logging.info(f"Found {len(files)} files matching pattern: {pattern}")
     
     for file_path in files:
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
+            with open_jsonl(file_path, 'r') as f:
                 for line_num, line in enumerate(f, 1):
                     if len(products) >= product_limit:
                         break
@@ -53,7 +58,7 @@ def load_products_from_files(use_enhanced_files=True, product_limit=100):
                     line = line.strip()
                     if line:
                         try:
-                            product = json.loads(line)
+                            product = materialize_product(json.loads(line))
                             products.append(product)
                         except json.JSONDecodeError as e:
                             logging.warning(f"Invalid JSON in {file_path}:{line_num}: {e}")
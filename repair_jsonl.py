@@ -13,30 +13,43 @@ import sys
 import shutil
 from pathlib import Path
 
+from espscraper.jsonl_io import (
+    open_jsonl,
+    detect_compression,
+    TRUNCATED_STREAM_ERRORS,
+)
+
 
 def validate_jsonl(filename):
     """Validate JSONL file and return statistics"""
     valid_lines = 0
     invalid_lines = 0
     invalid_line_numbers = []
-
-    with open(filename, "r") as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                json.loads(line)
-                valid_lines += 1
-            except json.JSONDecodeError as e:
-                invalid_lines += 1
-                invalid_line_numbers.append(line_num)
+    truncated = False
+
+    try:
+        with open_jsonl(filename, "r") as f:
+            for line_num, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    json.loads(line)
+                    valid_lines += 1
+                except json.JSONDecodeError as e:
+                    invalid_lines += 1
+                    invalid_line_numbers.append(line_num)
+    except TRUNCATED_STREAM_ERRORS:
+        # Compressed file cut short; count the lost tail as one invalid line
+        truncated = True
+        invalid_lines += 1
 
     return {
         "valid_lines": valid_lines,
         "invalid_lines": invalid_lines,
         "invalid_line_numbers": invalid_line_numbers,
         "total_lines": valid_lines + invalid_lines,
+        "truncated": truncated,
     }
 
 
@@ -56,21 +69,25 @@ def repair_jsonl(filename, backup=True):
     valid_lines = []
     invalid_count = 0
 
-    with open(filename, "r") as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                json.loads(line)
-                valid_lines.append(line)
-            except json.JSONDecodeError as e:
-                invalid_count += 1
-                print(f"⚠️ Removing invalid JSON on line {line_num}: {e}")
-
-    # Write repaired file
+    try:
+        with open_jsonl(filename, "r") as f:
+            for line_num, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    json.loads(line)
+                    valid_lines.append(line)
+                except json.JSONDecodeError as e:
+                    invalid_count += 1
+                    print(f"⚠️ Removing invalid JSON on line {line_num}: {e}")
+    except TRUNCATED_STREAM_ERRORS as e:
+        invalid_count += 1
+        print(f"⚠️ Compressed stream is truncated, dropping the unreadable tail: {e}")
+
+    # Write repaired file (same compression as the original)
     temp_file = filename + ".repaired"
-    with open(temp_file, "w") as f:
+    with open_jsonl(temp_file, "w", compression=detect_compression(filename)) as f:
         for line in valid_lines:
             f.write(line + "\n")
 
@@ -108,6 +125,8 @@ def main():
         print(f"✅ Valid lines: {stats['valid_lines']}")
         print(f"❌ Invalid lines: {stats['invalid_lines']}")
 
+        if stats["truncated"]:
+            print("⚠️ Compressed stream is truncated")
         if stats["invalid_lines"] > 0:
             print(f"⚠️ Invalid line numbers: {stats['invalid_line_numbers']}")
             print("💡 Run without --validate to repair the file")
@@ -19,6 +19,9 @@ from typing import Dict, List, Optional, Tuple
 
 import requests
 
+from espscraper.jsonl_io import open_jsonl
+from espscraper.product_store import materialize_product
+
 try:
     from PIL import Image
     from io import BytesIO
@@ -147,7 +150,7 @@ def main():
     print("ProductID | Base (WxH / KB) -> Best (WxH / KB) | Best URL")
     print("-" * 120)
 
-    with open(args.input, "r") as f:
+    with open_jsonl(args.input, "r") as f:
         for line in f:
             if args.limit and tested >= args.limit:
                 break
@@ -155,7 +158,7 @@ def main():
             if not line:
                 continue
             try:
-                item = json.loads(line)
+                item = materialize_product(json.loads(line))
             except Exception:
                 continue
 
@@ -0,0 +1,194 @@
+"""Offline checks for the batch, archive, metrics and index building blocks"""
+
+import gzip
+import json
+import os
+
+import pytest
+
+from espscraper.batch_processor import BatchProcessor
+from espscraper.jsonl_io import ZSTD_AVAILABLE, open_jsonl
+from espscraper.metrics import LatencyHistogram
+from espscraper.product_index import ProductIndex
+from espscraper.response_archive import ResponseArchive
+
+
+@pytest.fixture(autouse=True)
+def _in_tmp_path(tmp_path, monkeypatch):
+    # Keep anything written relative to the working directory out of the repo
+    monkeypatch.chdir(tmp_path)
+
+
+def read_jsonl(path):
+    with open_jsonl(str(path)) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_lines(path, product_ids):
+    with open(path, "w") as f:
+        for product_id in product_ids:
+            f.write(json.dumps({"ProductID": product_id}) + "\n")
+
+
+def make_processor(tmp_path, batch_dir="batch", **kwargs):
+    return BatchProcessor(
+        batch_size=2,
+        batch_dir=str(tmp_path / batch_dir),
+        main_output_file=str(tmp_path / "main.jsonl"),
+        **kwargs,
+    )
+
+
+def test_merge_appends_only_new_batches(tmp_path):
+    processor = make_processor(tmp_path)
+    for product_id in ("1", "2"):
+        processor.add_product({"product_id": product_id, "name": "x"})
+    assert processor.merge_batches_to_main()
+
+    for product_id in ("3", "4"):
+        processor.add_product({"product_id": product_id, "name": "x"})
+    assert processor.merge_batches_to_main()
+    processor.close()
+
+    main_ids = [record["product_id"] for record in read_jsonl(tmp_path / "main.jsonl")]
+    assert main_ids == ["1", "2", "3", "4"]
+    index_ids = (tmp_path / "main.ids.txt").read_text().split()
+    assert index_ids == ["1", "2", "3", "4"]
+
+
+def test_merge_skips_ids_already_in_main_output(tmp_path):
+    processor = make_processor(tmp_path)
+    for product_id in ("1", "2"):
+        processor.add_product({"product_id": product_id, "name": "x"})
+    assert processor.merge_batches_to_main()
+    processor.close()
+
+    # A later run that doesn't know about the first run's batches
+    rerun = make_processor(tmp_path, "batch2", enable_deduplication=False)
+    for product_id in ("2", "5"):
+        rerun.add_product({"product_id": product_id, "name": "y"})
+    assert rerun.merge_batches_to_main()
+    rerun.close()
+
+    main_ids = [record["product_id"] for record in read_jsonl(tmp_path / "main.jsonl")]
+    assert main_ids == ["1", "2", "5"]
+    assert (tmp_path / "main.ids.txt").read_text().split() == ["1", "2", "5"]
+
+
+@pytest.mark.parametrize(
+    "suffix",
+    [
+        ".jsonl.gz",
+        pytest.param(
+            ".jsonl.zst",
+            marks=pytest.mark.skipif(not ZSTD_AVAILABLE, reason="needs zstandard"),
+        ),
+    ],
+)
+def test_jsonl_round_trip(tmp_path, suffix):
+    path = str(tmp_path / ("products" + suffix))
+    with open_jsonl(path, "w") as f:
+        f.write(json.dumps({"product_id": "1", "name": "Mug"}) + "\n")
+    # Appends add a new gzip member / zstd frame, read back to back
+    with open_jsonl(path, "a") as f:
+        f.write(json.dumps({"product_id": "2", "name": "Pen"}) + "\n")
+
+    assert read_jsonl(path) == [
+        {"product_id": "1", "name": "Mug"},
+        {"product_id": "2", "name": "Pen"},
+    ]
+
+
+def test_archive_reads_truncated_segment(tmp_path):
+    archive = ResponseArchive(str(tmp_path / "raw"))
+    sizes = []
+    for product_id in ("1", "2", "3"):
+        assert archive.append(product_id, {"Id": product_id, "Name": "x" * 200})
+        sizes.append(os.path.getsize(archive.segment_path))
+    with open(archive.segment_path, "rb") as f:
+        data = f.read()
+    archive.close()
+
+    # Cut the segment halfway through the third record, as a crash would
+    crashed = ResponseArchive(str(tmp_path / "crashed"))
+    os.makedirs(crashed.archive_dir)
+    segment = os.path.join(crashed.archive_dir, "raw_20240101_000000_1.jsonl.gz")
+    with open(segment, "wb") as f:
+        f.write(data[: (sizes[1] + sizes[2]) // 2])
+
+    with pytest.raises((EOFError, OSError)):
+        with gzip.open(segment, "rb") as f:
+            f.read()
+    records = list(crashed.iter_records())
+    assert [record["product_id"] for record in records] == ["1", "2"]
+
+
+def test_histogram_buckets_bound_relative_error():
+    histogram = LatencyHistogram()
+    for value_us in (0, 1, 31, 32, 33, 1000, 123456, 10**7):
+        lower, upper = histogram._bucket_bounds(value_us)
+        assert lower <= value_us <= upper
+        # 16 sub-buckets per octave: exact below 32us, within 1/16 above
+        assert upper - lower + 1 <= max(1, lower / 16)
+    assert histogram._bucket_bounds(1000) == (992, 1023)
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.record(ms / 1000.0)
+
+    assert histogram.count == 100
+    assert histogram.percentile(50) == pytest.approx(50, rel=0.03)
+    assert histogram.percentile(99) == pytest.approx(99, rel=0.03)
+    assert histogram.percentile(100) <= 100
+    assert sum(histogram.buckets.values()) == 100
+
+
+def test_product_index_catches_up_on_append(tmp_path):
+    output = tmp_path / "out.jsonl"
+    write_lines(output, ["1", "2"])
+    ProductIndex(str(output)).sync()
+
+    with open(output, "a") as f:
+        f.write(json.dumps({"ProductID": "3"}) + "\n")
+    index = ProductIndex(str(output)).sync()
+
+    assert index.ids() == {"1", "2", "3"}
+    assert index.read_product("3") == {"ProductID": "3"}
+
+
+def test_product_index_rebuilds_rewritten_output(tmp_path):
+    output = tmp_path / "out.jsonl"
+    write_lines(output, ["1", "2"])
+    ProductIndex(str(output)).sync()
+
+    # Rewritten in place (same inode) and grown: must not look like an append
+    write_lines(output, ["30", "40", "50"])
+    index = ProductIndex(str(output)).sync()
+
+    assert index.ids() == {"30", "40", "50"}
+    assert index.read_product("40") == {"ProductID": "40"}
+
+
+def test_product_index_replays_log_after_crash(tmp_path):
+    output = tmp_path / "out.jsonl"
+    write_lines(output, ["1"])
+    index = ProductIndex(str(output)).sync()
+    with open(output, "a") as f:
+        for product_id in ("2", "3"):
+            line = json.dumps({"ProductID": product_id}) + "\n"
+            f.write(line)
+            f.flush()
+            index.add({"ProductID": product_id}, line)
+    assert os.path.exists(index.log_file)
+
+    # No save(): the next run replays the log instead of rescanning
+    reloaded = ProductIndex(str(output)).sync()
+    assert reloaded.ids() == {"1", "2", "3"}
+    # Fingerprint matches the output as sync compares it (same head length)
+    head_bytes = reloaded.output_state["head_bytes"]
+    assert reloaded.output_state == reloaded._output_state(head_bytes)
+
+    reloaded.save()
+    assert not os.path.exists(reloaded.log_file)
@@ -0,0 +1,35 @@
+"""Selenium records share a schema whether built from the XHR or the DOM"""
+
+import pytest
+
+pytest.importorskip("lxml")
+pytest.importorskip("selenium")
+
+from espscraper.product_extraction import ApiProductExtractor  # noqa: E402
+from espscraper.scrape_product_details import (  # noqa: E402
+    ProductDetailScraper,
+    selenium_record_from_product_data,
+)
+
+PAGE_URL = "https://espweb.asicentral.com/Default.aspx?appCode=WESP#/product/1"
+
+
+def test_xhr_and_dom_records_share_keys():
+    # The snapshot extractor never touches the driver, so no browser is needed
+    scraper = ProductDetailScraper.__new__(ProductDetailScraper)
+    dom_record = scraper.extract_product_from_snapshot(
+        {"html": "<html><body></body></html>", "url": PAGE_URL}
+    )
+    product = ApiProductExtractor()._extract_product_data(
+        {"Id": 1, "Name": "Mug", "UpdateDate": "2024-01-01"},
+        "1",
+        0.0,
+        [],
+        extraction_method="xhr_capture",
+    )
+    xhr_record = selenium_record_from_product_data(product, PAGE_URL)
+
+    assert dom_record is not None
+    assert set(xhr_record) == set(dom_record)
+    assert xhr_record["ProductID"] == "1"
+    assert xhr_record["UpdateDate"] == "2024-01-01"
@@ -10,6 +10,8 @@ import os
 import sys
 import argparse
 
+from espscraper.jsonl_io import open_jsonl, is_jsonl_file
+
 
 def validate_batches(batch_dir: str = "batch") -> bool:
     """Validate all batch files in the specified directory"""
@@ -22,14 +24,14 @@ def validate_batches(batch_dir: str = "batch") -> bool:
     total_products = 0
 
     for filename in os.listdir(batch_dir):
-        if filename.startswith("batch_") and filename.endswith(".jsonl"):
+        if filename.startswith("batch_") and is_jsonl_file(filename):
             total_files += 1
             filepath = os.path.join(batch_dir, filename)
             invalid_lines = 0
             valid_lines = 0
 
             try:
-                with open(filepath, "r") as f:
+                with open_jsonl(filepath, "r") as f:
                     for line_num, line in enumerate(f, 1):
                         line = line.strip()
                         if not line:
@@ -76,12 +78,12 @@ def get_batch_stats(batch_dir: str = "batch") -> dict:
         return stats
 
     for filename in os.listdir(batch_dir):
-        if filename.startswith("batch_") and filename.endswith(".jsonl"):
+        if filename.startswith("batch_") and is_jsonl_file(filename):
             stats["batch_count"] += 1
             filepath = os.path.join(batch_dir, filename)
 
             try:
-                with open(filepath, "r") as f:
+                with open_jsonl(filepath, "r") as f:
                     product_count = sum(1 for line in f if line.strip())
                 stats["total_products"] += product_count
                 stats["batch_files"].append(